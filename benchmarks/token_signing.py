@@ -0,0 +1,53 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Micro-benchmark of the per-token EAS request signing cost.
+
+Compares signing with a freshly decoded secret and a new HMAC per token against copying the
+keyed HMAC precomputed by TokenUtil. Run with `python -m benchmarks.token_signing`."""
+import base64
+import hashlib
+import hmac
+import timeit
+
+from connectchain.test.setup_utils import get_mock_config
+from connectchain.utils import TokenUtil
+
+CONSUMER_ID = "consumer-id"
+CONSUMER_SECRET = base64.b64encode(b"0123456789abcdef0123456789abcdef").decode()
+ITERATIONS = 200_000
+
+
+def sign_per_call(timestamp: int) -> str:
+    """signature as computed before the signing key was precomputed"""
+    message = bytearray(f"{CONSUMER_ID}-2-{timestamp}", "utf-8")
+    digest = hmac.new(base64.b64decode(CONSUMER_SECRET), message, digestmod=hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest)[:-1].decode("utf-8")
+
+
+def main() -> None:
+    """print the per-signature cost of both approaches"""
+    token_util = TokenUtil(CONSUMER_ID, CONSUMER_SECRET, get_mock_config())
+    sign_precomputed = token_util._TokenUtil__get_signature  # pylint: disable=protected-access
+    assert sign_per_call(1700000000000) == sign_precomputed("2", 1700000000000)
+    results = {
+        "per call": timeit.timeit(lambda: sign_per_call(1700000000000), number=ITERATIONS),
+        "precomputed": timeit.timeit(
+            lambda: sign_precomputed("2", 1700000000000), number=ITERATIONS
+        ),
+    }
+    for name, seconds in results.items():
+        print(f"{name:>12}: {seconds / ITERATIONS * 1e6:.2f} us/signature")
+    print(f"{'speedup':>12}: {results['per call'] / results['precomputed']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,4 +12,6 @@
 """LCEL package."""
 from .logger import *
 from .model import *
+from .rate_limit import LCELRateLimiter, RateLimit
 from .retry import LCELRetry
+from .router import BackendRouter
@@ -10,15 +10,35 @@
 # or implied. See the License for the specific language governing permissions and limitations under
 # the License.
 """LCEL model module"""
-import os
-from typing import Any
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 from langchain.chat_models import ChatOpenAI
 from langchain.llms.openai import AzureOpenAI
 from langchain.schema.language_model import BaseLanguageModel
 
-from connectchain.utils import Config, SessionMap, get_token_from_env
+from connectchain.utils import (
+    AuthTokenStore,
+    Config,
+    SessionMap,
+    aget_token_from_env,
+    get_token_from_env,
+)
+from connectchain.utils.client_pool import ClientPool
+from connectchain.utils.compiled_config import ModelSettings
 from connectchain.utils.llm_proxy_wrapper import wrap_llm_with_proxy
+from connectchain.utils.token_util import DEFAULT_EXPIRY_MARGIN, token_ttl
+
+from .rate_limit import LCELRateLimiter, RateLimit
+from .router import BackendRouter
+
+# settings each cached LLM instance was built from, by session key
+_model_settings_: Dict[str, ModelSettings] = {}
+# requests and tokens per minute limits, by model index
+_rate_limits_: Dict[str, RateLimit] = {}
+_rate_limits_lock_ = threading.Lock()
+# retries of the clients of a backend router, which fails over to the next backend instead
+BACKEND_MAX_RETRIES = 0
 
 
 class LCELModelException(BaseException):
@@ -34,58 +54,189 @@ def model(index: Any = "1") -> BaseLanguageModel:
     return llm
 
 
+async def amodel(index: Any = "1") -> BaseLanguageModel:
+    """
+    Async counterpart of `model` for use inside a running event loop,
+    the auth token is fetched without blocking the loop
+    """
+    llm = await _aget_model_(index)
+    return llm
+
+
 def _get_model_(index: Any) -> BaseLanguageModel:
     """Get the model config based on the models defined in the config"""
-    config = Config.from_env()
-    try:
-        models = config.models
-    except KeyError as ex:
-        raise LCELModelException("No models defined in config") from ex
-    model_config = models[index]
-    if model_config is None:
-        raise LCELModelException(f'Model config at index "{index}" is not defined')
+    config, model_config = _get_model_config_(index)
     model_instance = None
     if model_config.provider == "openai":
         model_instance = _get_openai_model_(index, config, model_config)
+    return _limit_rate_(_check_model_(model_instance), model_config)
+
+
+async def _aget_model_(index: Any) -> BaseLanguageModel:
+    """Get the model config based on the models defined in the config asynchronously"""
+    config, model_config = _get_model_config_(index)
+    model_instance = None
+    if model_config.provider == "openai":
+        model_instance = await _aget_openai_model_(index, config, model_config)
+    return _limit_rate_(_check_model_(model_instance), model_config)
+
+
+def _get_model_config_(index: Any) -> Tuple[Config, ModelSettings]:
+    """Get the config and the effective settings of the model at the given index"""
+    config = Config.from_env()
+    models = config.compiled.models
+    if models is None:
+        raise LCELModelException("No models defined in config")
+    model_config = models.get(str(index))
+    if model_config is None:
+        raise LCELModelException(f'Model config at index "{index}" is not defined')
+    return config, model_config
+
+
+def _check_model_(model_instance: Optional[BaseLanguageModel]) -> BaseLanguageModel:
+    """Check that the provider of the model is supported"""
     if model_instance is None:
         raise LCELModelException("Not implemented")
-    try:
-        proxy_config = model_config.proxy
-    except KeyError:
-        # Proxy settings not required
-        pass
-    if proxy_config is None:
-        try:
-            proxy_config = config.proxy
-            # Proxy settings not required
-        except KeyError:
-            pass
-    if proxy_config is not None:
-        # Convert to BaseLLM if needed for proxy wrapping
-        wrap_llm_with_proxy(model_instance, proxy_config)  # type: ignore[arg-type]
     return model_instance
 
 
-def _get_openai_model_(index: Any, config: Any, model_config: Any) -> BaseLanguageModel:
+def _limit_rate_(
+    model_instance: BaseLanguageModel, model_config: ModelSettings
+) -> BaseLanguageModel:
+    """Hold back the calls of the model to stay within its rpm and tpm limits, when configured"""
+    if model_config.rpm is None and model_config.tpm is None:
+        return model_instance
+    with _rate_limits_lock_:
+        rate_limit = _rate_limits_.get(model_config.index)
+        # the limits are shared by every instance of the model, and kept until they change
+        if rate_limit is None or (rate_limit.rpm, rate_limit.tpm) != (
+            model_config.rpm,
+            model_config.tpm,
+        ):
+            rate_limit = RateLimit(model_config.rpm, model_config.tpm)
+            _rate_limits_[model_config.index] = rate_limit
+    return LCELRateLimiter(model_instance, rate_limit)  # type: ignore[return-value]
+
+
+def _get_openai_model_(index: Any, config: Any, model_config: ModelSettings) -> BaseLanguageModel:
     """Get the OpenAI LLM instance"""
-    model_session_key = SessionMap.uuid_from_config(config, model_config)
-    auth_token = os.getenv(model_session_key)
-    session_map = SessionMap(config.eas.token_refresh_interval)
-    if auth_token is None or session_map.is_expired(model_session_key):
+    model_session_key, llm, auth_token = _find_openai_session_(config, model_config)
+    if llm is not None:
+        return llm
+    if auth_token is None:
         auth_token = get_token_from_env(index)
-        os.environ[model_session_key] = auth_token
-        if model_config.type == "chat":
-            llm: BaseLanguageModel = _get_chat_model_(auth_token, model_config)
-        else:
-            llm = _get_azure_model_(auth_token, model_config)
-        # Note: SessionMap expects LLMResult but we're storing LLM instances
-        session_map.new_session(model_session_key, llm)  # type: ignore[arg-type]
+    return _new_openai_session_(model_session_key, auth_token, model_config)
+
+
+async def _aget_openai_model_(
+    index: Any, config: Any, model_config: ModelSettings
+) -> BaseLanguageModel:
+    """Get the OpenAI LLM instance asynchronously"""
+    model_session_key, llm, auth_token = _find_openai_session_(config, model_config)
+    if llm is not None:
         return llm
-    # Note: SessionMap returns LLMResult but we need BaseLanguageModel
-    return session_map.get_llm(model_session_key)  # type: ignore[return-value]
+    if auth_token is None:
+        auth_token = await aget_token_from_env(index)
+    return _new_openai_session_(model_session_key, auth_token, model_config)
+
+
+def _find_openai_session_(
+    config: Any, model_config: ModelSettings
+) -> Tuple[str, Optional[BaseLanguageModel], Optional[str]]:
+    """Get the session key and the live LLM instance of the model, if any, otherwise the token
+    to start a new session with when it is seeded from the environment"""
+    model_session_key = SessionMap.uuid_from_config(config, model_config)
+    session_map = SessionMap(config.compiled.eas.token_refresh_interval)
+    llm = session_map.get(model_session_key)
+    if llm is not None and AuthTokenStore().get(model_session_key) is not None:
+        return model_session_key, _acquire_(llm), None
+    if model_config.eas.token_env and session_map.peek(model_session_key) is None:
+        return model_session_key, None, AuthTokenStore().seed(model_session_key)
+    return model_session_key, None, None
+
+
+def _new_openai_session_(
+    model_session_key: str, auth_token: str, model_config: ModelSettings
+) -> BaseLanguageModel:
+    """Save the LLM instance for a new token in the session map, renewing the cached instance
+    when it was built from the same settings"""
+    AuthTokenStore().set(model_session_key, auth_token, bool(model_config.eas.token_env))
+    session_map = SessionMap()
+    llm: Any = session_map.peek(model_session_key)
+    if llm is not None and _model_settings_.get(model_session_key) == model_config:
+        _swap_auth_token_(llm, auth_token)
+    else:
+        llm = _build_openai_clients_(auth_token, model_config)
+    _model_settings_[model_session_key] = model_config
+    # Do not keep the model past the expiry of its token, when EAS provided one
+    margin = model_config.eas.expiry_margin
+    expires_in = token_ttl(
+        auth_token, session_map.expires_in, DEFAULT_EXPIRY_MARGIN if margin is None else margin
+    )
+    session_map.new_session(model_session_key, llm, expires_in)
+    return _acquire_(llm)
+
+
+def _build_openai_clients_(
+    auth_token: str, model_config: ModelSettings, max_retries: Optional[int] = None
+) -> Any:
+    """Build the router over the backends of the model, the client pool or the LLM instance"""
+    if model_config.backends:
+        # the router fails over right away, the clients of the backends must not retry themselves
+        return BackendRouter.build(
+            lambda backend: _build_openai_clients_(
+                auth_token, model_config.for_backend(backend), BACKEND_MAX_RETRIES
+            ),
+            model_config.backends,
+            model_config.routing,
+            model_config.cooldown,
+        )
+    if model_config.pool_size > 1:
+        # each client of the pool sends its requests through the proxy on its own transport
+        return ClientPool.build(
+            lambda: _get_openai_client_(auth_token, model_config, max_retries),
+            model_config.pool_size,
+            model_config.pool_strategy,
+            model_config.proxy,
+        )
+    llm = _get_openai_client_(auth_token, model_config, max_retries)
+    # Proxy settings not required
+    if model_config.proxy is not None:
+        # the proxy is set once on the transport of the client, not on every model() call
+        wrap_llm_with_proxy(llm, model_config.proxy)  # type: ignore[arg-type]
+    return llm
+
+
+def _acquire_(llm: Any) -> BaseLanguageModel:
+    """Hand out a client of the pool, or the LLM instance itself"""
+    if isinstance(llm, ClientPool):
+        return llm.acquire()  # type: ignore[no-any-return]
+    return llm  # type: ignore[no-any-return]
+
+
+def _swap_auth_token_(llm: Any, auth_token: str) -> None:
+    """Replace the token of a cached LLM instance or of each client of a pool or router. The token
+    is read on every request, so the clients are kept instead of being rebuilt when it is renewed"""
+    for client in llm if isinstance(llm, (ClientPool, BackendRouter)) else [llm]:
+        client.openai_api_key = auth_token
+
+
+def _get_openai_client_(
+    auth_token: str, model_config: ModelSettings, max_retries: Optional[int] = None
+) -> BaseLanguageModel:
+    """Get a new LLM instance of the configured type, `max_retries` defaults to LangChain's"""
+    if model_config.type == "chat":
+        return _get_chat_model_(auth_token, model_config, max_retries)
+    return _get_azure_model_(auth_token, model_config, max_retries)
+
+
+def _retry_kwargs_(max_retries: Optional[int]) -> Dict[str, Any]:
+    return {} if max_retries is None else {"max_retries": max_retries}
 
 
-def _get_chat_model_(auth_token: str, model_config: Any) -> ChatOpenAI:
+def _get_chat_model_(
+    auth_token: str, model_config: ModelSettings, max_retries: Optional[int] = None
+) -> ChatOpenAI:
     """Get a ChatOpenAI instance"""
     llm = ChatOpenAI(
         # Note: ChatOpenAI uses model parameter
@@ -97,11 +248,14 @@ def _get_chat_model_(auth_token: str, model_config: Any) -> ChatOpenAI:
             "api_version": model_config.api_version,
             "api_type": "azure",
         },
+        **_retry_kwargs_(max_retries),
     )
     return llm
 
 
-def _get_azure_model_(auth_token: str, model_config: Any) -> AzureOpenAI:
+def _get_azure_model_(
+    auth_token: str, model_config: ModelSettings, max_retries: Optional[int] = None
+) -> AzureOpenAI:
     """Get an AzureOpenAI instance"""
     llm = AzureOpenAI(
         # Note: AzureOpenAI uses model parameter
@@ -114,5 +268,6 @@ def _get_azure_model_(auth_token: str, model_config: Any) -> AzureOpenAI:
             "api_version": model_config.api_version,
             "api_type": "azure",
         },
+        **_retry_kwargs_(max_retries),
     )
     return llm
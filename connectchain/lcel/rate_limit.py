@@ -0,0 +1,159 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Requests and tokens per minute limits of a model"""
+import asyncio
+import math
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from langchain.schema import PromptValue
+from langchain.schema.runnable import Runnable, RunnableConfig
+from langchain.schema.runnable.utils import Input
+
+# average length of a token in characters, used to estimate the prompt size
+CHARS_PER_TOKEN = 4
+# tokens added by the chat format to each message
+MESSAGE_OVERHEAD = 4
+# seconds of quota that can be spent at once, quotas are enforced over short windows
+BURST_SECONDS = 10.0
+
+
+def estimate_tokens(prompt: Any) -> int:
+    """rough number of tokens of a prompt given as text, a prompt value or messages"""
+    if isinstance(prompt, PromptValue):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, str):
+        return math.ceil(len(prompt) / CHARS_PER_TOKEN)
+    if isinstance(prompt, (list, tuple)):
+        return sum(
+            MESSAGE_OVERHEAD + estimate_tokens(getattr(message, "content", message))
+            for message in prompt
+        )
+    return estimate_tokens(str(prompt))
+
+
+class TokenBucket:  # pylint: disable=too-few-public-methods
+    """Token bucket refilled at `per_minute` units per minute, holding at most `BURST_SECONDS`
+    of them. Callers reserve units up front and wait for the returned time, so that waiting
+    callers are served in order without polling the bucket."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """take `amount` units, returns the seconds to wait before using them"""
+        # a request larger than the bucket would never fit, it waits for a full bucket instead
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimit:
+    """Requests (`rpm`) and tokens (`tpm`) per minute limits shared by the calls of a model"""
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock) if tpm else None
+
+    def reserve(self, tokens: int) -> float:
+        """reserve a request of `tokens` tokens, returns the seconds to wait before sending it"""
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.reserve(1)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens: int) -> None:
+        """block until a request of `tokens` tokens can be sent"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int) -> None:
+        """wait, without blocking the event loop, until a request of `tokens` tokens can be sent"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class LCELRateLimiter(Runnable):
+    """This class holds back the calls of an LCEL-compliant Runnable to stay within its quota.
+
+    Args:
+        runnable (Runnable): The runnable to limit.
+        rate_limit (RateLimit): The limits, shared by all runnables of the model.
+        estimate (callable): The function estimating the tokens of a prompt."""
+
+    def __init__(
+        self,
+        runnable: Any,
+        rate_limit: RateLimit,
+        estimate: Callable[[Any], int] = estimate_tokens,
+    ) -> None:
+        self.runnable = runnable
+        self.rate_limit = rate_limit
+        self.estimate = estimate
+
+    def __getattr__(self, name: str) -> Any:
+        # attributes of the model, e.g. its name or token count, are read from the runnable
+        if name == "runnable":
+            raise AttributeError(name)
+        return getattr(self.runnable, name)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        self.rate_limit.acquire(self.estimate(args[0] if args else kwargs.get("prompt", "")))
+        return self.runnable(*args, **kwargs)
+
+    # pylint: disable=W0622 # LangChain overrode input
+    def invoke(self, input: Input, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        self.rate_limit.acquire(self.estimate(input))
+        return self.runnable.invoke(input, config, **kwargs)
+
+    # pylint: disable=W0622 # LangChain overrode input
+    async def ainvoke(
+        self, input: Input, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Any:
+        await self.rate_limit.aacquire(self.estimate(input))
+        return await self.runnable.ainvoke(input, config, **kwargs)
+
+    # pylint: disable=W0622 # LangChain overrode input
+    def stream(
+        self, input: Input, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Iterator[Any]:
+        self.rate_limit.acquire(self.estimate(input))
+        yield from self.runnable.stream(input, config, **kwargs)
+
+    # pylint: disable=W0622 # LangChain overrode input
+    async def astream(
+        self, input: Input, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        await self.rate_limit.aacquire(self.estimate(input))
+        async for chunk in self.runnable.astream(input, config, **kwargs):
+            yield chunk
@@ -7,9 +7,10 @@ from langchain.schema.runnable.config import RunnableConfig
 from langchain.schema.runnable.utils import Input
 
 from ..utils import abase_retry, base_retry
+from ..utils.retry import RetryAfter
 
 
-class LCELRetry(Runnable):
+class LCELRetry(Runnable):  # pylint: disable=too-many-instance-attributes
     """This class provides a retry mechanism for LCEL-compliant Runnables.
 
     Args:
@@ -18,7 +19,10 @@ class LCELRetry(Runnable):
         sleep_time (int): The time to sleep between retries.
         exceptions (Union[List[Exception], Exception]): The exceptions to catch.
         ebo (bool): Whether to use exponential backoff.
-        log_func (callable): The function to use for logging."""
+        log_func (callable): The function to use for logging.
+        jitter (str): The jitter strategy, "full", "equal" or "decorrelated".
+        max_sleep (float): The maximum time to sleep between retries.
+        retry_after (callable): The function returning the delay suggested by the server."""
 
     def __init__(  # pylint: disable=too-many-arguments, too-many-positional-arguments
         self,
@@ -28,6 +32,9 @@ class LCELRetry(Runnable):
         exceptions: Union[Tuple[type[BaseException], ...], type[BaseException]] = Exception,
         ebo: bool = False,
         log_func: Any = print,
+        jitter: Optional[str] = None,
+        max_sleep: Optional[float] = None,
+        retry_after: Optional[RetryAfter] = None,
     ) -> None:
         # Python enforces exceptions must be a tuple.
         if isinstance(exceptions, (list, List)):
@@ -37,6 +44,9 @@ class LCELRetry(Runnable):
         self.exceptions = exceptions
         self.sleep_time = sleep_time
         self.ebo = ebo
+        self.jitter = jitter
+        self.max_sleep = max_sleep
+        self.retry_after = retry_after
         # Set up logging function
         if hasattr(log_func, "debug"):
             self.log_func = log_func.debug
@@ -63,6 +73,9 @@ class LCELRetry(Runnable):
             "exceptions": self.exceptions,
             "ebo": self.ebo,
             "log_func": self.log_func,
+            "jitter": self.jitter,
+            "max_sleep": self.max_sleep,
+            "retry_after": self.retry_after,
         }
 
     def __call__(self, *args: Any, **kwargs: Any) -> Any:
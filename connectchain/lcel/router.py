@@ -0,0 +1,268 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Routing of the calls of a model over the deployments serving it"""
+import threading
+import time
+from logging import Logger
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence
+
+from langchain.schema.runnable import Runnable, RunnableConfig
+from langchain.schema.runnable.utils import Input
+from openai import error as openai_error
+
+from connectchain.utils.client_pool import ClientPool
+from connectchain.utils.compiled_config import (
+    DEFAULT_COOLDOWN,
+    LEAST_LATENCY,
+    ROUTING_STRATEGIES,
+    WEIGHTED_ROUND_ROBIN,
+    BackendSettings,
+)
+from connectchain.utils.exceptions import ConfigException
+from connectchain.utils.llm_proxy_wrapper import close_llm
+
+from .rate_limit import LCELRateLimiter, RateLimit
+
+# weight of the latest call in the latency average of a backend
+LATENCY_SMOOTHING = 0.3
+
+_logger_ = Logger(__name__)
+
+
+def is_backend_error(ex: BaseException) -> bool:
+    """whether the error is caused by the backend, rate limits (429), server errors (5xx),
+    timeouts and connection errors, rather than by the request"""
+    status = getattr(ex, "http_status", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(ex, (openai_error.Timeout, openai_error.APIConnectionError))
+
+
+class Backend:  # pylint: disable=too-few-public-methods
+    """A client, or client pool, of one deployment, its quota and the health of the deployment"""
+
+    def __init__(
+        self, client: Any, weight: int = 1, name: str = "", rate_limit: Optional[RateLimit] = None
+    ):
+        self.client = client
+        self.weight = weight
+        self.name = name
+        self.rate_limit = rate_limit
+        # smooth weighted round-robin counter
+        self.current = 0
+        # moving average of the call latency, None until a call succeeded
+        self.latency: Optional[float] = None
+        # monotonic time until which the backend receives no calls
+        self.ejected_until = 0.0
+
+    def acquire(self) -> Any:
+        """the client to use for the next call, held back to the quota of the deployment"""
+        client = self.client.acquire() if isinstance(self.client, ClientPool) else self.client
+        if self.rate_limit is not None:
+            return LCELRateLimiter(client, self.rate_limit)
+        return client
+
+
+class BackendRouter(Runnable):
+    """Spread the calls of a model over several deployments.
+
+    Backends are picked by smooth weighted round-robin (`weighted_round_robin`) or by the lowest
+    moving average latency (`least_latency`), and backends with an `rpm` or `tpm` quota hold
+    their calls back to stay within it. A backend failing with a rate limit, server or
+    connection error is ejected for `cooldown` seconds and the call is retried on the next one;
+    when every backend is ejected, the one whose cooldown ends first is tried.
+
+    Args:
+        backends (Sequence[Backend]): The backends serving the model.
+        routing (str): The routing strategy.
+        cooldown (float): The seconds a failing backend is ejected for."""
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        routing: str = WEIGHTED_ROUND_ROBIN,
+        cooldown: float = DEFAULT_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not backends:
+            raise ConfigException("A backend router needs at least one backend")
+        if routing not in ROUTING_STRATEGIES:
+            raise ConfigException(f'Unknown routing strategy "{routing}"')
+        self.backends = list(backends)
+        self.routing = routing
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(
+        cls,
+        factory: Callable[[BackendSettings], Any],
+        backends: Sequence[BackendSettings],
+        routing: str = WEIGHTED_ROUND_ROBIN,
+        cooldown: float = DEFAULT_COOLDOWN,
+    ) -> "BackendRouter":
+        """build the client of each backend with `factory`"""
+        return cls(
+            [
+                Backend(
+                    factory(backend),
+                    backend.weight,
+                    backend.api_base,
+                    RateLimit(backend.rpm, backend.tpm) if backend.rpm or backend.tpm else None,
+                )
+                for backend in backends
+            ],
+            routing,
+            cooldown,
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        """the clients of all backends"""
+        for backend in self.backends:
+            if isinstance(backend.client, ClientPool):
+                yield from backend.client
+            else:
+                yield backend.client
+
+    def close(self) -> None:
+        """close the connection pools of the backends"""
+        for backend in self.backends:
+            close_llm(backend.client)
+
+    def _select_(self, tried: List[Backend]) -> Backend:
+        """the backend for the next attempt of a call"""
+        with self._lock:
+            now = self._clock()
+            candidates = [backend for backend in self.backends if backend not in tried]
+            available = [backend for backend in candidates if backend.ejected_until <= now]
+            if not available:
+                return min(candidates, key=lambda backend: backend.ejected_until)
+            if self.routing == LEAST_LATENCY:
+                # backends without a latency yet are tried first
+                return min(
+                    available,
+                    key=lambda backend: -1.0 if backend.latency is None else backend.latency,
+                )
+            total = 0
+            for backend in available:
+                backend.current += backend.weight
+                total += backend.weight
+            selected = max(available, key=lambda backend: backend.current)
+            selected.current -= total
+            return selected
+
+    def _can_fail_over_(self, tried: List[Backend]) -> bool:
+        """whether a backend that was not tried yet is available"""
+        with self._lock:
+            now = self._clock()
+            return any(
+                backend not in tried and backend.ejected_until <= now for backend in self.backends
+            )
+
+    def _succeeded_(self, backend: Backend, started: float) -> None:
+        latency = self._clock() - started
+        with self._lock:
+            if backend.latency is None:
+                backend.latency = latency
+            else:
+                backend.latency += LATENCY_SMOOTHING * (latency - backend.latency)
+            backend.ejected_until = 0.0
+
+    def _failed_(self, backend: Backend, ex: BaseException, tried: List[Backend]) -> bool:
+        """eject the backend when the error is caused by it, returns whether to fail over"""
+        if not is_backend_error(ex):
+            return False
+        with self._lock:
+            backend.ejected_until = self._clock() + self.cooldown
+        _logger_.warning(
+            "Backend %s ejected for %ss: %s", backend.name, self.cooldown, type(ex).__name__
+        )
+        return self._can_fail_over_(tried)
+
+    # pylint: disable=W0622 # LangChain overrode input
+    def invoke(self, input: Input, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        tried: List[Backend] = []
+        while True:
+            backend = self._select_(tried)
+            tried.append(backend)
+            started = self._clock()
+            try:
+                result = backend.acquire().invoke(input, config, **kwargs)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                if not self._failed_(backend, ex, tried):
+                    raise
+                continue
+            self._succeeded_(backend, started)
+            return result
+
+    # pylint: disable=W0622 # LangChain overrode input
+    async def ainvoke(
+        self, input: Input, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Any:
+        tried: List[Backend] = []
+        while True:
+            backend = self._select_(tried)
+            tried.append(backend)
+            started = self._clock()
+            try:
+                result = await backend.acquire().ainvoke(input, config, **kwargs)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                if not self._failed_(backend, ex, tried):
+                    raise
+                continue
+            self._succeeded_(backend, started)
+            return result
+
+    # pylint: disable=W0622 # LangChain overrode input
+    def stream(
+        self, input: Input, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Iterator[Any]:
+        """stream from the selected backend, failing over only until the first chunk"""
+        tried: List[Backend] = []
+        while True:
+            backend = self._select_(tried)
+            tried.append(backend)
+            started = self._clock()
+            streamed = False
+            try:
+                for chunk in backend.acquire().stream(input, config, **kwargs):
+                    streamed = True
+                    yield chunk
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                if not self._failed_(backend, ex, tried) or streamed:
+                    raise
+                continue
+            self._succeeded_(backend, started)
+            return
+
+    # pylint: disable=W0622 # LangChain overrode input
+    async def astream(
+        self, input: Input, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        """stream from the selected backend, failing over only until the first chunk"""
+        tried: List[Backend] = []
+        while True:
+            backend = self._select_(tried)
+            tried.append(backend)
+            started = self._clock()
+            streamed = False
+            try:
+                async for chunk in backend.acquire().astream(input, config, **kwargs):
+                    streamed = True
+                    yield chunk
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                if not self._failed_(backend, ex, tried) or streamed:
+                    raise
+                continue
+            self._succeeded_(backend, started)
+            return
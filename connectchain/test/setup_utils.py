@@ -55,6 +55,16 @@ def get_mock_config(data=None):
     return MockConfig(data)
 
 
+class MockClock:
+    """Clock advanced by the tests"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
 class _TestContextManager(AbstractContextManager):
     def __init__(self, *args, **kwargs):
         pass
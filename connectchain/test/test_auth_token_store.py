@@ -0,0 +1,45 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for AuthTokenStore"""
+import os
+import unittest
+from unittest.mock import patch
+
+from connectchain.utils import AuthTokenStore
+
+
+class TestAuthTokenStore(unittest.TestCase):
+    """Unit testing AuthTokenStore"""
+
+    def setUp(self):
+        self.store = AuthTokenStore()
+        self.store.clear()
+
+    def test_singleton(self):
+        self.assertIs(AuthTokenStore(), self.store)
+
+    @patch.dict(os.environ)
+    def test_tokens_stay_out_of_the_environment(self):
+        self.store.set("SESSION_KEY", "token")
+        self.assertEqual(self.store.get("SESSION_KEY"), "token")
+        self.assertIsNone(os.getenv("SESSION_KEY"))
+        self.store.invalidate("SESSION_KEY")
+        self.assertIsNone(self.store.get("SESSION_KEY"))
+
+    @patch.dict(os.environ, {"SESSION_KEY": "seeded"})
+    def test_environment_opt_in(self):
+        self.assertIsNone(self.store.get("SESSION_KEY"))
+        self.assertEqual(self.store.seed("SESSION_KEY"), "seeded")
+        self.assertEqual(self.store.get("SESSION_KEY"), "seeded")
+        self.assertIsNone(self.store.seed("OTHER_KEY"))
+        self.store.set("SESSION_KEY", "exported", to_env=True)
+        self.assertEqual(os.getenv("SESSION_KEY"), "exported")
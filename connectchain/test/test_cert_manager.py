@@ -0,0 +1,121 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for CertManager"""
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aiohttp import web
+from OpenSSL import crypto as c
+
+from connectchain.utils.cert_manager import CertManager, _read_expiration_
+from connectchain.utils.eas_pool import EASSessionPool
+from connectchain.utils.event_loop import BackgroundLoop
+from connectchain.utils.exceptions import UtilException
+
+
+def make_cert(valid_seconds):
+    """Build a self-signed PEM certificate expiring in `valid_seconds`"""
+    key = c.PKey()
+    key.generate_key(c.TYPE_RSA, 2048)
+    cert = c.X509()
+    cert.get_subject().CN = "connectchain-test"
+    cert.set_serial_number(1)
+    cert.gmtime_adj_notBefore(-3600)
+    cert.gmtime_adj_notAfter(valid_seconds)
+    cert.set_issuer(cert.get_subject())
+    cert.set_pubkey(key)
+    cert.sign(key, "sha256")
+    return c.dump_certificate(c.FILETYPE_PEM, cert)
+
+
+class TestCertManager(unittest.TestCase):
+    """Unit testing CertManager"""
+
+    valid_cert = make_cert(86400)
+    expired_cert = make_cert(-60)
+
+    def setUp(self):
+        CertManager().clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.cert_name = os.path.join(self.tmp_dir.name, "eas.crt")
+        self.server_loop = BackgroundLoop("test-cert-server")
+
+        async def handler(request):
+            if request.match_info["name"] == "valid.crt":
+                return web.Response(body=self.valid_cert)
+            raise web.HTTPNotFound()
+
+        async def start():
+            app = web.Application()
+            app.router.add_get("/{name}", handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            return runner, runner.addresses[0][1]
+
+        self.runner, port = self.server_loop.run(start())
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def tearDown(self):
+        EASSessionPool().close()
+        self.server_loop.run(self.runner.cleanup())
+        self.server_loop.stop()
+        self.tmp_dir.cleanup()
+
+    def write_cert(self, cert_data):
+        with open(self.cert_name, "wb") as writer:
+            writer.write(cert_data)
+
+    def test_existing_cert_is_parsed_once(self):
+        self.write_cert(self.valid_cert)
+        with patch(
+            "connectchain.utils.cert_manager._read_expiration_", side_effect=_read_expiration_
+        ) as mock_read:
+            asyncio.run(CertManager().ensure(None, self.cert_name, None))
+            asyncio.run(CertManager().ensure(None, self.cert_name, None))
+            mock_read.assert_called_once_with(self.cert_name)
+            # a replaced certificate is parsed again
+            self.write_cert(self.valid_cert)
+            stat = os.stat(self.cert_name)
+            os.utime(self.cert_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            asyncio.run(CertManager().ensure(None, self.cert_name, None))
+            self.assertEqual(mock_read.call_count, 2)
+
+    def test_expired_cert(self):
+        self.write_cert(self.expired_cert)
+        with self.assertRaisesRegex(UtilException, "Certificate expired, please renew"):
+            asyncio.run(CertManager().ensure(None, self.cert_name, None))
+
+    def test_missing_cert_is_downloaded(self):
+        asyncio.run(
+            CertManager().ensure(f"{self.base_url}/valid.crt", self.cert_name, len(self.valid_cert))
+        )
+        with open(self.cert_name, "rb") as reader:
+            self.assertEqual(reader.read(), self.valid_cert)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["eas.crt"])
+
+    def test_download_size_mismatch(self):
+        with self.assertRaisesRegex(UtilException, "Failed to Download the certificate"):
+            asyncio.run(CertManager().ensure(f"{self.base_url}/valid.crt", self.cert_name, 1))
+
+    def test_download_failure_leaves_no_file(self):
+        with self.assertRaisesRegex(UtilException, "Failed to Download the certificate"):
+            asyncio.run(CertManager().ensure(f"{self.base_url}/missing.crt", self.cert_name, None))
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_missing_cert_without_url(self):
+        with self.assertRaisesRegex(UtilException, "Failed to Download the certificate"):
+            asyncio.run(CertManager().ensure(None, self.cert_name, None))
@@ -0,0 +1,60 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for ClientPool"""
+import asyncio
+import unittest
+
+from connectchain.utils import ConfigException
+from connectchain.utils.client_pool import ClientPool
+from connectchain.utils.client_transport import ClientTransport, current_transport
+
+
+class MockLLM:
+    """Mock LLM class"""
+
+    def invoke(self, _):
+        """returns the transport bound during the call"""
+        return current_transport()
+
+    async def ainvoke(self, _):
+        """returns the transport bound during the call"""
+        return current_transport()
+
+
+class TestClientPool(unittest.TestCase):
+    """Unit testing ClientPool"""
+
+    def test_round_robin(self):
+        pool = ClientPool.build(MockLLM, 3)
+        clients = [pool.acquire() for _ in range(6)]
+        self.assertEqual(len({id(client) for client in clients}), 3)
+        self.assertEqual(clients[:3], clients[3:])
+
+    def test_clients_use_their_own_transport(self):
+        pool = ClientPool.build(MockLLM, 2)
+        for client, transport in pool.clients:
+            self.assertIs(client.invoke("test"), transport)
+            self.assertIs(asyncio.run(client.ainvoke("test")), transport)
+        self.assertIsNot(pool.clients[0][1], pool.clients[1][1])
+
+    def test_least_in_flight(self):
+        transports = [ClientTransport() for _ in range(3)]
+        pool = ClientPool([(name, t) for name, t in zip("abc", transports)], "least_in_flight")
+        with transports[0].bind(), transports[2].bind():
+            self.assertEqual({pool.acquire() for _ in range(3)}, {"b"})
+        self.assertEqual({pool.acquire() for _ in range(3)}, {"a", "b", "c"})
+
+    def test_invalid_pool(self):
+        with self.assertRaisesRegex(ConfigException, "at least one client"):
+            ClientPool([])
+        with self.assertRaisesRegex(ConfigException, 'Unknown client pool strategy "random"'):
+            ClientPool.build(MockLLM, 1, "random")
@@ -0,0 +1,170 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for client transports"""
+import asyncio
+import threading
+import unittest
+from unittest.mock import Mock
+
+import aiohttp
+import openai
+import requests
+from openai.api_requestor import _thread_context
+
+from connectchain.utils.client_transport import (
+    ClientTransport,
+    DispatchingSession,
+    ProxySession,
+    current_transport,
+    install,
+)
+
+
+class TestClientTransport(unittest.TestCase):
+    """Unit testing ClientTransport and DispatchingSession"""
+
+    def setUp(self):
+        self.requestssession = openai.requestssession
+        openai.requestssession = None
+
+    def tearDown(self):
+        openai.requestssession = self.requestssession
+        _thread_context.__dict__.pop("session", None)
+
+    def test_bind_dispatches_requests(self):
+        """requests go through the session of the bound transport"""
+        transport = ClientTransport({"https": "https://proxy:8080"})
+        transport._session = Mock(requests.Session)  # pylint: disable=protected-access
+        with transport.bind():
+            dispatcher = _thread_context.session
+            self.assertIsInstance(dispatcher, DispatchingSession)
+            self.assertIs(openai.requestssession, dispatcher)
+            self.assertEqual(dispatcher.proxies, {"https": "https://proxy:8080"})
+            dispatcher.request("post", "https://host/path", proxies=dispatcher.proxies)
+        transport.session.request.assert_called_once_with(
+            "post", "https://host/path", proxies={"https": "https://proxy:8080"}
+        )
+        self.assertEqual(dispatcher.proxies, {})
+        self.assertIsNone(current_transport())
+
+    def test_nested_bind_counts_once(self):
+        """nested calls of a client count as one call in flight"""
+        transport = ClientTransport()
+        with transport.bind():
+            with transport.bind():
+                self.assertEqual(transport.in_flight, 1)
+                self.assertIs(current_transport(), transport)
+        self.assertEqual(transport.in_flight, 0)
+
+    def test_bind_sets_aiosession(self):
+        """async calls use the aiohttp session of the transport for the running loop"""
+        transport = ClientTransport()
+
+        async def call():
+            with transport.bind():
+                session = openai.aiosession.get()
+            self.assertIsNone(openai.aiosession.get())
+            self.assertIs(transport.aiosession(), session)
+            await session.close()
+            return session
+
+        self.assertIsNotNone(asyncio.run(call()))
+
+    def test_aiosession_passes_the_proxy_per_request(self):
+        """the proxy is passed with each request rather than as a session default"""
+        transport = ClientTransport({"https": "https://proxy:8080"})
+        sent = []
+
+        async def request(method, url, **kwargs):
+            sent.append(kwargs["proxy"])
+
+        async def call():
+            session = transport.aiosession()
+            self.assertIsInstance(session, ProxySession)
+            await transport.aclose()
+            self.assertTrue(session.closed)
+            session.session = Mock(aiohttp.ClientSession, request=request)
+            await session.request("post", "https://host/path", proxy=None)
+            await session.request("post", "https://host/path", proxy="http://global:1")
+
+        asyncio.run(call())
+        self.assertEqual(sent, ["https://proxy:8080", "http://global:1"])
+
+    def test_aiosession_is_closed_with_its_loop(self):
+        """the session of an event loop is closed when the loop shuts down"""
+        transport = ClientTransport({"https": "https://proxy:8080"})
+
+        async def call():
+            with transport.bind():
+                return openai.aiosession.get()
+
+        first = asyncio.run(call())
+        self.assertTrue(first.closed)
+        second = asyncio.run(call())
+        self.assertIsNot(second, first)
+        self.assertTrue(second.closed)
+
+    def test_close_waits_for_calls_in_flight(self):
+        """closing a transport in use closes its sessions once the last call is done"""
+        transport = ClientTransport()
+        session = transport._session = Mock(requests.Session)  # pylint: disable=protected-access
+        with transport.bind():
+            transport.close()
+            session.close.assert_not_called()
+        session.close.assert_called_once_with()
+        # the transport opens a new session when it is used again
+        self.assertIsNot(transport.session, session)
+
+    def test_close_on_another_loop(self):
+        """aiohttp sessions are closed on the event loop they belong to"""
+        transport = ClientTransport()
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        async def open_session():
+            return transport.aiosession()
+
+        try:
+            session = asyncio.run_coroutine_threadsafe(open_session(), loop).result(5)
+            transport.close()
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop).result(5)
+            self.assertTrue(session.closed)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            loop.close()
+
+    def test_transports_are_isolated_between_threads(self):
+        """each thread sees the transport it bound"""
+        transports = [ClientTransport(), ClientTransport()]
+        seen = []
+        barrier = threading.Barrier(2)
+
+        def worker(transport):
+            with transport.bind():
+                barrier.wait()
+                seen.append(current_transport() is transport)
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in transports]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(seen, [True, True])
+
+    def test_custom_session_is_kept(self):
+        """a session set by the application is not replaced"""
+        custom = requests.Session()
+        openai.requestssession = custom
+        self.assertFalse(install())
+        self.assertIs(openai.requestssession, custom)
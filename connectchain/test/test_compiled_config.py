@@ -0,0 +1,221 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for the compiled config"""
+import dataclasses
+import os
+import unittest
+
+import connectchain
+from connectchain.test.setup_utils import get_mock_config, wrap_model_config
+from connectchain.utils import Config, ConfigException
+from connectchain.utils.compiled_config import CompiledConfig, ModelSettings
+
+MOCK_DATA = {
+    "eas": {"id_key": "id_key", "secret_key": "secret_key", "url": "global_url", "scope": ["a"]},
+    "cert": {"cert_name": "global.crt", "cert_size": 1938},
+    "proxy": {"host": "global_proxy", "port": 8080},
+    "models": {
+        "1": {"provider": "openai", "type": "chat", "model_name": "test_model"},
+        2: {
+            "provider": "openai",
+            "type": "azure",
+            "eas": {"id_key": "other_id", "scope": ["b", "c"]},
+            "cert": {"cert_name": "model.crt"},
+            "proxy": {"host": "model_proxy", "port": "3128"},
+        },
+    },
+}
+
+
+class TestCompiledConfig(unittest.TestCase):
+    """Unit testing CompiledConfig"""
+
+    def test_global_sections_apply_to_models(self):
+        """models without overrides use the global sections"""
+        settings = CompiledConfig.compile(MOCK_DATA).models["1"]
+        self.assertEqual(settings.index, "1")
+        self.assertEqual(settings.model_name, "test_model")
+        self.assertEqual(settings.eas.id_key, "id_key")
+        self.assertEqual(settings.eas.scope, ("a",))
+        self.assertEqual(settings.cert.cert_name, "global.crt")
+        self.assertEqual(settings.proxy.host, "global_proxy")
+
+    def test_model_overrides(self):
+        """eas and cert values are overridden one by one, the proxy as a whole"""
+        settings = CompiledConfig.compile(MOCK_DATA).models["2"]
+        self.assertEqual(settings.eas.id_key, "other_id")
+        self.assertEqual(settings.eas.secret_key, "secret_key")
+        self.assertEqual(settings.eas.url, "global_url")
+        self.assertEqual(settings.eas.scope, ("b", "c"))
+        self.assertEqual(settings.cert.cert_name, "model.crt")
+        self.assertEqual(settings.cert.cert_size, 1938)
+        self.assertEqual((settings.proxy.host, settings.proxy.port), ("model_proxy", 3128))
+
+    def test_session_key(self):
+        """the session key is built from the effective credentials and the model"""
+        models = CompiledConfig.compile(MOCK_DATA).models
+        self.assertEqual(
+            models["1"].session_key, "id_key_secret_key_openai_chat_None_test_model_None"
+        )
+        self.assertEqual(models["2"].session_key, "other_id_secret_key_openai_azure_None_None_None")
+
+    def test_missing_sections(self):
+        """missing sections compile to empty settings"""
+        compiled = CompiledConfig.compile({})
+        self.assertIsNone(compiled.models)
+        self.assertIsNone(compiled.proxy)
+        self.assertIsNone(compiled.eas.id_key)
+        self.assertIsNone(compiled.cert.cert_name)
+
+    def test_client_pool(self):
+        """pool settings default to a single client and are validated"""
+        settings = CompiledConfig.compile(MOCK_DATA).models["1"]
+        self.assertEqual((settings.pool_size, settings.pool_strategy), (1, "round_robin"))
+        data = {"models": {"1": {"pool_size": 4, "pool_strategy": "least_in_flight"}}}
+        settings = CompiledConfig.compile(data).models["1"]
+        self.assertEqual((settings.pool_size, settings.pool_strategy), (4, "least_in_flight"))
+        with self.assertRaisesRegex(ConfigException, 'Invalid pool_size "0" for model index 1'):
+            CompiledConfig.compile({"models": {"1": {"pool_size": 0}}})
+        with self.assertRaisesRegex(ConfigException, 'Invalid pool_strategy "random"'):
+            CompiledConfig.compile({"models": {"1": {"pool_strategy": "random"}}})
+
+    def test_backends(self):
+        """backends take the unset model values from the model entry"""
+        data = {
+            "models": {
+                "1": {
+                    "engine": "engine",
+                    "api_version": "api_version",
+                    "backends": [
+                        {"api_base": "base_east", "weight": 3, "rpm": 60},
+                        {"api_base": "base_west", "engine": "engine_west"},
+                    ],
+                    "routing": "least_latency",
+                    "cooldown": 5,
+                }
+            }
+        }
+        settings = CompiledConfig.compile(data).models["1"]
+        self.assertEqual(
+            [(b.api_base, b.engine, b.api_version, b.weight) for b in settings.backends],
+            [
+                ("base_east", "engine", "api_version", 3),
+                ("base_west", "engine_west", "api_version", 1),
+            ],
+        )
+        self.assertEqual((settings.routing, settings.cooldown), ("least_latency", 5.0))
+        # each backend has its own quota
+        self.assertEqual([(b.rpm, b.tpm) for b in settings.backends], [(60.0, None), (None, None)])
+        backend = settings.for_backend(settings.backends[1])
+        self.assertEqual(
+            (backend.api_base, backend.engine, backend.backends), ("base_west", "engine_west", ())
+        )
+        settings = CompiledConfig.compile(MOCK_DATA).models["1"]
+        self.assertEqual((settings.backends, settings.routing), ((), "weighted_round_robin"))
+
+    def test_invalid_backends(self):
+        """backends need an api_base and engine, a positive weight and a known routing"""
+        invalid = [
+            ({"backends": []}, "Invalid backends for model index 1"),
+            ({"backends": [{"api_base": "base"}]}, "need an api_base and engine"),
+            (
+                {"backends": [{"api_base": "base", "engine": "engine", "weight": 0}]},
+                'Invalid backend weight "0"',
+            ),
+            (
+                {"backends": [{"api_base": "base", "engine": "engine", "tpm": 0}]},
+                'Invalid tpm "0" for model index 1',
+            ),
+            ({"routing": "random"}, 'Invalid routing "random"'),
+            ({"cooldown": -1}, 'Invalid cooldown "-1"'),
+        ]
+        for model_data, message in invalid:
+            with self.assertRaisesRegex(ConfigException, message):
+                CompiledConfig.compile({"models": {"1": model_data}})
+
+    def test_rate_limits(self):
+        """rpm and tpm are optional positive limits"""
+        settings = CompiledConfig.compile({"models": {"1": {"rpm": 60, "tpm": "1000"}}}).models["1"]
+        self.assertEqual((settings.rpm, settings.tpm), (60.0, 1000.0))
+        settings = CompiledConfig.compile(MOCK_DATA).models["1"]
+        self.assertEqual((settings.rpm, settings.tpm), (None, None))
+        with self.assertRaisesRegex(ConfigException, 'Invalid tpm "0" for model index 1'):
+            CompiledConfig.compile({"models": {"1": {"tpm": 0}}})
+
+    def test_proxy_pool(self):
+        """a proxy section listing several proxies compiles to a pool"""
+        endpoints = [{"host": "proxy_a", "port": 8080}, {"host": "proxy_b", "port": 8080}]
+        compiled = CompiledConfig.compile({"proxy": endpoints})
+        self.assertEqual([proxy.host for proxy in compiled.proxy.endpoints], ["proxy_a", "proxy_b"])
+        compiled = CompiledConfig.compile({"proxy": {"endpoints": endpoints, "probe_interval": 5}})
+        self.assertEqual(compiled.proxy.probe_interval, 5)
+        with self.assertRaisesRegex(ConfigException, "Invalid proxy config"):
+            CompiledConfig.compile({"proxy": [{"host": "proxy_a"}]})
+
+    def test_unset_proxy(self):
+        """a proxy section leaving every value unset, as in the example config, is no proxy"""
+        compiled = CompiledConfig.compile({"proxy": {"host": None, "port": None}})
+        self.assertIsNone(compiled.proxy)
+        compiled = CompiledConfig.compile(
+            {
+                "proxy": {"host": "global_proxy", "port": 8080},
+                "models": {"1": {"proxy": {"host": None}}},
+            }
+        )
+        self.assertEqual(compiled.models["1"].proxy.host, "global_proxy")
+
+    def test_example_config(self):
+        """the example config shipped with the package compiles"""
+        path = os.path.join(os.path.dirname(connectchain.__file__), "config", "example.config.yml")
+        compiled = Config.load(path).compiled
+        self.assertIsNone(compiled.proxy)
+        self.assertIn("1", compiled.models)
+
+    def test_invalid_proxy(self):
+        """a proxy section without a host is rejected"""
+        with self.assertRaisesRegex(ConfigException, "Invalid proxy config"):
+            CompiledConfig.compile({"proxy": {"port": 8080}})
+
+    def test_invalid_sections(self):
+        """a models section that is not a mapping and non-numeric eas timings are rejected"""
+        with self.assertRaisesRegex(ConfigException, "Invalid models section"):
+            CompiledConfig.compile({"models": [{"provider": "openai"}]})
+        with self.assertRaisesRegex(ConfigException, 'Invalid eas.token_refresh_interval "soon"'):
+            CompiledConfig.compile({"eas": {"token_refresh_interval": "soon"}})
+        with self.assertRaisesRegex(ConfigException, 'Invalid eas.expiry_margin "-1"'):
+            CompiledConfig.compile({"models": {"1": {"eas": {"expiry_margin": -1}}}})
+        compiled = CompiledConfig.compile({"eas": {"refresh_ahead": 30, "refresh_jitter": 0.5}})
+        self.assertEqual(compiled.eas.refresh_ahead, 30)
+
+    def test_settings_are_immutable(self):
+        """compiled settings are frozen and slotted"""
+        compiled = CompiledConfig.compile(MOCK_DATA)
+        settings = compiled.models["1"]
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            settings.model_name = "other"  # type: ignore[misc]
+        with self.assertRaises(TypeError):
+            compiled.models["3"] = settings  # type: ignore[index]
+        self.assertFalse(hasattr(settings.eas, "__dict__"))
+
+    def test_resolve(self):
+        """model configs given as wrappers are resolved against the global sections"""
+        compiled = CompiledConfig.compile(MOCK_DATA)
+        settings = compiled.resolve(wrap_model_config({"cert": {"cert_size": 10}}))
+        self.assertIsInstance(settings, ModelSettings)
+        self.assertEqual((settings.cert.cert_name, settings.cert.cert_size), ("global.crt", 10))
+        self.assertIs(compiled.resolve(compiled.models["1"]), compiled.models["1"])
+
+    def test_config_compiles_once(self):
+        """the compiled config is cached on the config"""
+        config = get_mock_config()
+        self.assertIs(config.compiled, config.compiled)
+        self.assertEqual(config.compiled.models["2"].model_name, "test_model_other")
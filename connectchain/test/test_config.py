@@ -13,9 +13,11 @@
 file read operation to return mock_config"""
 
 import os
+import tempfile
 import unittest
+from unittest.mock import patch
 
-from connectchain.utils import Config
+from connectchain.utils import Config, ConfigException
 
 # pylint: disable=invalid-name duplicate-code
 mock_config = """
@@ -54,3 +56,53 @@ class TestConfig(unittest.TestCase):
         self.assertEqual(config.cert.cert_name, "./some_cert.crt")
         # remove mock config.yml file
         os.remove("mock_config.yml")
+
+
+class TestConfigCache(unittest.TestCase):
+    """Test memoized config loading"""
+
+    def setUp(self):
+        Config.clear_cache()
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "config.yml")
+        self.write(mock_config)
+
+    def tearDown(self):
+        Config.clear_cache()
+        self.directory.cleanup()
+
+    def write(self, content, mtime=None):
+        """write the config file, optionally forcing its modification time"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_load_is_memoized(self):
+        """the file is parsed once while it does not change"""
+        with patch.dict(os.environ, {"CONFIG_PATH": self.path}):
+            config = Config.from_env()
+            self.assertIs(Config.load(self.path), config)
+            self.assertIs(Config.from_env(), config)
+
+    def test_changed_file_is_parsed_again(self):
+        """a new modification time invalidates the cached config"""
+        config = Config.load(self.path)
+        self.write(mock_config.replace("digital-something", "digital-other"), mtime=1)
+        reloaded = Config.load(self.path)
+        self.assertIsNot(reloaded, config)
+        self.assertEqual(reloaded.eas.originator_source, "digital-other")
+
+    def test_reload(self):
+        """reload parses the file even if it did not change"""
+        with patch.dict(os.environ, {"CONFIG_PATH": self.path}):
+            config = Config.from_env()
+            reloaded = Config.reload()
+            self.assertIsNot(reloaded, config)
+            self.assertIs(Config.from_env(), reloaded)
+
+    def test_reload_without_config_path(self):
+        """reload needs a path or CONFIG_PATH"""
+        with patch.dict(os.environ, clear=True):
+            with self.assertRaises(ConfigException):
+                Config.reload()
@@ -0,0 +1,93 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for config snapshots"""
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from types import MappingProxyType
+from unittest.mock import patch
+
+from connectchain.utils import Config
+from connectchain.utils.config_snapshot import main, snapshot_path, write_snapshot
+
+CONFIG = """
+eas:
+    id_key: id_key
+    secret_key: secret_key
+proxy:
+    host: localhost
+    port: 8080
+models:
+    '1':
+        provider: openai
+        type: chat
+        model_name: {model_name}
+"""
+
+
+class TestConfigSnapshot(unittest.TestCase):
+    """Unit testing config snapshots"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "config.yml")
+        self.write(CONFIG.format(model_name="model_one"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content):
+        """write the config file"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def test_fresh_snapshot_is_used(self):
+        """a snapshot matching the config skips parsing and compiling"""
+        self.assertEqual(write_snapshot(self.path), snapshot_path(self.path))
+        with patch("connectchain.utils.config_snapshot.yaml.load") as mock_load:
+            config = Config(self.path)
+            settings = config.compiled.models["1"]
+        mock_load.assert_not_called()
+        self.assertEqual(config.data["models"]["1"]["model_name"], "model_one")
+        self.assertEqual(settings.model_name, "model_one")
+        self.assertEqual(settings.proxy.host, "localhost")
+        self.assertIsInstance(config.compiled.models, MappingProxyType)
+
+    def test_stale_snapshot_is_ignored(self):
+        """the config is parsed when it no longer matches the snapshot"""
+        write_snapshot(self.path)
+        self.write(CONFIG.format(model_name="model_two"))
+        self.assertEqual(Config(self.path).compiled.models["1"].model_name, "model_two")
+
+    def test_unreadable_snapshot_is_ignored(self):
+        """a corrupt snapshot falls back to the config"""
+        with open(snapshot_path(self.path), "wb") as f:
+            f.write(b"not a snapshot")
+        self.assertEqual(Config(self.path).compiled.models["1"].model_name, "model_one")
+
+    def test_cli(self):
+        """the compile command writes the snapshot and fails on invalid configs"""
+        self.write(CONFIG.format(model_name="model_one").replace("host: localhost", ""))
+        with redirect_stderr(io.StringIO()) as stderr:
+            self.assertEqual(main(["compile", self.path]), 1)
+        self.assertIn("Invalid proxy config", stderr.getvalue())
+        self.assertFalse(os.path.exists(snapshot_path(self.path)))
+        self.write(CONFIG.format(model_name="model_one"))
+        with redirect_stdout(io.StringIO()) as stdout:
+            self.assertEqual(main(["compile", self.path]), 0)
+        self.assertIn(snapshot_path(self.path), stdout.getvalue())
+        self.assertTrue(os.path.exists(snapshot_path(self.path)))
+        # the snapshot can only be written where the config reads it from
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(["compile", self.path, "-o", "other.snapshot"])
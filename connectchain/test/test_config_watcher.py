@@ -0,0 +1,144 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for ConfigWatcher"""
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from connectchain.utils import Config, ConfigException, ConfigWatcher, SessionMap
+
+CONFIG = """
+eas:
+    id_key: id_key
+    secret_key: secret_key
+models:
+    '1':
+        provider: openai
+        type: chat
+        engine: engine
+        model_name: model_one
+        api_base: {api_base}
+    '2':
+        provider: openai
+        type: chat
+        engine: engine
+        model_name: model_two
+        api_base: base_two
+"""
+
+
+class TestConfigWatcher(unittest.TestCase):
+    """Unit testing ConfigWatcher"""
+
+    def setUp(self):
+        Config.clear_cache()
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "config.yml")
+        self.mtime = 1000
+        self.write(CONFIG.format(api_base="base_one"))
+        self.watcher = ConfigWatcher(self.path, interval=0.01)
+
+    def tearDown(self):
+        self.watcher.stop()
+        ConfigWatcher.shutdown()
+        Config.clear_cache()
+        self.directory.cleanup()
+
+    def write(self, content):
+        """write the config file with a new modification time"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.mtime += 1
+        os.utime(self.path, (self.mtime, self.mtime))
+
+    def test_changed_models_are_invalidated(self):
+        """only the sessions of changed models are dropped"""
+        config = Config.load(self.path)
+        session_map = SessionMap()
+        keys = [config.compiled.models[index].session_key for index in ("1", "2")]
+        for key in keys:
+            session_map.new_session(key, Mock())
+        self.write(CONFIG.format(api_base="base_other"))
+        changed = self.watcher.check()
+        self.assertEqual([settings.index for settings in changed], ["1"])
+        self.assertTrue(session_map.is_expired(keys[0]))
+        self.assertFalse(session_map.is_expired(keys[1]))
+        self.assertEqual(Config.load(self.path).compiled.models["1"].api_base, "base_other")
+        self.assertEqual(self.watcher.check(), [])
+
+    def test_invalid_config_is_not_swapped(self):
+        """a config that fails to compile keeps the previous config"""
+        self.watcher.interval = 3600
+        self.watcher.start()
+        config = Config.load(self.path)
+        self.write(CONFIG.format(api_base="base_one") + "proxy:\n    port: 8080\n")
+        with self.assertRaisesRegex(ConfigException, "Invalid proxy config"):
+            self.watcher.check()
+        self.assertIs(Config.load(self.path), config)
+
+    def test_watched_file_is_reloaded_in_background(self):
+        """requests keep the current config until the watcher swaps the new one in"""
+        self.watcher.start()
+        config = Config.load(self.path)
+        self.write(CONFIG.format(api_base="base_other"))
+        deadline = time.monotonic() + 5
+        while Config.load(self.path) is config and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(Config.load(self.path).compiled.models["1"].api_base, "base_other")
+        self.watcher.stop()
+        self.assertNotIn(self.path, Config.watched)
+
+    def test_unexpected_errors_keep_the_watcher_running(self):
+        """an unexpected reload error is logged and the file keeps being watched"""
+        errors = [KeyError("api_base")]
+
+        def check():
+            if errors:
+                raise errors.pop()
+            return []
+
+        self.watcher.check = check
+        self.watcher.start()
+        deadline = time.monotonic() + 5
+        while errors and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertFalse(errors)
+        self.assertTrue(self.watcher.is_alive())
+        self.assertIn(self.path, Config.watched)
+
+    def test_watched_file_is_released_when_the_thread_dies(self):
+        """requests check the file themselves again once the watcher thread is gone"""
+
+        def check():
+            raise SystemExit()
+
+        self.watcher.check = check
+        with patch("threading.excepthook"):
+            self.watcher.start()
+            self.watcher.join(5)
+        self.assertFalse(self.watcher.is_alive())
+        self.assertNotIn(self.path, Config.watched)
+
+    def test_ensure_started(self):
+        """a single watcher runs per process"""
+        os.environ["CONFIG_PATH"] = self.path
+        try:
+            watcher = ConfigWatcher.ensure_started(interval=0.01)
+            self.assertIs(ConfigWatcher.ensure_started(), watcher)
+            self.assertTrue(watcher.is_alive())
+        finally:
+            del os.environ["CONFIG_PATH"]
+        ConfigWatcher.shutdown()
+        self.assertFalse(watcher.is_alive())
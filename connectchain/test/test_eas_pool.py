@@ -0,0 +1,137 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for the pooled EAS session"""
+import asyncio
+import unittest
+
+from aiohttp import web
+
+from connectchain.test.setup_utils import get_mock_config
+from connectchain.utils import ConfigException
+from connectchain.utils.eas_pool import EASPoolConfig, EASSessionPool
+from connectchain.utils.event_loop import BackgroundLoop
+
+
+class TestEASPoolConfig(unittest.TestCase):
+    """Unit testing EASPoolConfig"""
+
+    def test_defaults(self):
+        pool_config = EASPoolConfig.from_config(get_mock_config())
+        self.assertEqual(pool_config, EASPoolConfig())
+        self.assertEqual(EASPoolConfig.from_config(get_mock_config({})), EASPoolConfig())
+
+    def test_from_eas_block(self):
+        test_config = get_mock_config()
+        test_config.data["eas"] = {
+            **test_config.data["eas"],
+            "pool_limit": 20,
+            "pool_limit_per_host": 4,
+            "keepalive_timeout": 30,
+            "dns_cache_ttl": 60,
+            "connect_timeout": 1.5,
+            "timeout": 10,
+        }
+        self.assertEqual(
+            EASPoolConfig.from_config(test_config),
+            EASPoolConfig(
+                limit=20,
+                limit_per_host=4,
+                keepalive_timeout=30,
+                dns_cache_ttl=60,
+                connect_timeout=1.5,
+                timeout=10,
+            ),
+        )
+
+    def test_invalid_eas_block(self):
+        test_config = get_mock_config()
+        test_config.data["eas"] = {**test_config.data["eas"], "pool_limit": "many"}
+        with self.assertRaisesRegex(ConfigException, 'Invalid eas.pool_limit "many"'):
+            EASPoolConfig.from_config(test_config)
+
+
+class TestEASSessionPool(unittest.TestCase):
+    """Unit testing EASSessionPool against a local EAS stand-in"""
+
+    def setUp(self):
+        self.peers = []
+        self.server_loop = BackgroundLoop("test-eas-server")
+
+        async def handler(request):
+            self.peers.append(request.transport.get_extra_info("peername"))
+            body = await request.json()
+            return web.json_response({"authorization_token": body["scope"][0]})
+
+        async def start():
+            app = web.Application()
+            app.router.add_post("/token", handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            return runner, runner.addresses[0][1]
+
+        self.runner, port = self.server_loop.run(start())
+        self.url = f"http://127.0.0.1:{port}/token"
+
+    def tearDown(self):
+        EASSessionPool().close()
+        self.server_loop.run(self.runner.cleanup())
+        self.server_loop.stop()
+
+    def test_singleton(self):
+        self.assertIs(EASSessionPool(), EASSessionPool())
+
+    def test_connection_is_reused_across_event_loops(self):
+        """Separate asyncio.run calls share the pooled keep-alive connection"""
+        pool = EASSessionPool()
+        for scope in ("first", "second", "third"):
+            body, status = asyncio.run(pool.post(self.url, {"scope": [scope]}, {}, timeout=5))
+            self.assertEqual(status, 200)
+            self.assertEqual(body, {"authorization_token": scope})
+        self.assertEqual(len(self.peers), 3)
+        self.assertEqual(len(set(self.peers)), 1)
+
+    def test_configure_replaces_session(self):
+        pool = EASSessionPool()
+        asyncio.run(pool.post(self.url, {"scope": ["first"]}, {}))
+        session = pool.session
+        asyncio.run(pool.configure(EASPoolConfig(limit_per_host=2)))
+        self.assertTrue(session.closed)
+        asyncio.run(pool.post(self.url, {"scope": ["second"]}, {}))
+        self.assertEqual(pool.session.connector.limit_per_host, 2)
+        self.assertEqual(len(set(self.peers)), 2)
+        asyncio.run(pool.configure(EASPoolConfig()))
+
+    def test_configure_on_pool_loop(self):
+        """Token refreshes run on the pool loop, configuring from there must not block on it"""
+        pool = EASSessionPool()
+        asyncio.run(pool.post(self.url, {"scope": ["first"]}, {}))
+        session = pool.session
+        pool.background_loop.run(pool.configure(EASPoolConfig(limit_per_host=3)))
+        self.assertTrue(session.closed)
+        self.assertEqual(pool.pool_config, EASPoolConfig(limit_per_host=3))
+        body, _ = pool.background_loop.run(pool.post(self.url, {"scope": ["second"]}, {}))
+        self.assertEqual(body, {"authorization_token": "second"})
+        self.assertEqual(pool.session.connector.limit_per_host, 3)
+        asyncio.run(pool.configure(EASPoolConfig()))
+
+    def test_close(self):
+        pool = EASSessionPool()
+        asyncio.run(pool.post(self.url, {"scope": ["first"]}, {}))
+        session = pool.session
+        pool.close()
+        self.assertTrue(session.closed)
+        self.assertIsNone(pool.session)
+        # the pool can still be used after it has been closed
+        body, _ = asyncio.run(pool.post(self.url, {"scope": ["second"]}, {}))
+        self.assertEqual(body, {"authorization_token": "second"})
@@ -0,0 +1,60 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for BackgroundLoop"""
+import asyncio
+import threading
+import unittest
+
+from connectchain.utils.event_loop import BackgroundLoop
+
+
+class TestBackgroundLoop(unittest.TestCase):
+    """Unit testing BackgroundLoop"""
+
+    def setUp(self):
+        self.background_loop = BackgroundLoop("test-loop")
+
+    def tearDown(self):
+        self.background_loop.stop()
+
+    def test_run_reuses_loop_thread(self):
+        async def current():
+            return asyncio.get_running_loop(), threading.current_thread().name
+
+        first = self.background_loop.run(current())
+        second = self.background_loop.run(current())
+        self.assertIs(first[0], second[0])
+        self.assertEqual(first[1], "test-loop")
+
+    def test_arun_from_another_loop(self):
+        async def double(value):
+            return value * 2
+
+        async def caller():
+            self.assertFalse(self.background_loop.is_current())
+            return await self.background_loop.arun(double(21))
+
+        self.assertEqual(asyncio.run(caller()), 42)
+
+    def test_run_on_own_loop_is_rejected(self):
+        async def nested():
+            with self.assertRaisesRegex(RuntimeError, "Cannot block the test-loop loop"):
+                self.background_loop.run(asyncio.sleep(0))
+            return await self.background_loop.arun(asyncio.sleep(0, "ok"))
+
+        self.assertEqual(self.background_loop.run(nested()), "ok")
+
+    def test_restart_after_stop(self):
+        loop = self.background_loop.loop
+        self.background_loop.stop()
+        self.assertTrue(loop.is_closed())
+        self.assertEqual(self.background_loop.run(asyncio.sleep(0, "ok")), "ok")
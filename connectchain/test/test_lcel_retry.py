@@ -40,6 +40,19 @@ class TestLCELRetry(TestCase):
         self.assertEqual(lcel_retry.ebo, ebo)
         self.assertEqual(lcel_retry.log_func, log_func)
 
+    @patch("connectchain.lcel.retry.base_retry")
+    def test_backoff_options(self, mock_base_retry):
+        """Test that the jitter, max_sleep and retry_after options reach base_retry"""
+        retry_after = MagicMock()
+        lcel_retry = LCELRetry(
+            MagicMock(), jitter="decorrelated", max_sleep=10, retry_after=retry_after
+        )
+        lcel_retry.invoke("test")
+        kwargs = mock_base_retry.call_args.kwargs
+        self.assertEqual(kwargs["jitter"], "decorrelated")
+        self.assertEqual(kwargs["max_sleep"], 10)
+        self.assertIs(kwargs["retry_after"], retry_after)
+
     @patch("connectchain.lcel.retry.base_retry")
     def test_call(self, mock_base_retry):
         """Test the __call__ method"""
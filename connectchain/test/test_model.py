@@ -10,15 +10,25 @@
 # or implied. See the License for the specific language governing permissions and limitations under
 # the License.
 """Unit testing for PortableOrchestrator class"""
+import asyncio
 import os
+import time
 import unittest
 from unittest.mock import Mock, patch
 
 from langchain.chat_models import ChatOpenAI
 from langchain.llms.openai import AzureOpenAI
 
-from connectchain.lcel import LCELModelException, model
+from connectchain.lcel import (
+    BackendRouter,
+    LCELModelException,
+    LCELRateLimiter,
+    amodel,
+    model,
+)
 from connectchain.test.setup_utils import get_mock_config
+from connectchain.utils import AuthTokenStore, SessionMap
+from connectchain.utils.token_util import BearerToken, TokenCache
 
 
 class TestModel(unittest.TestCase):
@@ -26,6 +36,8 @@ class TestModel(unittest.TestCase):
 
     def setUpWithConfig(self, mock_config):
         """Set up the test with a mock config"""
+        SessionMap().clear()
+        AuthTokenStore().clear()
         patcher_env = patch.dict(
             os.environ, {"CONFIG_PATH": "any_path", "id_key": "any", "secret_key": "any"}
         )
@@ -33,6 +45,9 @@ class TestModel(unittest.TestCase):
         patcher_token = patch(
             "connectchain.lcel.model.get_token_from_env", return_value="test_token"
         )
+        patcher_atoken = patch(
+            "connectchain.lcel.model.aget_token_from_env", return_value="test_async_token"
+        )
         patcher_uuid = patch(
             "connectchain.lcel.model.SessionMap.uuid_from_config", return_value="TEST_MODEL_ENV"
         )
@@ -41,6 +56,7 @@ class TestModel(unittest.TestCase):
             "env": patcher_env.start(),
             "config": patcher_config.start(),
             "token": patcher_token.start(),
+            "atoken": patcher_atoken.start(),
             "uuid": patcher_uuid.start(),
         }
 
@@ -54,8 +70,9 @@ class TestModel(unittest.TestCase):
         self.setUpWithConfig(get_mock_config())
         test_model = model()
         self.assertIsInstance(test_model, ChatOpenAI)
-        test_token = os.getenv("TEST_MODEL_ENV")
+        test_token = AuthTokenStore().get("TEST_MODEL_ENV")
         self.assertEqual(test_token, "test_token")
+        self.assertIsNone(os.getenv("TEST_MODEL_ENV"))
 
     @patch("connectchain.lcel.model.AzureOpenAI", return_value=Mock(AzureOpenAI))
     # pylint: disable=unused-argument
@@ -63,8 +80,176 @@ class TestModel(unittest.TestCase):
         self.setUpWithConfig(get_mock_config())
         test_model = model("2")
         self.assertIsInstance(test_model, AzureOpenAI)
-        test_token = os.getenv("TEST_MODEL_ENV")
+        test_token = AuthTokenStore().get("TEST_MODEL_ENV")
         self.assertEqual(test_token, "test_token")
+        self.assertIsNone(os.getenv("TEST_MODEL_ENV"))
+
+    @patch("connectchain.lcel.model.ChatOpenAI", return_value=Mock(ChatOpenAI))
+    # pylint: disable=unused-argument
+    def test_amodel_with_default_llm(self, *args):
+        patchers = self.setUpWithConfig(get_mock_config())
+        with patch.dict(os.environ):
+            os.environ.pop("TEST_MODEL_ENV", None)
+            test_model = asyncio.run(amodel())
+            self.assertIsInstance(test_model, ChatOpenAI)
+            self.assertEqual(AuthTokenStore().get("TEST_MODEL_ENV"), "test_async_token")
+        patchers["atoken"].assert_awaited_once_with("1")
+        patchers["token"].assert_not_called()
+
+    def test_amodel_with_undefined_llm(self):
+        self.setUpWithConfig(get_mock_config())
+        with self.assertRaisesRegex(
+            LCELModelException, 'Model config at index "gpt5" is not defined'
+        ) as _:
+            asyncio.run(amodel("gpt5"))
+
+    @patch("connectchain.lcel.model.ChatOpenAI", return_value=Mock(ChatOpenAI))
+    # pylint: disable=unused-argument
+    def test_model_session_follows_token_expiry(self, *args):
+        patchers = self.setUpWithConfig(get_mock_config())
+        patchers["token"].return_value = BearerToken("test_token", time.time() + 10)
+        with patch.dict(os.environ):
+            os.environ.pop("TEST_MODEL_ENV", None)
+            model()
+        expires_at = SessionMap().session_map["TEST_MODEL_ENV"].expires_at
+        self.assertAlmostEqual(expires_at - time.monotonic(), 5, delta=1)
+
+    @patch("connectchain.lcel.model.ChatOpenAI", return_value=Mock(ChatOpenAI))
+    @patch("connectchain.lcel.model.AzureOpenAI", return_value=Mock(AzureOpenAI))
+    # pylint: disable=unused-argument
+    def test_model_session_expires_with_cached_token(self, *args):
+        """a model served an older token from the cache does not outlive its cache entry"""
+        patchers = self.setUpWithConfig(get_mock_config())
+        patchers["uuid"].side_effect = lambda config, model_config: f"SESSION_{model_config.index}"
+        key = TokenCache.key("id", (), "url")
+        TokenCache().invalidate(key)
+
+        async def fetch():
+            return "Bearer opaque"
+
+        patchers["token"].side_effect = lambda index: asyncio.run(
+            TokenCache().get_or_fetch(key, fetch, 10)
+        )
+        model("1")
+        time.sleep(0.2)
+        model("2")
+        TokenCache().invalidate(key)
+        session_map = SessionMap().session_map
+        cached = session_map["SESSION_1"].expires_at
+        self.assertAlmostEqual(session_map["SESSION_2"].expires_at, cached, delta=0.05)
+
+    @patch("connectchain.lcel.model.ChatOpenAI", return_value=Mock(ChatOpenAI))
+    # pylint: disable=unused-argument
+    def test_model_session_uses_expiry_margin(self, *args):
+        test_config = get_mock_config({**get_mock_config().data, "eas": {"expiry_margin": 600}})
+        patchers = self.setUpWithConfig(test_config)
+        patchers["token"].return_value = BearerToken("test_token", time.time() + 3600)
+        model()
+        expires_at = SessionMap().session_map["TEST_MODEL_ENV"].expires_at
+        self.assertAlmostEqual(expires_at - time.monotonic(), 3000, delta=5)
+
+    @patch("connectchain.lcel.model.ChatOpenAI", return_value=Mock(ChatOpenAI))
+    # pylint: disable=unused-argument
+    def test_model_token_env_opt_in(self, *args):
+        test_config = get_mock_config()
+        test_config.data["eas"] = {**test_config.data["eas"], "token_env": True}
+        patchers = self.setUpWithConfig(test_config)
+        with patch.dict(os.environ, {"TEST_MODEL_ENV": "seeded_token"}):
+            model()
+            patchers["token"].assert_not_called()
+            self.assertEqual(AuthTokenStore().get("TEST_MODEL_ENV"), "seeded_token")
+        SessionMap().clear()
+        with patch.dict(os.environ):
+            model()
+            self.assertEqual(os.getenv("TEST_MODEL_ENV"), "test_token")
+
+    @patch("connectchain.lcel.model.ChatOpenAI")
+    def test_model_keeps_client_on_token_renewal(self, mock_chat_openai):
+        mock_chat_openai.side_effect = lambda **kwargs: Mock(ChatOpenAI, **kwargs)
+        patchers = self.setUpWithConfig(get_mock_config())
+        patchers["token"].return_value = BearerToken("old_token", time.time() - 1)
+        with patch.dict(os.environ):
+            os.environ.pop("TEST_MODEL_ENV", None)
+            first = model()
+            patchers["token"].return_value = BearerToken("new_token", time.time() + 3600)
+            second = model()
+        self.assertIs(first, second)
+        self.assertEqual(second.openai_api_key, "new_token")
+        mock_chat_openai.assert_called_once()
+
+    @patch("connectchain.lcel.model.ChatOpenAI")
+    def test_model_rebuilds_client_on_settings_change(self, mock_chat_openai):
+        mock_chat_openai.side_effect = lambda **kwargs: Mock(ChatOpenAI, **kwargs)
+        test_config = get_mock_config()
+        patchers = self.setUpWithConfig(test_config)
+        patchers["token"].return_value = BearerToken("old_token", time.time() - 1)
+        with patch.dict(os.environ):
+            os.environ.pop("TEST_MODEL_ENV", None)
+            first = model()
+            changed_config = get_mock_config()
+            # required to not modify dict instance
+            changed_config.data["models"]["1"] = {
+                **changed_config.data["models"]["1"],
+                "api_base": "other_base",
+            }
+            patchers["config"].return_value = changed_config
+            second = model()
+        self.assertIsNot(first, second)
+        self.assertEqual(mock_chat_openai.call_count, 2)
+
+    @patch("connectchain.lcel.model.ChatOpenAI")
+    def test_model_with_client_pool(self, mock_chat_openai):
+        mock_chat_openai.side_effect = lambda **kwargs: Mock(ChatOpenAI, **kwargs)
+        test_config = get_mock_config()
+        # required to not modify dict instance
+        test_config.data["models"]["1"] = {**test_config.data["models"]["1"], "pool_size": 2}
+        patchers = self.setUpWithConfig(test_config)
+        patchers["token"].return_value = BearerToken("old_token", time.time() - 1)
+        clients = [model() for _ in range(4)]
+        self.assertEqual(mock_chat_openai.call_count, 2)
+        self.assertIsNot(clients[0], clients[1])
+        self.assertEqual(clients[:2], clients[2:])
+        self.assertTrue(all(client.openai_api_key == "old_token" for client in clients))
+        patchers["token"].return_value = BearerToken("new_token", time.time() + 3600)
+        model()
+        self.assertEqual(mock_chat_openai.call_count, 2)
+        self.assertTrue(all(client.openai_api_key == "new_token" for client in clients))
+
+    @patch("connectchain.lcel.model.ChatOpenAI")
+    def test_model_with_backends(self, mock_chat_openai):
+        mock_chat_openai.side_effect = lambda **kwargs: Mock(ChatOpenAI, **kwargs)
+        test_config = get_mock_config()
+        # required to not modify dict instance
+        test_config.data["models"]["1"] = {
+            **test_config.data["models"]["1"],
+            "backends": [{"api_base": "base_east"}, {"api_base": "base_west", "engine": "west"}],
+        }
+        patchers = self.setUpWithConfig(test_config)
+        patchers["token"].return_value = BearerToken("old_token", time.time() - 1)
+        router = model()
+        self.assertIsInstance(router, BackendRouter)
+        self.assertEqual(
+            [(client.openai_api_base, client.model_kwargs["engine"]) for client in router],
+            [("base_east", "engine"), ("base_west", "west")],
+        )
+        patchers["token"].return_value = BearerToken("new_token", time.time() + 3600)
+        self.assertIs(model(), router)
+        self.assertEqual(mock_chat_openai.call_count, 2)
+        self.assertTrue(all(client.openai_api_key == "new_token" for client in router))
+        # the router fails over instead of letting the clients back off and retry
+        self.assertTrue(all(client.max_retries == 0 for client in router))
+
+    def test_model_with_rate_limits(self):
+        test_config = get_mock_config()
+        # required to not modify dict instance
+        test_config.data["models"]["1"] = {**test_config.data["models"]["1"], "rpm": 60}
+        self.setUpWithConfig(test_config)
+        first, second = model(), model()
+        self.assertIsInstance(first, LCELRateLimiter)
+        self.assertIs(first.runnable, second.runnable)
+        self.assertIs(first.rate_limit, second.rate_limit)
+        self.assertEqual(first.rate_limit.rpm, 60)
+        self.assertNotIsInstance(model("2"), LCELRateLimiter)
 
     def test_model_with_no_models_configured(self):
         test_config = get_mock_config()
@@ -111,8 +296,29 @@ class TestModel(unittest.TestCase):
         mock_wrap_with_proxy.assert_called_once()
         self.assertIs(model_instance, mock_wrap_with_proxy.call_args[0][0])
         used_proxy_config = mock_wrap_with_proxy.call_args[0][1]
-        self.assertEqual(used_proxy_config["host"], test_proxy_config["host"])
-        self.assertEqual(used_proxy_config["port"], test_proxy_config["port"])
+        self.assertEqual(used_proxy_config.host, test_proxy_config["host"])
+        self.assertEqual(used_proxy_config.port, test_proxy_config["port"])
+
+    @patch("connectchain.lcel.model.wrap_llm_with_proxy")
+    def test_model_proxy_is_configured_once(self, mock_wrap_with_proxy: Mock):
+        test_config = get_mock_config()
+        test_config.data["proxy"] = {"host": "localhost", "port": 8080}
+        self.setUpWithConfig(test_config)
+        self.assertIs(model(), model())
+        mock_wrap_with_proxy.assert_called_once()
+
+    @patch("connectchain.lcel.model.ChatOpenAI")
+    def test_model_with_client_pool_and_proxy(self, mock_chat_openai):
+        mock_chat_openai.side_effect = lambda **kwargs: Mock(ChatOpenAI, **kwargs)
+        test_config = get_mock_config()
+        test_config.data["proxy"] = {"host": "localhost", "port": 8080}
+        # required to not modify dict instance
+        test_config.data["models"]["1"] = {**test_config.data["models"]["1"], "pool_size": 2}
+        self.setUpWithConfig(test_config)
+        model()
+        pool = SessionMap().peek("TEST_MODEL_ENV")
+        for _, transport in pool.clients:
+            self.assertEqual(transport.proxies["https"], "https://localhost:8080")
 
     @patch("connectchain.lcel.model.wrap_llm_with_proxy")
     def test_model_configured_with_model_only_proxy(self, mock_wrap_with_proxy: Mock):
@@ -126,8 +332,8 @@ class TestModel(unittest.TestCase):
         mock_wrap_with_proxy.assert_called_once()
         self.assertIs(model_instance, mock_wrap_with_proxy.call_args[0][0])
         used_proxy_config = mock_wrap_with_proxy.call_args[0][1]
-        self.assertEqual(used_proxy_config["host"], test_proxy_config["host"])
-        self.assertEqual(used_proxy_config["port"], test_proxy_config["port"])
+        self.assertEqual(used_proxy_config.host, test_proxy_config["host"])
+        self.assertEqual(used_proxy_config.port, test_proxy_config["port"])
 
     @patch("connectchain.lcel.model.wrap_llm_with_proxy")
     def test_model_configured_with_model_override_proxy(self, mock_wrap_with_proxy: Mock):
@@ -143,5 +349,5 @@ class TestModel(unittest.TestCase):
         mock_wrap_with_proxy.assert_called_once()
         self.assertIs(model_instance, mock_wrap_with_proxy.call_args[0][0])
         used_proxy_config = mock_wrap_with_proxy.call_args[0][1]
-        self.assertEqual(used_proxy_config["host"], test_model_proxy_config["host"])
-        self.assertEqual(used_proxy_config["port"], test_model_proxy_config["port"])
+        self.assertEqual(used_proxy_config.host, test_model_proxy_config["host"])
+        self.assertEqual(used_proxy_config.port, test_model_proxy_config["port"])
@@ -20,12 +20,14 @@ from connectchain.chains import ValidLLMChain
 from connectchain.orchestrators import PortableOrchestrator
 from connectchain.prompts import ValidPromptTemplate
 from connectchain.test.setup_utils import get_mock_config
+from connectchain.utils import SessionMap
 
 
 class TestPortableOrchestrator(unittest.TestCase):
     """Unit testing for PortableOrchestrator class"""
 
     def setUp(self) -> None:
+        SessionMap().clear()
         self.from_env_patcher = patch(
             "connectchain.utils.Config.from_env", return_value=get_mock_config()
         )
@@ -0,0 +1,109 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for token prewarming"""
+import asyncio
+import io
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+
+from connectchain.test.setup_utils import get_mock_config
+from connectchain.utils import ConfigException, UtilException
+from connectchain.utils.prewarm import aprewarm, main, prewarm
+
+MOCK_CONFIG = get_mock_config({"models": {"1": {}, "2": {}, "3": {}}})
+
+
+class TestPrewarm(unittest.TestCase):
+    """Unit testing prewarm"""
+
+    @patch("connectchain.utils.prewarm.Config.from_env", return_value=MOCK_CONFIG)
+    @patch("connectchain.utils.prewarm.aget_token_from_env")
+    def test_prewarm_all_models(self, aget_token_mock, *args):
+        """Test that every configured model is prefetched and failures are reported"""
+
+        async def aget_token(index):
+            if index == "2":
+                raise UtilException("boom")
+            return "Bearer token"
+
+        aget_token_mock.side_effect = aget_token
+        results = prewarm()
+        self.assertEqual([result.model for result in results], ["1", "2", "3"])
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertIsInstance(results[1].error, UtilException)
+        self.assertTrue(all(result.latency >= 0 for result in results))
+
+    @patch("connectchain.utils.prewarm.aget_token_from_env")
+    def test_prewarm_compiled_models(self, aget_token_mock):
+        """Test that only the models kept by the compiled config are prefetched"""
+        aget_token_mock.return_value = "Bearer token"
+        config = get_mock_config({"models": {"1": {}, "broken": "not a model"}})
+        with patch("connectchain.utils.prewarm.Config.from_env", return_value=config):
+            self.assertEqual([result.model for result in prewarm()], ["1"])
+        with patch(
+            "connectchain.utils.prewarm.Config.from_env",
+            return_value=get_mock_config({"models": None}),
+        ):
+            with self.assertRaisesRegex(UtilException, "No models defined in config"):
+                prewarm()
+
+    @patch("connectchain.utils.prewarm.aget_token_from_env")
+    def test_concurrency_is_bounded(self, aget_token_mock):
+        """Test that no more than `concurrency` tokens are fetched at once"""
+        running = []
+        peak = []
+
+        async def aget_token(_):
+            running.append(None)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+            return "Bearer token"
+
+        aget_token_mock.side_effect = aget_token
+        results = asyncio.run(aprewarm(range(10), concurrency=3))
+        self.assertEqual(len(results), 10)
+        self.assertEqual(max(peak), 3)
+
+    @patch("connectchain.utils.prewarm.Config.from_env", return_value=get_mock_config({}))
+    def test_no_models(self, *args):
+        """Test for missing models in config"""
+        with self.assertRaisesRegex(UtilException, "No models defined in config"):
+            asyncio.run(aprewarm())
+
+    @patch("connectchain.utils.prewarm.aget_token_from_env")
+    def test_main(self, aget_token_mock):
+        """Test the command line report and exit code"""
+
+        async def aget_token(index):
+            if index == "bad":
+                raise UtilException("boom")
+            return "Bearer token"
+
+        aget_token_mock.side_effect = aget_token
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(main(["good"]), 0)
+            self.assertEqual(main(["good", "bad", "--concurrency", "1"]), 1)
+        lines = output.getvalue().splitlines()
+        self.assertRegex(lines[0], r"^model good: [\d.]+ ms ok$")
+        self.assertRegex(lines[2], r"^model bad: [\d.]+ ms failed: boom$")
+
+    @patch("connectchain.utils.prewarm.Config.from_env")
+    def test_main_with_invalid_config(self, from_env_mock):
+        """Test that config errors are reported without a traceback"""
+        from_env_mock.side_effect = ConfigException("CONFIG_PATH environment variable not set")
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            self.assertEqual(main([]), 1)
+        self.assertIn("CONFIG_PATH environment variable not set", errors.getvalue())
@@ -10,10 +10,21 @@
 # or implied. See the License for the specific language governing permissions and limitations under
 # the License.
 """Unit testing for ProxyManager class"""
+import asyncio
+import threading
 import unittest
-from unittest.mock import Mock
+from concurrent.futures import ThreadPoolExecutor
 
-from connectchain.utils.proxy_manager import ProxyConfig, ProxyManager
+import openai
+import requests
+
+from connectchain.utils.client_transport import current_transport
+from connectchain.utils.proxy_manager import (
+    ProxyConfig,
+    ProxyManager,
+    current_proxies,
+    proxy_scope,
+)
 
 
 class TestProxyManager(unittest.TestCase):
@@ -42,9 +53,14 @@ class TestProxyManager(unittest.TestCase):
             }
         )
         mock_proxy_manager = ProxyManager(mock_proxy_config)
-        mock_proxy_manager._patch_session_proxies_ = Mock(return_value={})
-        mock_proxy_manager.configure_proxy_sync()
-        mock_proxy_manager._patch_session_proxies_.assert_called_once()
+        with mock_proxy_manager.configure_proxy_sync() as transport:
+            self.assertIs(transport, mock_proxy_manager.transport)
+            self.assertIs(current_transport(), transport)
+            self.assertDictEqual(
+                transport.session.proxies,
+                {"http": "http://test_host:1234", "https": "https://test_host:1234"},
+            )
+        self.assertIsNone(current_transport())
 
     def test_configure_ssync_proxy(self):
         """Test configuring a asynchronous proxy"""
@@ -55,12 +71,18 @@ class TestProxyManager(unittest.TestCase):
             }
         )
         mock_proxy_manager = ProxyManager(mock_proxy_config)
-        mock_proxy_manager._patch_session_proxies_ = Mock(return_value={})
-        mock_proxy_manager.configure_proxy_async()
-        mock_proxy_manager._patch_session_proxies_.assert_called_once()
 
-    def test_patch_session_proxies(self):
-        """Test patching session proxies"""
+        async def proxied_session():
+            with mock_proxy_manager.configure_proxy_async():
+                session = openai.aiosession.get()
+                proxy = session.proxy
+                await session.close()
+                return proxy
+
+        self.assertEqual(str(asyncio.run(proxied_session())), "https://test_host:1234")
+
+    def test_session_is_not_patched(self):
+        """Test that requests sessions created while a proxy is configured are unchanged"""
         mock_proxy_config = ProxyConfig(
             **{
                 "host": "test_host",
@@ -68,15 +90,57 @@ class TestProxyManager(unittest.TestCase):
             }
         )
         mock_proxy_manager = ProxyManager(mock_proxy_config)
-        import requests
-
-        pre_patch_session = requests.Session()
-        pre_patch_proxies = pre_patch_session.proxies
+        pre_patch_proxies = requests.Session().proxies
         with mock_proxy_manager.configure_proxy_sync():
-            test_session = requests.Session()
-            self.assertDictEqual(
-                test_session.proxies,
-                {"http": "http://test_host:1234", "https": "https://test_host:1234"},
-            )
-        post_patch_session = requests.Session()
-        self.assertDictEqual(post_patch_session.proxies, pre_patch_proxies)
+            self.assertDictEqual(requests.Session().proxies, pre_patch_proxies)
+
+    def test_concurrent_proxies(self):
+        """Test that concurrent threads each use the proxy of their own manager"""
+        managers = [
+            ProxyManager(ProxyConfig(host=f"host_{index}", port=1234)) for index in range(4)
+        ]
+        barrier = threading.Barrier(len(managers))
+
+        def proxied_call(manager):
+            with manager.configure_proxy_sync():
+                barrier.wait()
+                return current_transport().proxies["http"]
+
+        with ThreadPoolExecutor(len(managers)) as executor:
+            results = list(executor.map(proxied_call, managers))
+        self.assertEqual(results, [f"http://host_{index}:1234" for index in range(4)])
+
+
+class TestProxyScope(unittest.TestCase):
+    """Unit testing the context scoped proxy routing"""
+
+    def test_proxy_scope_is_shared_per_config(self):
+        """Test that a proxy config keeps one transport"""
+        first = ProxyManager.for_config(ProxyConfig(host="test_host", port=1234))
+        second = ProxyManager.for_config(ProxyConfig(host="test_host", port=1234))
+        self.assertIs(first, second)
+        self.assertIsNot(first, ProxyManager.for_config(ProxyConfig(host="other", port=1234)))
+
+    def test_concurrent_tasks_use_their_own_proxy(self):
+        """Test that interleaved tasks of one event loop do not see each other's proxy"""
+        configs = [ProxyConfig(host=f"task_host_{index}", port=1234) for index in range(3)]
+        entered = []
+
+        async def proxied_task(proxy_config):
+            with proxy_scope(proxy_config):
+                entered.append(proxy_config.host)
+                # every task is in its scope before any leaves it
+                while len(entered) < len(configs):
+                    await asyncio.sleep(0)
+                return current_proxies()["https"], openai.aiosession.get().proxy
+
+        async def run():
+            results = await asyncio.gather(*(proxied_task(config) for config in configs))
+            for config in configs:
+                await ProxyManager.for_config(config).transport.aiosession().close()
+            return results
+
+        results = asyncio.run(run())
+        expected = [f"https://task_host_{index}:1234" for index in range(3)]
+        self.assertEqual(results, list(zip(expected, expected)))
+        self.assertEqual(current_proxies(), {})
@@ -0,0 +1,159 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for ProxyPool"""
+import asyncio
+import socket
+import unittest
+from unittest.mock import Mock
+
+import aiohttp
+import requests
+
+from connectchain.test.setup_utils import MockClock
+from connectchain.utils import ConfigException
+from connectchain.utils.client_transport import ClientTransport, ProxySession
+from connectchain.utils.proxy_manager import (
+    ProxyConfig,
+    ProxyManager,
+    ProxyPool,
+    ProxyPoolConfig,
+)
+
+
+def closed_port():
+    """a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestProxyPool(unittest.TestCase):
+    """Unit testing ProxyPool"""
+
+    def setUp(self):
+        self.clock = MockClock()
+        # local stand-in for a healthy proxy
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen()
+        self.addCleanup(self.listener.close)
+        self.healthy = ProxyConfig(host="127.0.0.1", port=self.listener.getsockname()[1])
+        self.down = ProxyConfig(host="127.0.0.1", port=closed_port())
+
+    def pool(self, *endpoints):
+        return ProxyPool(
+            endpoints, probe_interval=0, probe_timeout=1, cooldown=30, clock=self.clock
+        )
+
+    def test_probe(self):
+        pool = self.pool(self.down, self.healthy)
+        pool.probe()
+        down, healthy = pool.endpoints
+        self.assertIsNotNone(healthy.latency)
+        self.assertEqual(healthy.down_until, 0.0)
+        self.assertGreater(down.down_until, self.clock.now)
+        self.assertIs(pool.select(), healthy)
+
+    def test_select_by_latency_and_error_rate(self):
+        pool = self.pool(ProxyConfig(host="slow", port=1), ProxyConfig(host="fast", port=1))
+        slow, fast = pool.endpoints
+        slow.latency, fast.latency = 0.2, 0.05
+        self.assertIs(pool.select(), fast)
+        for _ in range(3):
+            # every failure takes the proxy out for the cooldown and raises its error rate
+            self.assertTrue(pool.failed(fast, [fast]))
+            self.assertIs(pool.select(), slow)
+            self.clock.now += 31
+        self.assertIs(pool.select(), slow)
+        for _ in range(10):
+            pool.succeeded(fast)
+        self.assertIs(pool.select(), fast)
+
+    def test_all_proxies_down(self):
+        pool = self.pool(ProxyConfig(host="a", port=1), ProxyConfig(host="b", port=1))
+        first, second = pool.endpoints
+        self.assertTrue(pool.failed(first, [first]))
+        self.clock.now += 1
+        self.assertFalse(pool.failed(second, [first, second]))
+        # the proxy back first is tried
+        self.assertIs(pool.select(), first)
+
+    def test_request_fails_over(self):
+        transport = ClientTransport(proxy_pool=self.pool(self.down, self.healthy))
+        transport.proxy_pool.endpoints[1].latency = 1.0
+        sent = []
+
+        def request(method, url, **kwargs):
+            sent.append(kwargs["proxies"]["https"])
+            if len(sent) == 1:
+                raise requests.exceptions.ProxyError("proxy down")
+            return "response"
+
+        transport._session = Mock(requests.Session, request=request)
+        self.assertEqual(transport.request("post", "https://test", timeout=1), "response")
+        self.assertEqual(
+            sent, [f"https://127.0.0.1:{self.down.port}", f"https://127.0.0.1:{self.healthy.port}"]
+        )
+        self.assertGreater(transport.proxy_pool.endpoints[0].error_rate, 0)
+
+    def test_async_request_fails_over(self):
+        pool = self.pool(self.down, self.healthy)
+        pool.endpoints[1].latency = 1.0
+        sent = []
+
+        async def request(method, url, **kwargs):
+            sent.append(kwargs["proxy"])
+            if len(sent) == 1:
+                raise aiohttp.ClientProxyConnectionError(Mock(), OSError("proxy down"))
+            return "response"
+
+        session = ProxySession(Mock(aiohttp.ClientSession, request=request), proxy_pool=pool)
+        self.assertEqual(
+            asyncio.run(session.request("post", "https://test", proxy=None)), "response"
+        )
+        self.assertEqual(sent[1], f"https://127.0.0.1:{self.healthy.port}")
+        # the global OpenAI proxy is left as is
+        asyncio.run(session.request("post", "https://test", proxy="http://global:1"))
+        self.assertEqual(sent[2], "http://global:1")
+
+    def test_async_connection_timeout_fails_over(self):
+        pool = self.pool(self.down, self.healthy)
+        pool.endpoints[1].latency = 1.0
+        sent = []
+
+        async def request(method, url, **kwargs):
+            sent.append(kwargs["proxy"])
+            if len(sent) == 1:
+                # raised for connection timeouts, as ConnectionTimeoutError in aiohttp 3.10+
+                raise aiohttp.ServerTimeoutError("Connection timeout to host")
+            return "response"
+
+        session = ProxySession(Mock(aiohttp.ClientSession, request=request), proxy_pool=pool)
+        self.assertEqual(
+            asyncio.run(session.request("post", "https://test", proxy=None)), "response"
+        )
+        self.assertEqual(sent[1], f"https://127.0.0.1:{self.healthy.port}")
+
+    def test_background_probe(self):
+        pool = ProxyPool([self.healthy], probe_interval=60, probe_timeout=1)
+        pool.select()
+        pool.stop()
+        self.assertIsNotNone(pool.endpoints[0].latency)
+
+    def test_proxy_manager_with_pool(self):
+        pool_config = ProxyPoolConfig(endpoints=[self.healthy, self.down], probe_interval=0)
+        manager = ProxyManager(pool_config)
+        self.assertIs(manager.pool, ProxyPool.for_config(pool_config))
+        self.assertIs(manager.transport.proxy_pool, manager.pool)
+        self.assertEqual(manager.proxies, {})
+        with self.assertRaisesRegex(ConfigException, "at least one proxy"):
+            ProxyPool([])
@@ -12,18 +12,20 @@
 """Unit testing for llm proxy wrapping utilities"""
 import asyncio
 import unittest
-from unittest.mock import Mock, patch
 
-from connectchain.test.setup_utils import get_mock_ctx_manager
+from langchain.chat_models import ChatOpenAI
+
+from connectchain.utils.client_transport import ClientTransport
 from connectchain.utils.llm_proxy_wrapper import (
-    _async_proxy_,
     _llm_async_methods_,
     _llm_sync_methods_,
-    _sync_proxy_,
-    _wrap_method_,
     wrap_llm_with_proxy,
+    wrap_llm_with_transport,
 )
-from connectchain.utils.proxy_manager import ProxyManager
+from connectchain.utils.proxy_manager import ProxyConfig, current_proxies
+
+PROXY_CONFIG = ProxyConfig(host="test_host", port=1234)
+PROXIES = {"http": "http://test_host:1234", "https": "https://test_host:1234"}
 
 
 class MockLLM:
@@ -36,9 +38,21 @@ class MockLLM:
         """Test method"""
         return self._test
 
-    async def atest_method(self):
-        """Async test method"""
-        return self._test
+    def invoke(self, _input):
+        """returns the proxies of the call"""
+        return current_proxies()
+
+    async def ainvoke(self, _input):
+        """returns the proxies of the call"""
+        return current_proxies()
+
+    def stream(self, _input):
+        """streams the proxies of the call"""
+        yield current_proxies()
+
+    async def astream(self, _input):
+        """streams the proxies of the call"""
+        yield current_proxies()
 
 
 class TestProxyWrapping(unittest.TestCase):
@@ -47,59 +61,50 @@ class TestProxyWrapping(unittest.TestCase):
     def test_sync_proxy(self):
         """Test wrapping synchronous proxied method"""
         mock_llm = MockLLM()
-        mock_ctx = get_mock_ctx_manager()
-        mock_proxy_manager = Mock(ProxyManager, configure_proxy_sync=lambda: mock_ctx)
-        wrapped_proxied_method = _sync_proxy_(MockLLM.test_method, mock_proxy_manager)
-        self.assertEqual(wrapped_proxied_method.__name__, MockLLM.test_method.__name__)
-        self.assertEqual(wrapped_proxied_method(mock_llm), "test")
-        mock_ctx.__enter__.assert_called_once()
-        mock_ctx.__exit__.assert_called_once()
+        wrap_llm_with_proxy(mock_llm, PROXY_CONFIG)
+        self.assertEqual(mock_llm.invoke("test"), PROXIES)
+        self.assertEqual(list(mock_llm.stream("test")), [PROXIES])
+        self.assertEqual(type(mock_llm).invoke.__name__, "invoke")
+        self.assertEqual(current_proxies(), {})
 
     def test_async_proxy(self):
         """Test wrapping asynchronous proxied method"""
         mock_llm = MockLLM()
-        mock_ctx = get_mock_ctx_manager()
-        mock_proxy_manager = Mock(ProxyManager, configure_proxy_async=lambda: mock_ctx)
-        wrapped_proxied_method = _async_proxy_(MockLLM.atest_method, mock_proxy_manager)
-        self.assertEqual(wrapped_proxied_method.__name__, MockLLM.atest_method.__name__)
-        result = asyncio.run(wrapped_proxied_method(mock_llm))
-        self.assertEqual(result, "test")
-        mock_ctx.__enter__.assert_called_once()
-        mock_ctx.__exit__.assert_called_once()
-
-    def test_wrap_method(self):
-        """Test wrapping a method"""
-        mock_llm = MockLLM()
-        mock_manager = Mock()
+        wrap_llm_with_proxy(mock_llm, PROXY_CONFIG)
 
-        def test_wrapping_an_existing_method():
-            mock_decorator = Mock()
-            # must reference before call, as override with wrapped method occurs
-            expected_method = getattr(mock_llm, "test_method")
-            _wrap_method_(mock_manager, mock_llm, "test_method", mock_decorator)
-            mock_decorator.assert_called_once_with(expected_method, mock_manager)
+        async def collect():
+            return await mock_llm.ainvoke("test"), [item async for item in mock_llm.astream("")]
 
-        def test_wrapping_nonexistant_method():
-            mock_decorator = Mock()
-            _wrap_method_(mock_manager, mock_llm, "nonexistant_method", mock_decorator)
-            mock_decorator.assert_not_called()
+        self.assertEqual(asyncio.run(collect()), (PROXIES, [PROXIES]))
 
-        test_wrapping_an_existing_method()
-        test_wrapping_nonexistant_method()
+    def test_wrapped_class_is_created_once(self):
+        """Test that instances of a class share one wrapped class"""
+        first, second = MockLLM(), MockLLM()
+        wrap_llm_with_proxy(first, PROXY_CONFIG)
+        wrap_llm_with_transport(second, ClientTransport())
+        self.assertIs(type(first), type(second))
+        self.assertIsInstance(first, MockLLM)
+        self.assertEqual(second.invoke("test"), {})
+        # wrapping again replaces the transport without subclassing again
+        wrapped_class = type(first)
+        wrap_llm_with_transport(first, ClientTransport({"https": "other"}))
+        self.assertIs(type(first), wrapped_class)
+        self.assertEqual(first.invoke("test"), {"https": "other"})
+
+    def test_only_network_methods_are_wrapped(self):
+        """Test that the wrapped class overrides the network methods only"""
+        mock_llm = MockLLM()
+        wrap_llm_with_proxy(mock_llm, PROXY_CONFIG)
+        overridden = set(type(mock_llm).__dict__) & set(_llm_sync_methods_ + _llm_async_methods_)
+        self.assertEqual(overridden, {"invoke", "ainvoke", "stream", "astream"})
+        self.assertEqual(mock_llm.test_method(), "test")
+        self.assertNotIn("invoke", mock_llm.__dict__)
 
-    @patch("connectchain.utils.llm_proxy_wrapper._wrap_method_")
-    def test_wrapping_llm(self, wrap_mock: Mock):
+    def test_wrapping_llm(self):
         """Test wrapping an LLM with a proxy"""
-        mock_llm = Mock()
-        mock_config = {"test": "value"}
-        wrap_llm_with_proxy(mock_llm, mock_config)
-        for called_wrap in wrap_mock.call_args_list:
-            proxy_manager, llm, method_name, decorator = called_wrap[0]
-            self.assertIsInstance(proxy_manager, ProxyManager)
-            self.assertIs(llm, mock_llm)
-            if method_name in _llm_sync_methods_:
-                self.assertIs(decorator, _sync_proxy_)
-            elif method_name in _llm_async_methods_:
-                self.assertIs(decorator, _async_proxy_)
-            else:
-                self.fail(f"Unexpected method name {method_name}")
+        llm = ChatOpenAI(openai_api_key="test_key")
+        wrap_llm_with_proxy(llm, PROXY_CONFIG)
+        self.assertIsInstance(llm, ChatOpenAI)
+        self.assertEqual(type(llm).__name__, "ChatOpenAI")
+        llm.openai_api_key = "new_key"
+        self.assertEqual(llm.openai_api_key, "new_key")
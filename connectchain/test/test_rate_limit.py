@@ -0,0 +1,93 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for the rate limits of a model"""
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from langchain.prompts import ChatPromptTemplate
+
+from connectchain.lcel import LCELRateLimiter, RateLimit
+from connectchain.lcel.rate_limit import TokenBucket, estimate_tokens
+from connectchain.test.setup_utils import MockClock
+
+
+class MockLLM:
+    """Mock LLM class"""
+
+    model_name = "test_model"
+
+    def invoke(self, prompt, _config=None):
+        """echoes the prompt"""
+        return prompt
+
+    async def ainvoke(self, prompt, _config=None):
+        """echoes the prompt"""
+        return prompt
+
+    def stream(self, prompt, _config=None):
+        """streams the prompt"""
+        yield from prompt.split()
+
+
+class TestRateLimit(unittest.TestCase):
+    """Unit testing the rate limits"""
+
+    def setUp(self):
+        self.clock = MockClock()
+
+    def test_token_bucket_allows_a_burst_then_refills(self):
+        bucket = TokenBucket(60, self.clock)
+        self.assertEqual(bucket.capacity, 10)
+        self.assertEqual([bucket.reserve(1) for _ in range(10)], [0.0] * 10)
+        # waiting callers are queued one refill interval apart
+        self.assertEqual([bucket.reserve(1) for _ in range(2)], [1.0, 2.0])
+        self.clock.now += 12
+        self.assertEqual(bucket.reserve(1), 0.0)
+
+    def test_oversized_request_waits_for_a_full_bucket(self):
+        bucket = TokenBucket(600, self.clock)
+        bucket.reserve(50)
+        self.assertEqual(bucket.reserve(1000), 5.0)
+
+    def test_rate_limit_waits_for_both_limits(self):
+        rate_limit = RateLimit(rpm=60, tpm=600, clock=self.clock)
+        self.assertEqual(rate_limit.reserve(100), 0.0)
+        self.assertEqual(rate_limit.reserve(30), 3.0)
+        self.assertIsNone(RateLimit(rpm=60).tokens)
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens("12345678"), 2)
+        prompt = ChatPromptTemplate.from_messages([("human", "{text}")])
+        self.assertEqual(estimate_tokens(prompt.invoke({"text": "12345678"})), 6)
+        self.assertEqual(estimate_tokens(["1234", "12345678"]), 11)
+
+    @patch("connectchain.lcel.rate_limit.time.sleep")
+    def test_limiter_sleeps_when_over_the_limit(self, mock_sleep):
+        limiter = LCELRateLimiter(MockLLM(), RateLimit(rpm=6, clock=self.clock))
+        self.assertEqual(limiter.invoke("test"), "test")
+        mock_sleep.assert_not_called()
+        self.assertEqual(list(limiter.stream("a b")), ["a", "b"])
+        mock_sleep.assert_called_once_with(10.0)
+        self.assertEqual(limiter.model_name, "test_model")
+
+    def test_async_limiter_does_not_block(self):
+        limiter = LCELRateLimiter(MockLLM(), RateLimit(rpm=6, clock=self.clock))
+
+        async def run():
+            with patch("connectchain.lcel.rate_limit.asyncio.sleep") as mock_sleep:
+                results = [await limiter.ainvoke("test") for _ in range(2)]
+            return results, mock_sleep
+
+        results, mock_sleep = asyncio.run(run())
+        self.assertEqual(results, ["test", "test"])
+        mock_sleep.assert_called_once_with(10.0)
@@ -11,10 +11,20 @@
 # the License.
 """Unit test module for the base_retry, abase_retry, retry_decorator, and aretry_decorator functions."""
 import asyncio
+import time
+from email.utils import formatdate
 from unittest import TestCase
 from unittest.mock import AsyncMock, Mock, call, patch
 
-from connectchain.utils.retry import abase_retry, aretry_decorator, base_retry, retry_decorator
+from openai import error as openai_error
+
+from connectchain.utils.retry import (
+    abase_retry,
+    aretry_decorator,
+    base_retry,
+    retry_after_from_headers,
+    retry_decorator,
+)
 
 
 def get_named_mock(*args, use_async=False, **kwargs) -> Mock:
@@ -188,3 +198,74 @@ class TestRetryUtils(TestCase):
         test_func = aretry_decorator(max_retry=3, ebo=True)(mock_func)
         self.assertEqual(asyncio.run(test_func()), 42)
         self.assertEqual(mock_func.call_count, 3)
+
+
+class TestRetryBackoff(TestCase):
+    """Unit test class for the jitter, max_sleep and retry_after options."""
+
+    def sleeps(self, mock_sleep: Mock):
+        return [sleep_call.args[0] for sleep_call in mock_sleep.call_args_list]
+
+    @patch("connectchain.utils.retry.sleep")
+    def test_jitter_strategies(self, mock_sleep: Mock) -> None:
+        """Jittered sleeps stay within the bounds of their strategy."""
+        failures = [Exception] * 5 + [42]
+        base_retry(get_named_mock(side_effect=failures), max_retry=6, ebo=True, jitter="full")
+        for attempt, value in enumerate(self.sleeps(mock_sleep)):
+            self.assertTrue(0 <= value <= 2**attempt)
+        mock_sleep.reset_mock()
+        base_retry(get_named_mock(side_effect=failures), max_retry=6, ebo=True, jitter="equal")
+        for attempt, value in enumerate(self.sleeps(mock_sleep)):
+            self.assertTrue(2**attempt / 2 <= value <= 2**attempt)
+        mock_sleep.reset_mock()
+        base_retry(get_named_mock(side_effect=failures), max_retry=6, jitter="decorrelated")
+        previous = 1
+        for value in self.sleeps(mock_sleep):
+            self.assertTrue(1 <= value <= previous * 3)
+            previous = value
+
+    @patch("connectchain.utils.retry.random.uniform", side_effect=lambda low, high: high)
+    @patch("connectchain.utils.retry.sleep")
+    def test_max_sleep(self, mock_sleep: Mock, _) -> None:
+        """max_sleep caps the backoff."""
+        failures = [Exception] * 4 + [42]
+        base_retry(get_named_mock(side_effect=failures), max_retry=5, ebo=True, max_sleep=3)
+        self.assertEqual(self.sleeps(mock_sleep), [1, 2, 3, 3])
+        mock_sleep.reset_mock()
+        base_retry(
+            get_named_mock(side_effect=failures), max_retry=5, jitter="decorrelated", max_sleep=5
+        )
+        self.assertEqual(self.sleeps(mock_sleep), [3, 5, 5, 5])
+
+    @patch("connectchain.utils.retry.asyncio.sleep")
+    def test_retry_after(self, mock_sleep: Mock) -> None:
+        """A delay suggested by the server takes precedence over the backoff."""
+        error = openai_error.RateLimitError("rate limited", headers={"Retry-After": "7"})
+        mock_func = get_named_mock(use_async=True, side_effect=[error, Exception, 42])
+        result = asyncio.run(
+            abase_retry(
+                mock_func, max_retry=3, ebo=True, retry_after=retry_after_from_headers, max_sleep=5
+            )
+        )
+        self.assertEqual(result, 42)
+        # capped by max_sleep, then the backoff applies to errors without a suggestion
+        self.assertEqual(self.sleeps(mock_sleep), [5, 2])
+
+    def test_retry_after_from_headers(self) -> None:
+        """Retry-After is read as seconds, milliseconds or an HTTP date."""
+        self.assertEqual(retry_after_from_headers(Exception()), None)
+        self.assertEqual(
+            retry_after_from_headers(openai_error.RateLimitError(headers={"retry-after": "2"})), 2
+        )
+        error = openai_error.RateLimitError(headers={"retry-after-ms": "1500", "retry-after": "2"})
+        self.assertEqual(retry_after_from_headers(error), 1.5)
+        date = formatdate(time.time() + 60, usegmt=True)
+        error = openai_error.RateLimitError(headers={"Retry-After": date})
+        self.assertTrue(55 <= retry_after_from_headers(error) <= 60)
+        error = openai_error.RateLimitError(headers={"Retry-After": "soon"})
+        self.assertIsNone(retry_after_from_headers(error))
+
+    def test_unknown_jitter(self) -> None:
+        """An unknown jitter strategy is rejected."""
+        with self.assertRaisesRegex(ValueError, 'Unknown jitter "random"'):
+            base_retry(get_named_mock(return_value=42), jitter="random")
@@ -0,0 +1,180 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for BackendRouter"""
+import asyncio
+import unittest
+from unittest.mock import Mock
+
+from openai import error as openai_error
+
+from connectchain.lcel import BackendRouter, LCELRateLimiter, RateLimit
+from connectchain.lcel.router import Backend, is_backend_error
+from connectchain.test.setup_utils import MockClock
+from connectchain.utils import ConfigException
+from connectchain.utils.client_pool import ClientPool
+from connectchain.utils.compiled_config import BackendSettings
+
+
+class MockLLM:
+    """Mock LLM class, fails with the errors it is given"""
+
+    def __init__(self, name, errors=None, latency=0.0, clock=None):
+        self.name = name
+        self.errors = list(errors or [])
+        self.latency = latency
+        self.clock = clock
+        self.calls = 0
+
+    def _call_(self):
+        self.calls += 1
+        if self.clock is not None:
+            self.clock.now += self.latency
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.name
+
+    def invoke(self, _input, _config=None):
+        """returns the name of the client"""
+        return self._call_()
+
+    async def ainvoke(self, _input, _config=None):
+        """returns the name of the client"""
+        return self._call_()
+
+    def stream(self, _input, _config=None):
+        """streams the name of the client"""
+        yield self._call_()
+        yield "done"
+
+    async def astream(self, _input, _config=None):
+        """streams the name of the client"""
+        yield self._call_()
+        yield "done"
+
+
+def rate_limit_error():
+    return openai_error.RateLimitError("rate limited", http_status=429)
+
+
+class TestBackendRouter(unittest.TestCase):
+    """Unit testing BackendRouter"""
+
+    def setUp(self):
+        self.clock = MockClock()
+
+    def router(self, *clients, weights=None, routing="weighted_round_robin"):
+        weights = weights or [1] * len(clients)
+        backends = [
+            Backend(client, weight, client.name) for client, weight in zip(clients, weights)
+        ]
+        return BackendRouter(backends, routing, cooldown=30, clock=self.clock)
+
+    def test_weighted_round_robin(self):
+        router = self.router(MockLLM("a"), MockLLM("b"), weights=[3, 1])
+        picks = [router.invoke("test") for _ in range(8)]
+        self.assertEqual(picks.count("a"), 6)
+        self.assertEqual(picks.count("b"), 2)
+        # smooth round-robin interleaves the backends
+        self.assertNotEqual(picks[:4], ["a", "a", "a", "b"])
+
+    def test_least_latency(self):
+        slow = MockLLM("slow", latency=2.0, clock=self.clock)
+        fast = MockLLM("fast", latency=0.5, clock=self.clock)
+        router = self.router(slow, fast, routing="least_latency")
+        # every backend is tried once before latencies are compared
+        self.assertEqual({router.invoke("test"), router.invoke("test")}, {"slow", "fast"})
+        self.assertEqual({router.invoke("test") for _ in range(3)}, {"fast"})
+
+    def test_failing_backend_is_ejected(self):
+        failing = MockLLM("a", [rate_limit_error()])
+        healthy = MockLLM("b")
+        router = self.router(failing, healthy)
+        self.assertEqual([router.invoke("test") for _ in range(3)], ["b", "b", "b"])
+        self.assertEqual(failing.calls, 1)
+        self.clock.now += 31
+        self.assertEqual({router.invoke("test") for _ in range(2)}, {"a", "b"})
+
+    def test_all_backends_ejected(self):
+        first = MockLLM("a", [rate_limit_error()])
+        second = MockLLM("b", [rate_limit_error(), rate_limit_error()])
+        router = self.router(first, second)
+        with self.assertRaises(openai_error.RateLimitError):
+            router.invoke("test")
+        # the backend whose cooldown ends first is tried
+        self.clock.now += 1
+        self.assertEqual(router.invoke("test"), "a")
+
+    def test_request_errors_do_not_fail_over(self):
+        invalid = openai_error.InvalidRequestError("bad request", None, http_status=400)
+        first, second = MockLLM("a", [invalid]), MockLLM("b")
+        router = self.router(first, second)
+        with self.assertRaises(openai_error.InvalidRequestError):
+            router.invoke("test")
+        self.assertEqual(second.calls, 0)
+        self.assertEqual(router.invoke("test"), "b")
+
+    def test_async_and_stream(self):
+        router = self.router(MockLLM("a", [rate_limit_error()]), MockLLM("b"))
+        self.assertEqual(asyncio.run(router.ainvoke("test")), "b")
+        self.assertEqual(list(router.stream("test")), ["b", "done"])
+
+        async def collect():
+            return [chunk async for chunk in router.astream("test")]
+
+        self.assertEqual(asyncio.run(collect()), ["b", "done"])
+
+    def test_iterates_clients_of_pools(self):
+        pool = ClientPool.build(lambda: MockLLM("pooled"), 2)
+        single = MockLLM("single")
+        router = BackendRouter([Backend(pool), Backend(single)])
+        self.assertEqual([client.name for client in router], ["pooled", "pooled", "single"])
+
+    def test_close_closes_the_backends(self):
+        pool = ClientPool.build(lambda: MockLLM("pooled"), 2)
+        for _, transport in pool.clients:
+            transport.close = Mock()
+        single = Mock()
+        BackendRouter([Backend(pool), Backend(single)]).close()
+        self.assertTrue(all(transport.close.called for _, transport in pool.clients))
+        single.close.assert_called_once_with()
+
+    def test_backend_quota(self):
+        """the calls of a backend with a quota are held back to it, the others are not"""
+        limited = Backend(MockLLM("a"), rate_limit=RateLimit(rpm=60))
+        self.assertIsInstance(limited.acquire(), LCELRateLimiter)
+        self.assertIs(limited.acquire().runnable, limited.client)
+        self.assertIsInstance(Backend(MockLLM("b")).acquire(), MockLLM)
+        router = BackendRouter.build(
+            lambda backend: MockLLM(backend.api_base),
+            [
+                BackendSettings("east", "engine", None, None, 1, rpm=60),
+                BackendSettings("west", "engine", None, None, 1),
+            ],
+        )
+        self.assertEqual(router.backends[0].rate_limit.rpm, 60)
+        self.assertIsNone(router.backends[1].rate_limit)
+        self.assertEqual({router.invoke("test") for _ in range(2)}, {"east", "west"})
+
+    def test_is_backend_error(self):
+        self.assertTrue(is_backend_error(rate_limit_error()))
+        self.assertTrue(is_backend_error(openai_error.APIError("error", http_status=503)))
+        self.assertTrue(is_backend_error(openai_error.Timeout("timeout")))
+        self.assertFalse(
+            is_backend_error(openai_error.AuthenticationError("denied", http_status=401))
+        )
+        self.assertFalse(is_backend_error(ValueError("value")))
+
+    def test_invalid_router(self):
+        with self.assertRaisesRegex(ConfigException, "at least one backend"):
+            BackendRouter([])
+        with self.assertRaisesRegex(ConfigException, 'Unknown routing strategy "random"'):
+            BackendRouter([Backend(MockLLM("a"))], "random")
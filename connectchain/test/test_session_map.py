@@ -10,10 +10,14 @@
 # or implied. See the License for the specific language governing permissions and limitations under
 # the License.
 """Unit testing for SessionMap class"""
+import threading
+import time
 import unittest
+from unittest.mock import Mock
 
 from connectchain.test.setup_utils import get_mock_config, wrap_model_config
 from connectchain.utils import SessionMap
+from connectchain.utils.session_map import DEFAULT_SESSION_TTL, Session, SessionStats
 
 
 class TestSessionMap(unittest.TestCase):
@@ -45,3 +49,94 @@ class TestSessionMap(unittest.TestCase):
         self.assertEqual(
             test_uuid, "mod_id_mod_sec_oss_provider_some_model_type_oss_engine_some_model_latest"
         )
+
+    def test_per_session_expiry(self):
+        session_map = SessionMap()
+        session_map.new_session("default_expiry", Mock())
+        session_map.new_session("short_expiry", Mock(), 0)
+        session_map.new_session("long_expiry", Mock(), session_map.expires_in + 3600)
+        self.assertFalse(session_map.is_expired("default_expiry"))
+        time.sleep(0.01)
+        self.assertTrue(session_map.is_expired("short_expiry"))
+        created_at, llm, expires_at = session_map.session_map["long_expiry"]
+        session_map.session_map["long_expiry"] = Session(
+            created_at - session_map.expires_in - 1, llm, expires_at
+        )
+        self.assertFalse(session_map.is_expired("long_expiry"))
+        self.assertTrue(session_map.is_expired("unknown"))
+
+
+class TestBoundedSessionMap(unittest.TestCase):
+    """Unit testing the eviction and statistics of the SessionMap"""
+
+    def setUp(self):
+        self.session_map = SessionMap()
+        self.max_size = self.session_map.max_size
+        self.session_map.clear()
+
+    def tearDown(self):
+        SessionMap(max_size=self.max_size).clear()
+
+    def test_least_recently_used_is_evicted(self):
+        session_map = SessionMap(max_size=2)
+        first, second, third = Mock(), Mock(), Mock()
+        session_map.new_session("first", first)
+        session_map.new_session("second", second)
+        self.assertIs(session_map.get("first"), first)
+        session_map.new_session("third", third)
+        self.assertIsNone(session_map.get("second"))
+        self.assertIs(session_map.get("first"), first)
+        self.assertIs(session_map.get("third"), third)
+        self.assertEqual(session_map.stats(), SessionStats(3, 1, 1, 2))
+
+    def test_dropped_sessions_are_closed(self):
+        """the LLM instances that are evicted, replaced or invalidated are closed"""
+        session_map = SessionMap(max_size=2)
+        first, second, third, renewed = Mock(), Mock(), Mock(), Mock()
+        session_map.new_session("first", first)
+        session_map.new_session("first", first)
+        first.close.assert_not_called()
+        session_map.new_session("second", second)
+        session_map.new_session("third", third)
+        first.close.assert_called_once_with()
+        session_map.new_session("second", renewed)
+        second.close.assert_called_once_with()
+        session_map.invalidate("third")
+        third.close.assert_called_once_with()
+        renewed.close.assert_not_called()
+
+    def test_expired_session_is_a_miss(self):
+        self.session_map.new_session("expired", Mock(), 0)
+        time.sleep(0.01)
+        self.assertIsNone(self.session_map.get("expired"))
+        self.assertEqual(self.session_map.stats(), SessionStats(0, 1, 0, 1))
+
+    def test_peek_returns_expired_session(self):
+        llm = Mock()
+        self.session_map.new_session("expired", llm, 0)
+        time.sleep(0.01)
+        self.assertIs(self.session_map.peek("expired"), llm)
+        self.assertIsNone(self.session_map.peek("unknown"))
+
+    def test_later_settings_apply(self):
+        self.assertEqual(SessionMap(expires_in=42).expires_in, 42)
+        self.assertEqual(SessionMap().expires_in, 42)
+        SessionMap(expires_in=DEFAULT_SESSION_TTL)
+
+    def test_thread_safety(self):
+        session_map = SessionMap(max_size=8)
+
+        def worker(offset):
+            for i in range(200):
+                session_id = f"session_{(offset + i) % 16}"
+                if session_map.get(session_id) is None:
+                    session_map.new_session(session_id, Mock())
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = session_map.stats()
+        self.assertLessEqual(stats.size, 8)
+        self.assertEqual(stats.hits + stats.misses, 1600)
@@ -0,0 +1,135 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Unit tests for the shared token store"""
+# pylint: disable=protected-access
+import asyncio
+import multiprocessing
+import os
+import stat
+import tempfile
+import time
+import unittest
+
+from connectchain.utils.shared_token_store import SharedTokenStore
+from connectchain.utils.token_util import BearerToken, TokenCache, _shared_fetch_
+
+
+class TestSharedTokenStore(unittest.TestCase):
+    """Unit testing SharedTokenStore"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.store = SharedTokenStore(os.path.join(self.tmp_dir.name, "tokens"))
+        self.key = TokenCache.key("id", ["/route::get"], "url")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_write(self):
+        self.assertIsNone(self.store.read(self.key))
+        self.store.write(self.key, "Bearer token", 1700000000.0)
+        self.assertEqual(self.store.read(self.key), ("Bearer token", 1700000000.0))
+        self.assertNotIn("id", os.path.basename(self.store.path(self.key)))
+
+    def test_private_permissions(self):
+        self.store.write(self.key, "Bearer token", 1700000000.0)
+        self.assertEqual(stat.S_IMODE(os.stat(self.store.directory).st_mode), 0o700)
+        self.assertEqual(stat.S_IMODE(os.stat(self.store.path(self.key)).st_mode), 0o600)
+
+    def test_corrupt_file_is_ignored(self):
+        with open(self.store.path(self.key), "w", encoding="utf-8") as writer:
+            writer.write("{not json")
+        self.assertIsNone(self.store.read(self.key))
+
+    def test_shared_fetch_reuses_stored_token(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return BearerToken(f"Bearer {len(calls)}", time.time() + 600)
+
+        first_worker = _shared_fetch_(self.store, self.key, fetch, 60)
+        # each worker process opens the store on its own
+        second_store = SharedTokenStore(self.store.directory)
+        second_worker = _shared_fetch_(second_store, self.key, fetch, 60)
+        self.assertEqual(asyncio.run(first_worker()), "Bearer 1")
+        self.assertEqual(asyncio.run(second_worker()), "Bearer 1")
+        self.assertEqual(len(calls), 1)
+        # a refresh replaces the token even though the stored one is still valid
+        self.assertEqual(asyncio.run(first_worker()), "Bearer 2")
+        # and the other worker picks up the newer token on its own refresh
+        self.assertEqual(asyncio.run(second_worker()), "Bearer 2")
+        self.assertEqual(len(calls), 2)
+
+    def test_own_token_is_replaced(self):
+        """a fetch built for a later call of the same process does not take back its own token"""
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return BearerToken(f"Bearer {len(calls)}", time.time() + 600)
+
+        self.assertEqual(asyncio.run(_shared_fetch_(self.store, self.key, fetch, 60)()), "Bearer 1")
+        self.assertEqual(asyncio.run(_shared_fetch_(self.store, self.key, fetch, 60)()), "Bearer 2")
+
+    def test_token_expiring_within_margin_is_refetched(self):
+        self.store.write(self.key, "Bearer expiring", time.time() + 10)
+
+        async def fetch():
+            return BearerToken("Bearer fresh", time.time() + 600)
+
+        self.assertEqual(
+            asyncio.run(_shared_fetch_(self.store, self.key, fetch, 60, margin=30)()),
+            "Bearer fresh",
+        )
+
+    def test_shared_fetch_without_expiry_uses_ttl(self):
+        async def fetch():
+            return "Bearer opaque"
+
+        token = asyncio.run(_shared_fetch_(self.store, self.key, fetch, 60)())
+        self.assertAlmostEqual(token.expires_in, 60, delta=1)
+        self.assertEqual(self.store.read(self.key)[1], token.expires_at)
+
+    def test_expired_token_is_refetched(self):
+        self.store.write(self.key, "Bearer expired", time.time() - 1)
+
+        async def fetch():
+            return BearerToken("Bearer fresh", time.time() + 600)
+
+        self.assertEqual(
+            asyncio.run(_shared_fetch_(self.store, self.key, fetch, 60)()), "Bearer fresh"
+        )
+
+    def test_one_fetch_across_processes(self):
+        """Concurrent worker processes fetch a token once per host"""
+        calls_path = os.path.join(self.tmp_dir.name, "calls")
+
+        async def fetch():
+            with open(calls_path, "a", encoding="utf-8") as writer:
+                writer.write("fetch\n")
+            await asyncio.sleep(0.2)
+            return BearerToken("Bearer shared", time.time() + 600)
+
+        def worker():
+            asyncio.run(_shared_fetch_(self.store, self.key, fetch, 60)())
+
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=worker) for _ in range(4)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(10)
+            self.assertEqual(process.exitcode, 0)
+        with open(calls_path, "r", encoding="utf-8") as reader:
+            self.assertEqual(reader.read().splitlines(), ["fetch"])
+        self.assertEqual(self.store.read(self.key)[0], "Bearer shared")
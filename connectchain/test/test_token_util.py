@@ -11,51 +11,61 @@
 # the License.
 """Unit test for token_util"""
 import asyncio
+import base64
+import hashlib
+import hmac
+import json
 
 # pylint: disable=unused-import unused-variable unused-argument protected-access
 import os
+import threading
 from datetime import datetime, timedelta
 from unittest import TestCase
 from unittest.mock import ANY, patch
 
 from connectchain.test.setup_utils import get_mock_config, wrap_model_config
-from connectchain.utils import TokenUtil, UtilException, get_token_from_env
+from connectchain.utils import (
+    TokenCache,
+    TokenRefresher,
+    TokenUtil,
+    UtilException,
+    aget_token_from_env,
+    get_token_from_env,
+)
+from connectchain.utils.token_util import BearerToken, jwt_expiration, token_ttl
+
+
+def _make_jwt(claims):
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+
+    return f"{encode({'alg': 'RS256'})}.{encode(claims)}.signature"
 
 
 class TestTokenUtil(TestCase):
     """Unit Test Class to test TokenUtil"""
 
+    def setUp(self):
+        TokenCache().clear()
+
     def test_get_token(self):
         token_util = TokenUtil("test_id", "test_secret", get_mock_config())
         valid_response = [{"authorization_token": "test_token"}, 200]
 
-        @patch("os.path.exists", return_value=True)
-        @patch(f"{__name__}.TokenUtil._TokenUtil__aio_http_post", return_value=valid_response)
-        @patch.object(token_util, "_TokenUtil__get_signature", return_value="signature")
-        @patch.object(token_util, "_TokenUtil__retrieve_cert", return_value=None)
-        def test_certificate_exists(mock_retrieve_cert, mock_sign, mock_post, *args):
-            test_token = asyncio.run(token_util.get_token(token_util.config.models["1"]))
-            self.assertEqual(test_token, "Bearer test_token")
-            mock_retrieve_cert.assert_not_called()
-            mock_sign.assert_called_once()
-            mock_post.assert_called_once()
-
-        @patch("os.path.exists", return_value=False)
         @patch(f"{__name__}.TokenUtil._TokenUtil__aio_http_post", return_value=valid_response)
         @patch.object(token_util, "_TokenUtil__get_signature", return_value="signature")
         @patch.object(token_util, "_TokenUtil__retrieve_cert", return_value=None)
-        def test_certificate_does_not_exist(mock_retrieve_cert, mock_sign, mock_post, *args):
+        def test_certificate_checked(mock_retrieve_cert, mock_sign, mock_post, *args):
             test_token = asyncio.run(token_util.get_token(token_util.config.models["1"]))
             self.assertEqual(test_token, "Bearer test_token")
-            mock_retrieve_cert.assert_called_once()
+            mock_retrieve_cert.assert_awaited_once()
             mock_sign.assert_called_once()
             mock_post.assert_called_once()
 
         @patch.object(token_util, "_TokenUtil__get_signature", return_value="signature")
-        @patch.object(token_util, "_TokenUtil__retrieve_cert", return_value=None)
         @patch(f"{__name__}.TokenUtil._TokenUtil__aio_http_post", return_value=valid_response)
-        @patch("os.path.exists", return_value=False)
-        def test_model_config_overrides(os_path_mock, mock_post, *args):
+        @patch("connectchain.utils.token_util.CertManager.ensure")
+        def test_model_config_overrides(mock_ensure, mock_post, *args):
             test_model_url = "test_url"
             test_model_cert_name = "test_name"
             test_model_config = wrap_model_config(
@@ -67,79 +77,106 @@ class TestTokenUtil(TestCase):
                 }
             )
             asyncio.run(token_util.get_token(test_model_config))
-            os_path_mock.assert_called_once_with(test_model_cert_name)
+            mock_ensure.assert_awaited_once_with(
+                token_util.config.cert.cert_path,
+                test_model_cert_name,
+                token_util.config.cert.cert_size,
+            )
             mock_post.assert_called_once_with(ANY, ANY, test_model_url, ANY, ANY, ANY)
 
-        test_certificate_exists()
-        test_certificate_does_not_exist()
+        test_certificate_checked()
         test_model_config_overrides()
 
+    @patch("connectchain.utils.token_util.CertManager.ensure")
+    def test_get_token_expiry(self, *args):
+        """Test reading the token expiry from the EAS response and the JWT exp claim"""
+        token_util = TokenUtil("test_id", "test_secret", get_mock_config())
+        model_config = token_util.config.models["1"]
+        jwt = _make_jwt({"exp": 2000000000})
+
+        def get_token(response):
+            with patch(
+                f"{__name__}.TokenUtil._TokenUtil__aio_http_post", return_value=[response, 200]
+            ):
+                return asyncio.run(token_util.get_token(model_config))
+
+        with patch.object(token_util, "_TokenUtil__get_signature", return_value="signature"):
+            token = get_token({"authorization_token": "opaque", "expires_in": 3600})
+            self.assertEqual(token, "Bearer opaque")
+            self.assertAlmostEqual(token.expires_in, 3600, delta=5)
+            token = get_token({"authorization_token": "opaque", "expires_at": 2000000000})
+            self.assertEqual(token.expires_at, 2000000000)
+            token = get_token({"authorization_token": jwt})
+            self.assertEqual(token, f"Bearer {jwt}")
+            self.assertEqual(token.expires_at, 2000000000)
+            token = get_token({"authorization_token": "opaque"})
+            self.assertIsNone(token.expires_at)
+            self.assertIsNone(token.expires_in)
+
+    def test_get_signature(self):
+        """Test that the precomputed signing key yields the EAS HMAC-SHA256 signature"""
+        token_util = TokenUtil("test_id", base64.b64encode(b"secret").decode(), get_mock_config())
+        for timestamp in (1700000000000, 1700000000001, 1700000000000):
+            expected = base64.urlsafe_b64encode(
+                hmac.new(b"secret", f"test_id-2-{timestamp}".encode(), hashlib.sha256).digest()
+            )[:-1].decode()
+            self.assertEqual(token_util._TokenUtil__get_signature("2", timestamp), expected)
+
+    def test_jwt_expiration(self):
+        self.assertEqual(jwt_expiration(_make_jwt({"exp": 1700000000})), 1700000000)
+        self.assertIsNone(jwt_expiration(_make_jwt({"sub": "consumer"})))
+        self.assertIsNone(jwt_expiration("opaque"))
+        self.assertIsNone(jwt_expiration("not.a.jwt"))
+
+    def test_token_ttl(self):
+        self.assertEqual(token_ttl("Bearer opaque", 60), 60)
+        self.assertEqual(token_ttl(BearerToken("Bearer opaque"), 60), 60)
+        expiring = BearerToken("Bearer jwt", datetime.now().timestamp() + 3600)
+        self.assertAlmostEqual(token_ttl(expiring, 60, 30), 3570, delta=5)
+        # the margin never takes more than half of the remaining lifetime
+        short_lived = BearerToken("Bearer jwt", datetime.now().timestamp() + 20)
+        self.assertAlmostEqual(token_ttl(short_lived, 60, 30), 10, delta=1)
+        expired = BearerToken("Bearer jwt", datetime.now().timestamp() - 20)
+        self.assertEqual(token_ttl(expired, 60, 30), 0)
+        # a token served from the cache is not used past its cache entry
+        cached = BearerToken("Bearer opaque", None, datetime.now().timestamp() + 20)
+        self.assertAlmostEqual(token_ttl(cached, 60), 20, delta=1)
+
     def test_retrieve_cert(self):
         token_util = TokenUtil("test_id", "test_secret", get_mock_config())
-        cert_expire_tomorrow = datetime.now() + timedelta(days=1)
-
-        @patch("os.path.getsize", return_value=0)
-        @patch(f"connectchain.utils.token_util.urllib", return_value=None)
-        def test_fails_if_file_empty(*args):
-            with self.assertRaisesRegex(UtilException, "Failed to Download the certificate"):
-                token_util._TokenUtil__retrieve_cert(token_util.config.models["1"])
-
-        @patch(f"{__name__}.TokenUtil.read_cert", return_value="mock_cert")
-        @patch(f"{__name__}.TokenUtil.get_cert_expiration", return_value=datetime.now())
-        @patch(f"connectchain.utils.token_util.urllib", return_value=None)
-        @patch("os.path.getsize", return_value=token_util.config.cert.cert_size)
-        def test_fails_if_expired(*args):
-            with self.assertRaisesRegex(UtilException, "Certificate expired, please renew"):
-                token_util._TokenUtil__retrieve_cert(token_util.config.models["1"])
-
-        @patch(f"{__name__}.TokenUtil.read_cert", return_value="mock_cert")
-        @patch(f"{__name__}.TokenUtil.get_cert_expiration", return_value=cert_expire_tomorrow)
-        @patch(f"connectchain.utils.token_util.urllib", return_value=None)
-        @patch("os.path.getsize", return_value=token_util.config.cert.cert_size)
-        def test_success(*args):
-            token_util._TokenUtil__retrieve_cert(token_util.config.models["1"])
-
-        @patch(f"{__name__}.TokenUtil.get_cert_expiration", return_value=cert_expire_tomorrow)
-        @patch(f"{__name__}.TokenUtil.read_cert", return_value="mock_cert")
-        @patch(f"connectchain.utils.token_util.urllib.request.urlretrieve", return_value=None)
-        def test_model_config_default(
-            mock_urllib, mock_read_cert, *args
-        ):  # pylint: disable=unused-variable
-            with patch("os.path.getsize", return_value=token_util.config.cert.cert_size) as _:
-                token_util._TokenUtil__retrieve_cert(token_util.config.models["1"])
-                mock_urllib.assert_called_once_with(
-                    token_util.config.cert.cert_path, token_util.config.cert.cert_name
-                )
-                mock_read_cert.assert_called_once_with(token_util.config.cert.cert_name)
-
-        @patch(f"{__name__}.TokenUtil.get_cert_expiration", return_value=cert_expire_tomorrow)
-        @patch(f"{__name__}.TokenUtil.read_cert", return_value="mock_cert")
-        @patch(f"connectchain.utils.token_util.urllib.request.urlretrieve", return_value=None)
-        def test_model_config_override(
-            mock_urllib, mock_read_cert, *args
-        ):  # pylint: disable=unused-variable
-            test_model_cert_path = "test_path"
-            test_model_cert_name = "test_name"
-            test_model_cert_size = 100
+
+        @patch("connectchain.utils.token_util.CertManager.ensure")
+        def test_model_config_default(mock_ensure):
+            asyncio.run(token_util._TokenUtil__retrieve_cert(token_util.config.models["1"]))
+            mock_ensure.assert_awaited_once_with(
+                token_util.config.cert.cert_path,
+                token_util.config.cert.cert_name,
+                token_util.config.cert.cert_size,
+            )
+
+        @patch("connectchain.utils.token_util.CertManager.ensure")
+        def test_model_config_override(mock_ensure):
             test_model_config = wrap_model_config(
                 {
                     "cert": {
-                        "cert_path": test_model_cert_path,
-                        "cert_name": test_model_cert_name,
-                        "cert_size": test_model_cert_size,
+                        "cert_path": "test_path",
+                        "cert_name": "test_name",
+                        "cert_size": 100,
                     }
                 }
             )
-            with patch("os.path.getsize", return_value=test_model_cert_size) as _:
-                token_util._TokenUtil__retrieve_cert(test_model_config)
-                mock_urllib.assert_called_once_with(test_model_cert_path, test_model_cert_name)
-                mock_read_cert.assert_called_once_with(test_model_cert_name)
-
-        test_fails_if_file_empty()
-        test_fails_if_expired()
-        test_success()
+            asyncio.run(token_util._TokenUtil__retrieve_cert(test_model_config))
+            mock_ensure.assert_awaited_once_with("test_path", "test_name", 100)
+
+        @patch("connectchain.utils.token_util.CertManager.ensure")
+        def test_no_cert_configured(mock_ensure):
+            no_cert_util = TokenUtil("test_id", "test_secret", get_mock_config({"cert": {}}))
+            asyncio.run(no_cert_util._TokenUtil__retrieve_cert(wrap_model_config({})))
+            mock_ensure.assert_not_called()
+
         test_model_config_default()
         test_model_config_override()
+        test_no_cert_configured()
 
     """Tests for `get_token_from_env`"""
 
@@ -199,3 +236,269 @@ class TestTokenUtil(TestCase):
         """Test for missing id_key environment variable"""
         get_token_from_env("other")
         get_token_mock.assert_called_once()
+
+    @patch.dict(os.environ, {"my_id": "test_id", "my_secret": "test_secret"})
+    @patch("connectchain.utils.TokenUtil.__init__", return_value=None)
+    @patch(
+        "connectchain.utils.token_util.Config.from_env",
+        return_value=get_mock_config(
+            {"models": {"other": {"eas": {"id_key": "my_id", "secret_key": "my_secret"}}}}
+        ),
+    )
+    @patch("connectchain.utils.TokenUtil.get_token", return_value="Bearer cached")
+    def test_token_from_env_uses_token_cache(self, get_token_mock, *args):
+        """Test that a cached token is reused instead of calling EAS again"""
+        self.assertEqual(get_token_from_env("other"), "Bearer cached")
+        self.assertEqual(get_token_from_env("other"), "Bearer cached")
+        get_token_mock.assert_called_once()
+
+    @patch.dict(os.environ, {"my_id": "test_id", "my_secret": "test_secret"})
+    @patch("connectchain.utils.TokenUtil.__init__", return_value=None)
+    @patch(
+        "connectchain.utils.token_util.Config.from_env",
+        return_value=get_mock_config(
+            {"models": {"other": {"eas": {"id_key": "my_id", "secret_key": "my_secret"}}}}
+        ),
+    )
+    @patch("connectchain.utils.TokenUtil.get_token", return_value="Bearer async")
+    def test_aget_token_from_env(self, get_token_mock, *args):
+        """Test fetching a token from inside a running event loop"""
+
+        async def handler():
+            return await aget_token_from_env("other")
+
+        self.assertEqual(asyncio.run(handler()), "Bearer async")
+        get_token_mock.assert_called_once()
+
+    @patch.dict(os.environ, {"my_id": "test_id", "my_secret": "test_secret"})
+    @patch("connectchain.utils.TokenUtil.__init__", return_value=None)
+    @patch(
+        "connectchain.utils.token_util.Config.from_env",
+        return_value=get_mock_config(
+            {"models": {"other": {"eas": {"id_key": "my_id", "secret_key": "my_secret"}}}}
+        ),
+    )
+    @patch("connectchain.utils.TokenUtil.get_token", return_value="Bearer sync")
+    def test_token_from_env_reuses_loop_thread(self, get_token_mock, *args):
+        """Test that the sync wrapper runs on the EAS loop and works inside a running loop"""
+        loops = []
+
+        async def get_token(*_):
+            loops.append(asyncio.get_running_loop())
+            return "Bearer sync"
+
+        get_token_mock.side_effect = get_token
+
+        async def handler():
+            return get_token_from_env("other")
+
+        self.assertEqual(asyncio.run(handler()), "Bearer sync")
+        TokenCache().clear()
+        self.assertEqual(get_token_from_env("other"), "Bearer sync")
+        self.assertEqual(len(loops), 2)
+        self.assertIs(loops[0], loops[1])
+
+
+class TestTokenCache(TestCase):
+    """Unit Test Class to test TokenCache"""
+
+    def setUp(self):
+        TokenCache().clear()
+
+    def test_singleton(self):
+        self.assertIs(TokenCache(), TokenCache())
+
+    def test_key(self):
+        self.assertEqual(
+            TokenCache.key("id", ["/a::get", "/a::post"], "url"),
+            ("id", ("/a::get", "/a::post"), "url"),
+        )
+        self.assertEqual(TokenCache.key("id", None, "url"), ("id", (), "url"))
+
+    def test_single_flight_on_one_loop(self):
+        """Concurrent coroutines for the same key share a single fetch"""
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "Bearer token"
+
+        async def run():
+            key = TokenCache.key("id", [], "url")
+            return await asyncio.gather(
+                *[TokenCache().get_or_fetch(key, fetch, 60) for _ in range(10)]
+            )
+
+        self.assertEqual(asyncio.run(run()), ["Bearer token"] * 10)
+        self.assertEqual(len(calls), 1)
+
+    def test_single_flight_across_threads(self):
+        """Callers on different threads and event loops share a single fetch"""
+        calls = []
+        results = []
+        key = TokenCache.key("id", [], "url")
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "Bearer token"
+
+        def worker():
+            results.append(asyncio.run(TokenCache().get_or_fetch(key, fetch, 60)))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["Bearer token"] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_expired_token_is_refetched(self):
+        key = TokenCache.key("id", [], "url")
+        tokens = iter(["Bearer first", "Bearer second"])
+
+        async def fetch():
+            return next(tokens)
+
+        self.assertEqual(asyncio.run(TokenCache().get_or_fetch(key, fetch, 0)), "Bearer first")
+        self.assertIsNone(TokenCache().get(key))
+        self.assertEqual(asyncio.run(TokenCache().get_or_fetch(key, fetch, 60)), "Bearer second")
+        self.assertEqual(TokenCache().get(key), "Bearer second")
+
+    def test_ttl_from_token_expiry(self):
+        """The token expiry, less the margin, takes precedence over the configured ttl"""
+        key = TokenCache.key("id", [], "url")
+
+        async def fetch():
+            return BearerToken("Bearer jwt", datetime.now().timestamp() + 100)
+
+        asyncio.run(TokenCache().get_or_fetch(key, fetch, 900, 10))
+        entry = TokenCache().entries()[key]
+        self.assertAlmostEqual(entry.expires_at - entry.fetched_at, 90, delta=1)
+        self.assertEqual(entry.ttl, 900)
+
+    def test_fetch_failure_is_shared_and_not_cached(self):
+        key = TokenCache.key("id", [], "url")
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            raise UtilException("EAS unavailable")
+
+        async def run():
+            return await asyncio.gather(
+                *[TokenCache().get_or_fetch(key, fetch, 60) for _ in range(3)],
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, UtilException) for result in results))
+        self.assertIsNone(TokenCache().get(key))
+        self.assertEqual(TokenCache.inflight, {})
+
+
+class TestTokenRefresher(TestCase):
+    """Unit Test Class to test TokenRefresher"""
+
+    def setUp(self):
+        TokenCache().clear()
+
+    def tearDown(self):
+        TokenRefresher.shutdown()
+
+    def test_invalid_fraction(self):
+        with self.assertRaisesRegex(UtilException, "Token refresh fraction must be in"):
+            TokenRefresher(fraction=1.5)
+        with self.assertRaisesRegex(UtilException, "Token refresh fraction must be in"):
+            TokenRefresher(fraction=0.5, jitter=0.6)
+
+    def test_due(self):
+        key = TokenCache.key("id", [], "url")
+
+        async def fetch():
+            return "Bearer token"
+
+        asyncio.run(TokenCache().get_or_fetch(key, fetch, 100))
+        fetched_at = TokenCache().entries()[key].fetched_at
+        refresher = TokenRefresher(fraction=0.5, jitter=0.1)
+        self.assertEqual(refresher.due(fetched_at + 39), [])
+        self.assertEqual(refresher.due(fetched_at + 51), [key])
+        scheduled = refresher.schedule[key][1]
+        self.assertTrue(fetched_at + 40 <= scheduled <= fetched_at + 50)
+        TokenCache().invalidate(key)
+        self.assertEqual(refresher.due(fetched_at + 51), [])
+        self.assertEqual(refresher.schedule, {})
+
+    def test_failed_refresh_backs_off(self):
+        """A failed renewal is retried after a growing delay rather than on every poll"""
+        key = TokenCache.key("id", [], "url")
+
+        async def fetch():
+            return "Bearer token"
+
+        asyncio.run(TokenCache().get_or_fetch(key, fetch, 100))
+        fetched_at = TokenCache().entries()[key].fetched_at
+        refresher = TokenRefresher(fraction=0.5, jitter=0.0)
+        now = fetched_at + 51
+        self.assertEqual(refresher.due(now), [key])
+        self.assertEqual(refresher.failed(key, now), 2)
+        self.assertEqual(refresher.due(now + 1), [])
+        self.assertEqual(refresher.due(now + 2), [key])
+        self.assertEqual(refresher.failed(key, now + 2), 4)
+        self.assertEqual(refresher.due(now + 5), [])
+        for _ in range(10):
+            delay = refresher.failed(key, now)
+        self.assertEqual(delay, 60)
+        # a new token resets the backoff
+        asyncio.run(TokenCache().refresh(key))
+        refresher.due(now)
+        self.assertEqual(refresher.failures, {})
+
+    def test_renews_before_expiry(self):
+        """Tokens are renewed in the background and never seen expired"""
+        key = TokenCache.key("id", [], "url")
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return f"Bearer {len(calls)}"
+
+        asyncio.run(TokenCache().get_or_fetch(key, fetch, 0.2))
+        TokenRefresher.ensure_started(fraction=0.5, jitter=0.0, poll_interval=0.01)
+        for _ in range(30):
+            self.assertIsNotNone(TokenCache().get(key))
+            threading.Event().wait(0.01)
+        self.assertGreater(len(calls), 1)
+
+    def test_refresh_failure_keeps_current_token(self):
+        key = TokenCache.key("id", [], "url")
+        tokens = iter(["Bearer token"])
+
+        async def fetch():
+            return next(tokens)
+
+        asyncio.run(TokenCache().get_or_fetch(key, fetch, 60))
+        with patch("connectchain.utils.token_util._logger_") as mock_logger:
+            refresher = TokenRefresher(fraction=0.5, jitter=0.0, poll_interval=0.01)
+            refresher.due = lambda: [key]
+            refresher.start()
+            threading.Event().wait(0.05)
+            refresher.stop()
+            mock_logger.warning.assert_called()
+        self.assertEqual(TokenCache().get(key), "Bearer token")
+
+    @patch.dict(os.environ, {"my_id": "test_id", "my_secret": "test_secret"})
+    @patch("connectchain.utils.TokenUtil.__init__", return_value=None)
+    @patch("connectchain.utils.TokenUtil.get_token", return_value="Bearer token")
+    @patch("connectchain.utils.token_util.TokenRefresher.ensure_started")
+    def test_started_from_config(self, ensure_started_mock, *args):
+        config = get_mock_config(
+            {
+                "eas": {"refresh_ahead": 0.8},
+                "models": {"other": {"eas": {"id_key": "my_id", "secret_key": "my_secret"}}},
+            }
+        )
+        with patch("connectchain.utils.token_util.Config.from_env", return_value=config):
+            get_token_from_env("other")
+        ensure_started_mock.assert_called_once_with(0.8, 0.1)
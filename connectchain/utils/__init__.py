@@ -10,7 +10,23 @@
 # or implied. See the License for the specific language governing permissions and limitations under
 # the License.
 """This module contains utilities for connectchain"""
+from .auth_token_store import AuthTokenStore
 from .config import Config, ConfigException
-from .retry import abase_retry, aretry_decorator, base_retry, retry_decorator
+from .config_watcher import ConfigWatcher
+from .prewarm import PrewarmResult, aprewarm, prewarm
+from .retry import (
+    abase_retry,
+    aretry_decorator,
+    base_retry,
+    retry_after_from_headers,
+    retry_decorator,
+)
 from .session_map import SessionMap
-from .token_util import TokenUtil, UtilException, get_token_from_env
+from .token_util import (
+    TokenCache,
+    TokenRefresher,
+    TokenUtil,
+    UtilException,
+    aget_token_from_env,
+    get_token_from_env,
+)
@@ -0,0 +1,60 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""In-memory store of the auth tokens of model sessions"""
+import os
+import threading
+from typing import Dict, Optional
+
+
+class AuthTokenStore:
+    """Process-wide store of the auth token of each model session.
+
+    Tokens are kept in memory rather than in the process environment, which is shared with
+    subprocesses and costly to update. Reading tokens from and writing them to environment
+    variables named after the session key is available as an opt-in for existing deployments."""
+
+    _instance: Optional["AuthTokenStore"] = None
+    _lock = threading.Lock()
+    tokens: Dict[str, str] = {}
+
+    def __new__(cls) -> "AuthTokenStore":
+        if cls._instance is None:
+            cls._instance = super(AuthTokenStore, cls).__new__(cls)
+        return cls._instance
+
+    def get(self, session_key: str) -> Optional[str]:
+        """the token of the session"""
+        return self.tokens.get(session_key)
+
+    def seed(self, session_key: str) -> Optional[str]:
+        """save and return the token set in the environment variable named after the session"""
+        token = os.getenv(session_key)
+        if token is not None:
+            self.set(session_key, token)
+        return token
+
+    def set(self, session_key: str, token: str, to_env: bool = False) -> None:
+        """save the token of the session, also exporting it to the environment if `to_env`"""
+        with self._lock:
+            self.tokens[session_key] = token
+        if to_env:
+            os.environ[session_key] = token
+
+    def invalidate(self, session_key: str) -> None:
+        """drop the token of the session"""
+        with self._lock:
+            self.tokens.pop(session_key, None)
+
+    def clear(self) -> None:
+        """drop every token"""
+        with self._lock:
+            self.tokens.clear()
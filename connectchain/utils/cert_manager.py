@@ -0,0 +1,89 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Certificate download and validation for Enterprise Auth Service (EAS) calls"""
+import asyncio
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from OpenSSL import crypto as c
+
+from .eas_pool import EASSessionPool
+from .exceptions import UtilException
+
+
+def cert_expiration(cert_data: str) -> datetime:
+    """get the expiration date of a PEM certificate"""
+    date_str = c.load_certificate(c.FILETYPE_PEM, cert_data).get_notAfter().decode("UTF-8")
+    return datetime.strptime(date_str, "%Y%m%d%H%M%SZ")
+
+
+def _stat_(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _read_expiration_(path: str) -> datetime:
+    with open(path, "r", encoding="utf-8") as reader:
+        return cert_expiration(reader.read())
+
+
+class CertManager:
+    """Process-wide certificate manager.
+
+    Missing certificates are streamed to a temporary file and atomically renamed into place, and
+    the parsed expiration date is cached by file path and modification time, so that the event
+    loop never blocks on certificate I/O and each certificate is parsed once."""
+
+    _instance: Optional["CertManager"] = None
+    _lock = threading.Lock()
+    expirations: Dict[Tuple[str, int], datetime] = {}
+
+    def __new__(cls) -> "CertManager":
+        if cls._instance is None:
+            cls._instance = super(CertManager, cls).__new__(cls)
+        return cls._instance
+
+    async def ensure(self, cert_path: Optional[str], cert_name: str, cert_size: Any) -> None:
+        """download the certificate if it does not exist locally and check it has not expired"""
+        cert_stat = await asyncio.to_thread(_stat_, cert_name)
+        if cert_stat is None:
+            if cert_path:
+                try:
+                    await EASSessionPool().download(cert_path, cert_name)
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as ex:
+                    raise UtilException("Failed to Download the certificate") from ex
+            cert_stat = await asyncio.to_thread(_stat_, cert_name)
+            if cert_stat is None or (cert_size and cert_stat.st_size != cert_size):
+                raise UtilException("Failed to Download the certificate")
+        if await self.expiration(cert_name, cert_stat) < datetime.now():
+            raise UtilException("Certificate expired, please renew")
+
+    async def expiration(self, cert_name: str, cert_stat: os.stat_result) -> datetime:
+        """expiration date of the certificate, parsed once per file version"""
+        key = (os.path.abspath(cert_name), cert_stat.st_mtime_ns)
+        with self._lock:
+            expires = self.expirations.get(key)
+        if expires is None:
+            expires = await asyncio.to_thread(_read_expiration_, cert_name)
+            with self._lock:
+                self.expirations[key] = expires
+        return expires
+
+    def clear(self) -> None:
+        """forget the cached expiration dates"""
+        with self._lock:
+            self.expirations.clear()
@@ -0,0 +1,75 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Pool of LLM clients sharing the load of one model"""
+import itertools
+import threading
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+from .client_transport import ClientTransport
+from .compiled_config import POOL_STRATEGIES, ROUND_ROBIN
+from .exceptions import ConfigException
+from .llm_proxy_wrapper import wrap_llm_with_transport
+from .proxy_manager import ProxyConfig, ProxyManager, ProxyPoolConfig
+
+
+class ClientPool:
+    """LLM clients of one model, each with its own connection pools.
+
+    `acquire` hands out the clients in turn (`round_robin`) or the client with the fewest calls
+    in flight (`least_in_flight`), so that concurrent callers spread over the connection pools."""
+
+    def __init__(self, clients: List[Tuple[Any, ClientTransport]], strategy: str = ROUND_ROBIN):
+        if not clients:
+            raise ConfigException("A client pool needs at least one client")
+        if strategy not in POOL_STRATEGIES:
+            raise ConfigException(f'Unknown client pool strategy "{strategy}"')
+        self.clients = clients
+        self.strategy = strategy
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(
+        cls,
+        factory: Callable[[], Any],
+        size: int,
+        strategy: str = ROUND_ROBIN,
+        proxy_config: Optional[Union[ProxyConfig, ProxyPoolConfig]] = None,
+    ) -> "ClientPool":
+        """build `size` clients with `factory`, giving each its own transport using the proxy"""
+        clients = []
+        for _ in range(size):
+            client, transport = factory(), ProxyManager(proxy_config).transport
+            wrap_llm_with_transport(client, transport)
+            clients.append((client, transport))
+        return cls(clients, strategy)
+
+    def acquire(self) -> Any:
+        """the client to use for the next call"""
+        with self._lock:
+            start = next(self._counter) % len(self.clients)
+        if self.strategy == ROUND_ROBIN:
+            return self.clients[start][0]
+        # rotate the starting point so that idle clients are used in turn
+        order = (self.clients[(start + i) % len(self.clients)] for i in range(len(self.clients)))
+        return min(order, key=lambda entry: entry[1].in_flight)[0]
+
+    def __iter__(self) -> Iterator[Any]:
+        return (client for client, _ in self.clients)
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def close(self) -> None:
+        """close the connection pools of the clients"""
+        for _, transport in self.clients:
+            transport.close()
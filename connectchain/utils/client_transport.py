@@ -0,0 +1,312 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Per-client HTTP transports for the OpenAI SDK.
+
+The OpenAI SDK sends every request through one global session per thread. `DispatchingSession`
+is installed in its place and forwards each request to the `ClientTransport` bound to the current
+context, so that LLM clients can each use their own connection pools."""
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Set, Tuple
+
+import aiohttp
+import openai
+import requests
+import requests.adapters
+from openai.api_requestor import MAX_CONNECTION_RETRIES
+from openai.api_requestor import _thread_context as _thread_context_
+
+_current_transport_: ContextVar[Optional["ClientTransport"]] = ContextVar(
+    "connectchain_transport", default=None
+)
+# tasks closing the aiohttp sessions of closed transports, kept until they are done
+_closing_tasks_: Set["asyncio.Future[None]"] = set()
+# generators closing the aiohttp sessions of each event loop when it shuts down, the loops only
+# keep weak references to them
+_shutdown_hooks_: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List[Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class ClientTransport:
+    """Connection pools of one LLM client.
+
+    A requests session serves the synchronous calls and an aiohttp session per event loop serves
+    the asynchronous ones, closed when their loop shuts down. `in_flight` counts the calls
+    currently using the transport. Closed transports open new sessions when they are used again."""
+
+    def __init__(self, proxies: Optional[Dict[str, str]] = None, proxy_pool: Any = None) -> None:
+        self.proxies: Dict[str, str] = dict(proxies or {})
+        # `ProxyPool` picking the proxy of each request instead of the fixed `proxies`
+        self.proxy_pool = proxy_pool
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._close_pending = False
+        self._session: Optional[requests.Session] = None
+        self._aiosessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        """requests session of the transport, created on first use"""
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                session.proxies.update(self.proxies)
+                session.mount(
+                    "https://", requests.adapters.HTTPAdapter(max_retries=MAX_CONNECTION_RETRIES)
+                )
+                self._session = session
+            return self._session
+
+    def aiosession(self) -> Any:
+        """aiohttp session of the transport for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._aiosessions.get(loop)
+            if session is None or session.closed:
+                session = aiohttp.ClientSession()
+                if self.proxy_pool is not None or self.proxies.get("https"):
+                    session = ProxySession(session, self.proxies.get("https"), self.proxy_pool)
+                self._aiosessions[loop] = session
+                _close_on_shutdown_(loop, session)
+            return session
+
+    def request(self, method: Any, url: Any, *args: Any, **kwargs: Any) -> requests.Response:
+        """send a request with the session of the transport, failing over to another proxy of
+        the pool when the proxy cannot be reached"""
+        if self.proxy_pool is None:
+            return self.session.request(method, url, *args, **kwargs)
+        tried: List[Any] = []
+        while True:
+            endpoint = self.proxy_pool.select(tried)
+            tried.append(endpoint)
+            kwargs["proxies"] = endpoint.proxies
+            try:
+                response = self.session.request(method, url, *args, **kwargs)
+            except (requests.exceptions.ProxyError, requests.exceptions.ConnectTimeout):
+                if not self.proxy_pool.failed(endpoint, tried):
+                    raise
+                continue
+            self.proxy_pool.succeeded(endpoint)
+            return response
+
+    @contextmanager
+    def bind(self) -> Generator["ClientTransport", None, None]:
+        """send the OpenAI requests made in this context through the transport"""
+        if _current_transport_.get() is self:
+            # nested calls of the same client
+            yield self
+            return
+        install()
+        token = _current_transport_.set(self)
+        aio_token = None
+        try:
+            asyncio.get_running_loop()
+            aio_token = openai.aiosession.set(self.aiosession())
+        except RuntimeError:
+            pass
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                close = self._close_pending and self.in_flight == 0
+            if aio_token is not None:
+                openai.aiosession.reset(aio_token)
+            _current_transport_.reset(token)
+            if close:
+                self.close()
+
+    def _detach_(self) -> Optional[Tuple[Optional[requests.Session], List[Tuple[Any, Any]]]]:
+        """take the sessions out of the transport, None while calls are in flight"""
+        with self._lock:
+            if self.in_flight:
+                # the last call closes the sessions, so that calls in flight are not cut off
+                self._close_pending = True
+                return None
+            self._close_pending = False
+            session, self._session = self._session, None
+            aiosessions = list(self._aiosessions.items())
+            self._aiosessions.clear()
+        if session is not None:
+            session.close()
+        return session, aiosessions
+
+    def close(self) -> None:
+        """close the connection pools, the aiohttp sessions are closed on their event loops"""
+        detached = self._detach_()
+        if detached is not None:
+            for loop, aiosession in detached[1]:
+                _close_aiosession_(loop, aiosession)
+
+    async def aclose(self) -> None:
+        """close the connection pools, waiting for the aiohttp session of the running loop"""
+        detached = self._detach_()
+        if detached is None:
+            return
+        running = asyncio.get_running_loop()
+        for loop, aiosession in detached[1]:
+            if loop is running:
+                await aiosession.close()
+            else:
+                _close_aiosession_(loop, aiosession)
+
+
+async def _shutdown_hook_(session: Any) -> AsyncGenerator[None, None]:
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+def _close_on_shutdown_(loop: asyncio.AbstractEventLoop, session: Any) -> None:
+    """close the session when its event loop shuts down, e.g. at the end of `asyncio.run`
+
+    Event loops close the async generators started on them when they shut down, so the session
+    is closed by a generator started on the loop, from its thread, and suspended until then."""
+    hook = _shutdown_hook_(session)
+    try:
+        # runs the generator up to its yield, which does not wait on anything
+        hook.asend(None).send(None)
+    except StopIteration:
+        pass
+    _shutdown_hooks_.setdefault(loop, []).append(hook)
+
+
+def _close_aiosession_(loop: asyncio.AbstractEventLoop, session: Any) -> None:
+    """close an aiohttp session on its event loop, sessions of closed loops are dropped"""
+    if loop.is_closed() or not loop.is_running():
+        return
+    try:
+        running: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not loop:
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+        return
+    task = asyncio.ensure_future(session.close())
+    _closing_tasks_.add(task)
+    task.add_done_callback(_closing_tasks_.discard)
+
+
+class ProxySession:
+    """aiohttp session sending each request through the proxy of the transport, or through a
+    healthy proxy of a `ProxyPool`, failing over to another proxy when the proxy cannot be reached.
+
+    The proxy is passed with each request, as sessions only take a default proxy in aiohttp 3.10+.
+    """
+
+    def __init__(
+        self, session: aiohttp.ClientSession, proxy: Optional[str] = None, proxy_pool: Any = None
+    ) -> None:
+        self.session = session
+        self.proxy = proxy
+        self.proxy_pool = proxy_pool
+
+    @property
+    def closed(self) -> bool:
+        """whether the session is closed"""
+        return self.session.closed
+
+    async def close(self) -> None:
+        """close the session"""
+        await self.session.close()
+
+    async def request(self, method: str, url: Any, **kwargs: Any) -> aiohttp.ClientResponse:
+        """send a request, the OpenAI SDK passes the global `openai.proxy` as `proxy` if set"""
+        if kwargs.get("proxy") is not None:
+            return await self.session.request(method, url, **kwargs)
+        if self.proxy_pool is None:
+            kwargs["proxy"] = self.proxy
+            return await self.session.request(method, url, **kwargs)
+        tried: List[Any] = []
+        while True:
+            endpoint = self.proxy_pool.select(tried)
+            tried.append(endpoint)
+            kwargs["proxy"] = endpoint.proxies["https"]
+            try:
+                response = await self.session.request(method, url, **kwargs)
+            # connection timeouts raise a ServerTimeoutError, ConnectionTimeoutError in 3.10+
+            except (aiohttp.ClientProxyConnectionError, aiohttp.ServerTimeoutError):
+                if not self.proxy_pool.failed(endpoint, tried):
+                    raise
+                continue
+            self.proxy_pool.succeeded(endpoint)
+            return response
+
+
+def current_transport() -> Optional[ClientTransport]:
+    """the transport bound to the current context, if any"""
+    return _current_transport_.get()
+
+
+class DispatchingSession(requests.Session):
+    """Session installed as `openai.requestssession`, forwarding requests to the bound transport.
+
+    Requests made outside of a bound transport use this session itself, which is set up like the
+    sessions created by the OpenAI SDK."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.mount("https://", requests.adapters.HTTPAdapter(max_retries=MAX_CONNECTION_RETRIES))
+
+    @property  # type: ignore[override]
+    def proxies(self) -> Dict[str, str]:
+        """proxies of the bound transport, the OpenAI SDK passes them with each request"""
+        transport = _current_transport_.get()
+        if transport is not None:
+            return transport.proxies
+        proxies: Dict[str, str] = self.__dict__.setdefault("_default_proxies", {})
+        return proxies
+
+    @proxies.setter
+    def proxies(self, value: Dict[str, str]) -> None:
+        self.__dict__["_default_proxies"] = value
+
+    def request(self, method: Any, url: Any, *args: Any, **kwargs: Any) -> requests.Response:
+        transport = _current_transport_.get()
+        if transport is None:
+            return super().request(method, url, *args, **kwargs)
+        return transport.request(method, url, *args, **kwargs)
+
+    def close(self) -> None:
+        # the OpenAI SDK closes its session periodically, transports keep their connections
+        pass
+
+
+_install_lock_ = threading.Lock()
+
+
+def install() -> bool:
+    """install the dispatching session for the current thread unless a custom session is set,
+    returns whether requests can be dispatched to transports"""
+    dispatcher = openai.requestssession
+    if not isinstance(dispatcher, DispatchingSession):
+        with _install_lock_:
+            if openai.requestssession is None:
+                openai.requestssession = DispatchingSession()
+        dispatcher = openai.requestssession
+        if not isinstance(dispatcher, DispatchingSession):
+            return False
+    # threads that sent requests before the installation cache the session of the OpenAI SDK
+    if getattr(_thread_context_, "session", None) is not dispatcher:
+        _thread_context_.session = dispatcher
+        _thread_context_.session_create_time = time.time()
+    return True
@@ -0,0 +1,372 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Typed view of the config file, compiled once per parsed file.
+
+Model overrides of the `eas`, `cert` and `proxy` sections are resolved against the global
+sections at compile time, so reading a setting on the request path is a plain attribute read."""
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type, Union
+
+from pydantic import ValidationError
+
+from .exceptions import ConfigException
+from .proxy_manager import ProxyConfig, ProxyPoolConfig
+
+ROUND_ROBIN = "round_robin"
+LEAST_IN_FLIGHT = "least_in_flight"
+POOL_STRATEGIES = (ROUND_ROBIN, LEAST_IN_FLIGHT)
+WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
+LEAST_LATENCY = "least_latency"
+ROUTING_STRATEGIES = (WEIGHTED_ROUND_ROBIN, LEAST_LATENCY)
+DEFAULT_COOLDOWN = 30.0
+# numeric settings of the `eas` section
+EAS_NUMBERS = (
+    "token_refresh_interval",
+    "expiry_margin",
+    "refresh_ahead",
+    "refresh_jitter",
+    "pool_limit",
+    "pool_limit_per_host",
+    "keepalive_timeout",
+    "dns_cache_ttl",
+    "connect_timeout",
+    "timeout",
+)
+
+ProxySettings = Optional[Union[ProxyConfig, ProxyPoolConfig]]
+
+
+def _freeze_(value: Any) -> Any:
+    """turn yaml sequences into tuples so that compiled settings stay immutable"""
+    if isinstance(value, list):
+        return tuple(_freeze_(item) for item in value)
+    return value
+
+
+def _section_(data: Any, name: str) -> Dict[str, Any]:
+    """the mapping stored under `name`, empty when missing"""
+    section = data.get(name) if isinstance(data, dict) else None
+    return section if isinstance(section, dict) else {}
+
+
+def _resolve_(cls: Type[Any], section: Dict[str, Any], defaults: Any) -> Dict[str, Any]:
+    """values of the dataclass fields, falling back to `defaults` for the unset ones"""
+    values = {}
+    for field in fields(cls):
+        value = section.get(field.name)
+        if value is None and defaults is not None:
+            value = getattr(defaults, field.name)
+        values[field.name] = _freeze_(value)
+    return values
+
+
+def _check_numbers_(section_name: str, values: Dict[str, Any], names: Tuple[str, ...]) -> None:
+    """reject the set values of `names` that are not non-negative numbers"""
+    for name in names:
+        value = values[name]
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ConfigException(f'Invalid {section_name}.{name} "{value}"')
+
+
+@dataclass(frozen=True, slots=True)
+class EASSettings:  # pylint: disable=too-many-instance-attributes
+    """Enterprise Auth Service settings"""
+
+    id_key: Optional[str] = None
+    secret_key: Optional[str] = None
+    url: Optional[str] = None
+    scope: Any = None
+    originator_source: Optional[str] = None
+    token_refresh_interval: Optional[float] = None
+    expiry_margin: Optional[float] = None
+    shared_store: Optional[str] = None
+    refresh_ahead: Optional[float] = None
+    refresh_jitter: Optional[float] = None
+    token_env: Optional[bool] = None
+    # connection pool of the EAS calls, shared by all models
+    pool_limit: Optional[int] = None
+    pool_limit_per_host: Optional[int] = None
+    keepalive_timeout: Optional[float] = None
+    dns_cache_ttl: Optional[int] = None
+    connect_timeout: Optional[float] = None
+    timeout: Optional[float] = None
+
+    @classmethod
+    def compile(
+        cls, section: Dict[str, Any], defaults: Optional["EASSettings"] = None
+    ) -> "EASSettings":
+        """settings of the section, each unset value taken from `defaults`"""
+        values = _resolve_(cls, section, defaults)
+        _check_numbers_("eas", values, EAS_NUMBERS)
+        return cls(**values)
+
+
+@dataclass(frozen=True, slots=True)
+class CertSettings:
+    """EAS certificate settings"""
+
+    cert_path: Optional[str] = None
+    cert_name: Optional[str] = None
+    cert_size: Optional[int] = None
+
+    @classmethod
+    def compile(
+        cls, section: Dict[str, Any], defaults: Optional["CertSettings"] = None
+    ) -> "CertSettings":
+        """settings of the section, each unset value taken from `defaults`"""
+        return cls(**_resolve_(cls, section, defaults))
+
+
+def _proxy_section_(section: Any) -> Any:
+    """the proxy section, None when it is missing or leaves every value unset"""
+    if isinstance(section, dict) and all(value is None for value in section.values()):
+        return None
+    return section or None
+
+
+def _proxy_config_(section: Any) -> ProxySettings:
+    """a proxy, or a pool of proxies when the section lists several"""
+    section = _proxy_section_(section)
+    if section is None:
+        return None
+    try:
+        if isinstance(section, list):
+            return ProxyPoolConfig(endpoints=section)
+        if isinstance(section, dict) and "endpoints" in section:
+            return ProxyPoolConfig(**section)
+        return ProxyConfig(**section)
+    except (TypeError, ValidationError) as ex:
+        raise ConfigException(f"Invalid proxy config: {ex}") from ex
+
+
+def _pool_size_(index: str, value: Any) -> int:
+    try:
+        pool_size = 1 if value is None else int(value)
+    except (TypeError, ValueError):
+        pool_size = 0
+    if pool_size < 1:
+        raise ConfigException(f'Invalid pool_size "{value}" for model index {index}')
+    return pool_size
+
+
+def _pool_strategy_(index: str, value: Any) -> str:
+    strategy = ROUND_ROBIN if value is None else str(value)
+    if strategy not in POOL_STRATEGIES:
+        raise ConfigException(f'Invalid pool_strategy "{value}" for model index {index}')
+    return strategy
+
+
+def _routing_(index: str, value: Any) -> str:
+    routing = WEIGHTED_ROUND_ROBIN if value is None else str(value)
+    if routing not in ROUTING_STRATEGIES:
+        raise ConfigException(f'Invalid routing "{value}" for model index {index}')
+    return routing
+
+
+def _cooldown_(index: str, value: Any) -> float:
+    try:
+        cooldown = DEFAULT_COOLDOWN if value is None else float(value)
+    except (TypeError, ValueError):
+        cooldown = -1.0
+    if cooldown < 0:
+        raise ConfigException(f'Invalid cooldown "{value}" for model index {index}')
+    return cooldown
+
+
+def _rate_limit_(index: str, name: str, value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        limit = float(value)
+    except (TypeError, ValueError):
+        limit = 0.0
+    if limit <= 0:
+        raise ConfigException(f'Invalid {name} "{value}" for model index {index}')
+    return limit
+
+
+@dataclass(frozen=True, slots=True)
+class BackendSettings:
+    """A deployment serving a model, one of the `backends` of a model entry"""
+
+    api_base: Any
+    engine: Any
+    api_version: Any
+    model_name: Any
+    weight: int
+    # quotas of the deployment, the rpm and tpm of the model entry apply to all backends together
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+
+    @classmethod
+    def compile(cls, index: str, data: Any, model_data: Dict[str, Any]) -> "BackendSettings":
+        """settings of a backend, each unset deployment value taken from the model entry"""
+        if not isinstance(data, dict):
+            raise ConfigException(f'Invalid backend "{data}" for model index {index}')
+        values = {
+            name: data.get(name, model_data.get(name))
+            for name in ("api_base", "engine", "api_version", "model_name")
+        }
+        if values["api_base"] is None or values["engine"] is None:
+            raise ConfigException(f"Backends of model index {index} need an api_base and engine")
+        weight = data.get("weight", 1)
+        if isinstance(weight, bool) or not isinstance(weight, int) or weight < 1:
+            raise ConfigException(f'Invalid backend weight "{weight}" for model index {index}')
+        return cls(
+            weight=weight,
+            rpm=_rate_limit_(index, "rpm", data.get("rpm")),
+            tpm=_rate_limit_(index, "tpm", data.get("tpm")),
+            **values,
+        )
+
+
+def _backends_(index: str, data: Dict[str, Any]) -> Tuple[BackendSettings, ...]:
+    backends = data.get("backends")
+    if backends is None:
+        return ()
+    if not isinstance(backends, list) or not backends:
+        raise ConfigException(f"Invalid backends for model index {index}")
+    return tuple(BackendSettings.compile(index, backend, data) for backend in backends)
+
+
+@dataclass(frozen=True, slots=True)
+class ModelSettings:  # pylint: disable=too-many-instance-attributes
+    """Effective settings of a model, with the global sections applied"""
+
+    index: str
+    provider: Any
+    type: Any
+    engine: Any
+    model_name: Any
+    api_base: Any
+    api_version: Any
+    eas: EASSettings
+    cert: CertSettings
+    proxy: ProxySettings
+    session_key: str
+    pool_size: int
+    pool_strategy: str
+    backends: Tuple[BackendSettings, ...] = ()
+    routing: str = WEIGHTED_ROUND_ROBIN
+    cooldown: float = DEFAULT_COOLDOWN
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+
+    @classmethod
+    def compile(cls, index: str, data: Dict[str, Any], config: "CompiledConfig") -> "ModelSettings":
+        """settings of the model config, overriding the global sections of `config`"""
+        eas = EASSettings.compile(_section_(data, "eas"), config.eas)
+        proxy = _proxy_section_(data.get("proxy"))
+        model = [data.get(name) for name in ("provider", "type", "engine", "model_name")]
+        # key of the model session, unique per credentials and model
+        session_key = "_".join(
+            str(value) for value in (eas.id_key, eas.secret_key, *model, data.get("api_version"))
+        )
+        return cls(
+            index=index,
+            provider=data.get("provider"),
+            type=data.get("type"),
+            engine=data.get("engine"),
+            model_name=data.get("model_name"),
+            api_base=data.get("api_base"),
+            api_version=data.get("api_version"),
+            eas=eas,
+            cert=CertSettings.compile(_section_(data, "cert"), config.cert),
+            # the proxy section is overridden as a whole
+            proxy=_proxy_config_(proxy) if proxy is not None else config.proxy,
+            session_key=session_key,
+            pool_size=_pool_size_(index, data.get("pool_size")),
+            pool_strategy=_pool_strategy_(index, data.get("pool_strategy")),
+            backends=_backends_(index, data),
+            routing=_routing_(index, data.get("routing")),
+            cooldown=_cooldown_(index, data.get("cooldown")),
+            rpm=_rate_limit_(index, "rpm", data.get("rpm")),
+            tpm=_rate_limit_(index, "tpm", data.get("tpm")),
+        )
+
+    def for_backend(self, backend: BackendSettings) -> "ModelSettings":
+        """settings of the model served by one of its backends"""
+        return replace(
+            self,
+            api_base=backend.api_base,
+            engine=backend.engine,
+            api_version=backend.api_version,
+            model_name=backend.model_name,
+            backends=(),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledConfig:
+    """Global sections and the effective settings of every model"""
+
+    eas: EASSettings
+    cert: CertSettings
+    proxy: ProxySettings
+    models: Optional[Mapping[str, ModelSettings]]
+
+    @classmethod
+    def compile(cls, data: Any) -> "CompiledConfig":
+        """compile the parsed yaml, `models` is None when the section is missing"""
+        if not isinstance(data, dict):
+            data = {}
+        defaults = cls(
+            eas=EASSettings.compile(_section_(data, "eas")),
+            cert=CertSettings.compile(_section_(data, "cert")),
+            proxy=_proxy_config_(data.get("proxy")),
+            models=None,
+        )
+        if "models" not in data:
+            return defaults
+        if not isinstance(data["models"] or {}, dict):
+            raise ConfigException("Invalid models section, expected a mapping of model indexes")
+        models = {
+            str(index): ModelSettings.compile(str(index), model_data, defaults)
+            for index, model_data in (data["models"] or {}).items()
+            if isinstance(model_data, dict)
+        }
+        return replace(defaults, models=MappingProxyType(models))
+
+    def resolve(self, model_config: Any, index: str = "") -> ModelSettings:
+        """effective settings of a model config given as settings, a wrapper or a dict"""
+        if isinstance(model_config, ModelSettings):
+            return model_config
+        data: Any = getattr(model_config, "data", model_config)
+        return ModelSettings.compile(index, data if isinstance(data, dict) else {}, self)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # mapping proxies cannot be pickled, snapshots store the models as a dict
+        models = dict(self.models) if self.models is not None else None
+        return _restore_compiled_config_, (self.eas, self.cert, self.proxy, models)
+
+    def changed_models(self, other: "CompiledConfig") -> List[ModelSettings]:
+        """settings of the models that `other` changes or removes"""
+        other_models = other.models or {}
+        return [
+            settings
+            for index, settings in (self.models or {}).items()
+            if other_models.get(index) != settings
+        ]
+
+
+def _restore_compiled_config_(
+    eas: EASSettings,
+    cert: CertSettings,
+    proxy: ProxySettings,
+    models: Optional[Dict[str, ModelSettings]],
+) -> CompiledConfig:
+    return CompiledConfig(
+        eas, cert, proxy, MappingProxyType(models) if models is not None else None
+    )
@@ -13,31 +13,107 @@
 This module provides a simple wrapper around a yaml config file.
 """
 import os
-from typing import Any, Dict, Union
+import threading
+from typing import Any, ClassVar, Dict, Optional, Set, Tuple, Union
 
-import yaml
+from .compiled_config import CompiledConfig
+from .config_snapshot import read_config
+from .exceptions import ConfigException
 
-
-class ConfigException(BaseException):
-    """Base exception for the config class"""
+FileSignature = Tuple[int, int, int, int]
 
 
 class Config:
     """Config Class"""
 
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+    _cache: ClassVar[Dict[str, Tuple[FileSignature, "Config"]]] = {}
+    # files kept up to date by a ConfigWatcher, loading them skips the modification check
+    watched: ClassVar[Set[str]] = set()
+
     def __init__(self, filepath: str) -> None:
-        """Initialize config with YAML file path."""
-        with open(filepath, "r", encoding="utf-8") as f:
-            self.data: Dict[str, Any] = yaml.safe_load(f)
+        """Initialize config with YAML file path, using its snapshot when it is up to date."""
+        data, compiled = read_config(filepath)
+        self.data: Dict[str, Any] = data
+        if compiled is not None:
+            self.__dict__["_compiled"] = compiled
+
+    @property
+    def compiled(self) -> CompiledConfig:
+        """typed settings with the model overrides resolved, compiled on first use"""
+        compiled = self.__dict__.get("_compiled")
+        if compiled is None:
+            compiled = CompiledConfig.compile(self.data)
+            self.__dict__["_compiled"] = compiled
+        return compiled
 
     @staticmethod
     def from_env() -> "Config":
         """Static method to get config from environment variable"""
+        return Config.load(Config.__env_path())
+
+    @classmethod
+    def load(cls, filepath: str) -> "Config":
+        """Get the config for the YAML file path, parsing it only when the file has changed.
+        The returned config is shared and must not be modified."""
+        path = os.path.abspath(filepath)
+        cached = cls._cache.get(path)
+        if cached is not None and path in cls.watched:
+            return cached[1]
+        signature = cls.__signature(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with cls._lock:
+            cached = cls._cache.get(path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            loaded = cls(path)
+            cls._cache[path] = (signature, loaded)
+            return loaded
+
+    @classmethod
+    def reload(cls, filepath: Optional[str] = None) -> "Config":
+        """Parse the YAML file again, defaults to the file set in CONFIG_PATH"""
+        path = os.path.abspath(filepath or cls.__env_path())
+        with cls._lock:
+            cls._cache.pop(path, None)
+        return cls.load(path)
+
+    @classmethod
+    def refresh(cls, filepath: str) -> Tuple[Optional["Config"], "Config"]:
+        """Parse and compile the YAML file if it has changed, then swap it in for the cached
+        config. Returns the previous and the current config, which are the same if the file
+        has not changed. Raises if the new file is invalid, keeping the previous config."""
+        path = os.path.abspath(filepath)
+        signature = cls.__signature(path)
+        cached = cls._cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[1]
+        loaded = cls(path)
+        # compile before the swap so that readers never pay for it or see an invalid config
+        _ = loaded.compiled
+        with cls._lock:
+            cached = cls._cache.get(path)
+            cls._cache[path] = (signature, loaded)
+        return (cached[1] if cached is not None else None), loaded
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop every cached config"""
+        with cls._lock:
+            cls._cache.clear()
+
+    @staticmethod
+    def __env_path() -> str:
         config_path = os.getenv("CONFIG_PATH")
         if config_path is None:
             raise ConfigException("CONFIG_PATH environment variable not set")
+        return config_path
 
-        return Config(config_path)
+    @staticmethod
+    def __signature(path: str) -> FileSignature:
+        stat = os.stat(path)
+        return stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size
 
     def __getitem__(self, key: str) -> "ConfigWrapper":
         """Get config item by key."""
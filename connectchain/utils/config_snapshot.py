@@ -0,0 +1,152 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Binary snapshots of the config file.
+
+A snapshot holds the parsed and compiled config together with the hash of the YAML it was built
+from, and is used instead of parsing the YAML for as long as that hash matches. Snapshots are
+unpickled, so they must only be written where the config file itself is trusted.
+
+Usage: python -m connectchain.utils.config_snapshot compile [CONFIG]"""
+import argparse
+import dataclasses
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from logging import Logger
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - libyaml is not available
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+from .compiled_config import (
+    BackendSettings,
+    CertSettings,
+    CompiledConfig,
+    EASSettings,
+    ModelSettings,
+)
+from .exceptions import ConfigException
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+
+_logger_ = Logger(__name__)
+
+
+def _schema_() -> List[Tuple[str, List[str]]]:
+    """fields of the compiled classes, a snapshot of other classes cannot be loaded"""
+    return [
+        (cls.__name__, [field.name for field in dataclasses.fields(cls)])
+        for cls in (CompiledConfig, ModelSettings, BackendSettings, EASSettings, CertSettings)
+    ]
+
+
+def snapshot_path(config_path: str) -> str:
+    """path of the snapshot of a config file"""
+    return f"{config_path}{SNAPSHOT_SUFFIX}"
+
+
+def _content_hash_(source: bytes) -> str:
+    return hashlib.sha256(source).hexdigest()
+
+
+def _read_source_(config_path: str) -> bytes:
+    with open(config_path, "rb") as f:
+        return f.read()
+
+
+def _read_snapshot_(path: str, source: bytes) -> Optional[Tuple[Dict[str, Any], CompiledConfig]]:
+    """the snapshot contents, or None if it is missing, unreadable or stale"""
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (
+        OSError,
+        pickle.UnpicklingError,
+        EOFError,
+        AttributeError,
+        ImportError,
+        TypeError,
+    ) as ex:
+        _logger_.warning("Ignoring unreadable config snapshot %s: %s", path, ex)
+        return None
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("version") != SNAPSHOT_VERSION
+        or snapshot.get("schema") != _schema_()
+        or snapshot.get("hash") != _content_hash_(source)
+    ):
+        return None
+    return snapshot["data"], snapshot["compiled"]
+
+
+def read_config(config_path: str) -> Tuple[Dict[str, Any], Optional[CompiledConfig]]:
+    """parsed config data, with the compiled config when a fresh snapshot exists"""
+    source = _read_source_(config_path)
+    snapshot = _read_snapshot_(snapshot_path(config_path), source)
+    if snapshot is not None:
+        return snapshot
+    return yaml.load(source.decode("utf-8"), Loader=SafeLoader), None
+
+
+def write_snapshot(config_path: str) -> str:
+    """parse, validate and compile the config file into the snapshot read along with it,
+    returns the path of the snapshot"""
+    source = _read_source_(config_path)
+    data = yaml.load(source.decode("utf-8"), Loader=SafeLoader)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "schema": _schema_(),
+        "hash": _content_hash_(source),
+        "data": data,
+        "compiled": CompiledConfig.compile(data),
+    }
+    output = snapshot_path(config_path)
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output)))
+    try:
+        with os.fdopen(handle, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, output)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return output
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(prog="connectchain-config", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser("compile", help="write a snapshot of the config file")
+    compile_parser.add_argument("config", nargs="?", help="config file, defaults to CONFIG_PATH")
+    args = parser.parse_args(argv)
+    config_path = args.config or os.getenv("CONFIG_PATH")
+    if config_path is None:
+        parser.error("CONFIG_PATH environment variable not set")
+    try:
+        print(f"Wrote {write_snapshot(config_path)}")
+    except (OSError, yaml.YAMLError, ConfigException) as ex:
+        print(f"Failed to compile {config_path}: {ex}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Hot reload of the config file"""
+import os
+import threading
+from logging import Logger
+from typing import List, Optional
+
+import yaml
+
+from .compiled_config import ModelSettings
+from .config import Config, ConfigException
+from .session_map import SessionMap
+
+DEFAULT_WATCH_INTERVAL = 5.0
+
+_logger_ = Logger(__name__)
+
+
+class ConfigWatcher(threading.Thread):
+    """Daemon thread reloading the config file when it changes.
+
+    The file is polled for changes, parsed and compiled on this thread, and swapped in for the
+    cached config only once it is valid, so that requests always see a complete config and never
+    pay for the reload. Cached models whose settings changed are dropped, the others stay warm."""
+
+    _instance: Optional["ConfigWatcher"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, filepath: str, interval: float = DEFAULT_WATCH_INTERVAL):
+        super().__init__(name="connectchain-config-watcher", daemon=True)
+        self.filepath = os.path.abspath(filepath)
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._last_error: Optional[str] = None
+
+    @classmethod
+    def ensure_started(
+        cls, filepath: Optional[str] = None, interval: float = DEFAULT_WATCH_INTERVAL
+    ) -> "ConfigWatcher":
+        """start the process-wide watcher of the file, defaults to the file set in CONFIG_PATH"""
+        filepath = filepath or os.getenv("CONFIG_PATH")
+        if filepath is None:
+            raise ConfigException("CONFIG_PATH environment variable not set")
+        with cls._instance_lock:
+            watcher = cls._instance
+            if watcher is not None and watcher.is_alive():
+                if watcher.filepath == os.path.abspath(filepath):
+                    return watcher
+                watcher.stop()
+            cls._instance = cls(filepath, interval)
+            cls._instance.start()
+            return cls._instance
+
+    @classmethod
+    def shutdown(cls, timeout: Optional[float] = None) -> None:
+        """stop the process-wide watcher if it is running"""
+        with cls._instance_lock:
+            watcher, cls._instance = cls._instance, None
+        if watcher is not None:
+            watcher.stop(timeout)
+
+    def start(self) -> None:
+        # load the current file so that requests can skip the modification check from now on
+        Config.load(self.filepath)
+        Config.watched.add(self.filepath)
+        super().start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """stop watching the file and wait for the thread to exit"""
+        Config.watched.discard(self.filepath)
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def check(self) -> List[ModelSettings]:
+        """reload the file if it changed, returns the settings of the invalidated models"""
+        previous, current = Config.refresh(self.filepath)
+        if previous is None or previous is current:
+            return []
+        changed = previous.compiled.changed_models(current.compiled)
+        session_map = SessionMap()
+        for settings in changed:
+            session_map.invalidate(settings.session_key)
+        _logger_.info("Reloaded %s, %d model(s) changed", self.filepath, len(changed))
+        return changed
+
+    def run(self) -> None:
+        try:
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.check()
+                    self._last_error = None
+                except (OSError, yaml.YAMLError, ConfigException) as ex:
+                    # keep serving the current config until the file is fixed, warning once
+                    if str(ex) != self._last_error:
+                        self._last_error = str(ex)
+                        _logger_.warning("Config reload of %s failed: %s", self.filepath, ex)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    # an unexpected error must not end the thread and freeze the config
+                    if self._last_error != "unexpected":
+                        self._last_error = "unexpected"
+                        _logger_.exception("Config reload of %s failed", self.filepath)
+        finally:
+            # requests go back to checking the file themselves once nothing watches it
+            if not self._stop_event.is_set():
+                Config.watched.discard(self.filepath)
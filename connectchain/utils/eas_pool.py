@@ -0,0 +1,173 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Pooled aiohttp session for Enterprise Auth Service (EAS) calls"""
+import asyncio
+import atexit
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from pydantic import BaseModel, ConfigDict
+
+from .config import Config
+from .event_loop import BackgroundLoop
+
+
+class EASPoolConfig(BaseModel):
+    """Connection pool settings for EAS calls, read from the `eas` config block."""
+
+    model_config = ConfigDict(frozen=True)
+
+    limit: int = 100
+    limit_per_host: int = 10
+    keepalive_timeout: float = 60
+    dns_cache_ttl: int = 300
+    connect_timeout: Optional[float] = None
+    timeout: float = 5
+
+    @staticmethod
+    def from_config(config: Config) -> "EASPoolConfig":
+        """build the pool settings from the compiled `eas` block, falling back to the defaults"""
+        eas = config.compiled.eas
+        settings: Dict[str, Any] = {
+            "limit": eas.pool_limit,
+            "limit_per_host": eas.pool_limit_per_host,
+            "keepalive_timeout": eas.keepalive_timeout,
+            "dns_cache_ttl": eas.dns_cache_ttl,
+            "connect_timeout": eas.connect_timeout,
+            "timeout": eas.timeout,
+        }
+        return EASPoolConfig(**{key: value for key, value in settings.items() if value is not None})
+
+
+class EASSessionPool:
+    """Process-wide, long-lived aiohttp session for EAS calls.
+
+    The session and its keep-alive connections live on a dedicated event loop thread, so they
+    survive across `asyncio.run` calls and can be shared by callers on any thread or event loop.
+    `close` is registered as an exit hook and may also be called explicitly."""
+
+    _instance: Optional["EASSessionPool"] = None
+    _lock = threading.Lock()
+    background_loop = BackgroundLoop("connectchain-eas")
+    pool_config: EASPoolConfig = EASPoolConfig()
+    session: Optional[aiohttp.ClientSession] = None
+
+    def __new__(cls) -> "EASSessionPool":
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(EASSessionPool, cls).__new__(cls)
+                atexit.register(cls._instance.close)
+        return cls._instance
+
+    async def configure(self, pool_config: EASPoolConfig) -> None:
+        """use new pool settings, replacing the pooled session if they changed"""
+        if pool_config == self.pool_config:
+            return
+        await self.background_loop.arun(self.__replace_session(pool_config))
+
+    async def post(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        url: str,
+        json: Any,
+        headers: Dict[str, str],
+        timeout: Optional[float] = None,
+        cookies: Any = None,
+        proxy: Any = None,
+    ) -> Tuple[Any, int]:
+        """post through the pooled session, returning the JSON body and the status code"""
+        return await self.background_loop.arun(
+            self.__post(url, json, headers, timeout, cookies, proxy)
+        )
+
+    async def download(self, url: str, path: str, chunk_size: int = 65536) -> None:
+        """stream a file to `path` through the pooled session, replacing it atomically"""
+        await self.background_loop.arun(self.__download(url, path, chunk_size))
+
+    def close(self) -> None:
+        """close the pooled session and stop its event loop"""
+        if self.session is not None:
+            self.background_loop.run(self.__close_session())
+        self.background_loop.stop()
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_config.limit,
+                limit_per_host=self.pool_config.limit_per_host,
+                keepalive_timeout=self.pool_config.keepalive_timeout,
+                ttl_dns_cache=self.pool_config.dns_cache_ttl,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self.pool_config.timeout, connect=self.pool_config.connect_timeout
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    async def __post(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        url: str,
+        json: Any,
+        headers: Dict[str, str],
+        timeout: Optional[float],
+        cookies: Any,
+        proxy: Any,
+    ) -> Tuple[Any, int]:
+        session = self.__get_session()
+        request_timeout = None
+        if timeout is not None:
+            request_timeout = aiohttp.ClientTimeout(
+                total=timeout, connect=self.pool_config.connect_timeout
+            )
+        async with session.post(
+            url,
+            json=json,
+            headers=headers,
+            timeout=request_timeout,
+            ssl=False,
+            cookies=cookies,
+            proxy=proxy,
+        ) as response:
+            return await response.json(content_type=None), response.status
+
+    async def __download(self, url: str, path: str, chunk_size: int) -> None:
+        session = self.__get_session()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as writer:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        await asyncio.to_thread(writer.write, chunk)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    async def __replace_session(self, pool_config: EASPoolConfig) -> None:
+        # runs on the pool loop, so no call can pick up the old session once it is detached
+        session, self.session = self.session, None
+        self.pool_config = pool_config
+        if session is not None:
+            await session.close()
+            await asyncio.sleep(0)
+
+    async def __close_session(self) -> None:
+        session, self.session = self.session, None
+        if session is not None:
+            await session.close()
+            # give the connector a chance to close the underlying transports
+            await asyncio.sleep(0)
@@ -18,3 +18,11 @@ class OperationNotPermittedException(Exception):
 
 class ConnectChainNoAccessException(BaseException):
     """ConnectChain does not allow access to this class or method."""
+
+
+class ConfigException(BaseException):
+    """Base exception for the config class"""
+
+
+class UtilException(BaseException):
+    """Custom exception class for token_util"""
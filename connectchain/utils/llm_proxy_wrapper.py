@@ -11,11 +11,14 @@
 # the License.
 """Proxied LLM Utilities"""
 import functools
-from typing import Any, Callable, List, Optional
+import inspect
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
 
 from langchain.llms import BaseLLM
 
-from .proxy_manager import ProxyConfig, ProxyManager
+from .client_transport import ClientTransport
+from .proxy_manager import ProxyConfig, ProxyManager, ProxyPoolConfig
 
 _llm_sync_methods_: List[str] = [
     "invoke",
@@ -45,49 +48,106 @@ _llm_async_methods_: List[str] = [
 ]
 
 
-def _sync_proxy_(func: Callable[..., Any], proxy_manager: ProxyManager) -> Callable[..., Any]:
+# instance attribute holding the transport of a wrapped LLM
+_TRANSPORT_ATTRIBUTE_ = "_connectchain_transport_"
+
+# subclass binding the transport of the instance, by LLM class
+_transport_classes_: Dict[type, type] = {}
+_transport_classes_lock_ = threading.Lock()
+
+
+def _sync_transport_(func: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.isgeneratorfunction(func):
+
+        @functools.wraps(func)
+        def generator_wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            with self.__dict__[_TRANSPORT_ATTRIBUTE_].bind():
+                yield from func(self, *args, **kwargs)
+
+        return generator_wrapper
+
     @functools.wraps(func)
     def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
-        with proxy_manager.configure_proxy_sync():
+        with self.__dict__[_TRANSPORT_ATTRIBUTE_].bind():
             return func(self, *args, **kwargs)
 
     return wrapper
 
 
-def _async_proxy_(func: Callable[..., Any], proxy_manager: ProxyManager) -> Callable[..., Any]:
+def _async_transport_(func: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def generator_wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            with self.__dict__[_TRANSPORT_ATTRIBUTE_].bind():
+                async for item in func(self, *args, **kwargs):
+                    yield item
+
+        return generator_wrapper
+
     @functools.wraps(func)
     async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
-        with proxy_manager.configure_proxy_async():
+        with self.__dict__[_TRANSPORT_ATTRIBUTE_].bind():
             return await func(self, *args, **kwargs)
 
     return wrapper
 
 
-def _wrap_method_(
-    mixin: ProxyManager, llm: BaseLLM, method_name: str, decorator: Callable[..., Any]
+def _transport_class_(cls: type) -> type:
+    """Subclass of an LLM class whose network methods use the transport of the instance.
+
+    The subclass is created once per LLM class, so wrapping an instance only swaps its class
+    instead of setting a closure for each method on the instance."""
+    with _transport_classes_lock_:
+        if cls in _transport_classes_.values():
+            # the instance was wrapped before
+            return cls
+        transport_class = _transport_classes_.get(cls)
+        if transport_class is None:
+            namespace: Dict[str, Any] = {
+                "__module__": cls.__module__,
+                "__qualname__": cls.__qualname__,
+            }
+            decorator_pairs = [
+                (_llm_sync_methods_, _sync_transport_),
+                (_llm_async_methods_, _async_transport_),
+            ]
+            for methods, decorator in decorator_pairs:
+                for method_name in methods:
+                    func = getattr(cls, method_name, None)
+                    if inspect.isfunction(func):
+                        namespace[method_name] = decorator(func)
+            transport_class = type(cls.__name__, (cls,), namespace)
+            _transport_classes_[cls] = transport_class
+        return transport_class
+
+
+def wrap_llm_with_transport(llm: BaseLLM, transport: ClientTransport) -> None:
+    """Wrap an LLM instance so that its network requests use the connection pools of the transport."""
+    # Langchain models are pydantic models rejecting unknown attributes and class assignment,
+    # the transport and the class are set without going through pydantic.
+    llm.__dict__[_TRANSPORT_ATTRIBUTE_] = transport
+    transport_class = _transport_class_(llm.__class__)
+    try:
+        object.__setattr__(llm, "__class__", transport_class)
+    except AttributeError:
+        # proxy objects, e.g. mocks, reporting the class they stand for set it themselves
+        llm.__class__ = transport_class
+
+
+def close_llm(llm: Any) -> None:
+    """Close the connection pools of an LLM instance, client pool or backend router."""
+    transport = getattr(llm, "__dict__", {}).get(_TRANSPORT_ATTRIBUTE_)
+    if transport is not None:
+        transport.close()
+        return
+    close = getattr(llm, "close", None)
+    if callable(close):
+        close()
+
+
+def wrap_llm_with_proxy(
+    llm: BaseLLM, proxy_config: Optional[Union[ProxyConfig, ProxyPoolConfig]]
 ) -> None:
-    """Langchain misuses pydantic so we must be careful accessing attributes even when we know they exist.
-    For the same reason, we must 'force-feed' the decorated function back to the class instance by setting
-    directly on the instance __dict__ to avoid pydantic validation.
-
-    Note: pydantic is a data validation framework and is not intended to be used as an architecture validation
-    tool; despite the fact that it is used as such in Langchain."""
-    if hasattr(llm, method_name):
-        try:
-            func = getattr(llm, method_name)
-        except ValueError:
-            return
-        wrapped_func = decorator(func, mixin)
-        llm.__dict__[method_name] = wrapped_func
-
-
-def wrap_llm_with_proxy(llm: BaseLLM, proxy_config: Optional[ProxyConfig]) -> None:
     """Wrap an LLM instance with proxy functionality for network requests."""
-
-    proxy_mixin = ProxyManager(proxy_config)
-
-    decorator_pairs = [(_llm_sync_methods_, _sync_proxy_), (_llm_async_methods_, _async_proxy_)]
-
-    for methods, decorator in decorator_pairs:
-        for wrap_method_name in methods:
-            _wrap_method_(proxy_mixin, llm, wrap_method_name, decorator)
+    wrap_llm_with_transport(llm, ProxyManager(proxy_config).transport)
@@ -0,0 +1,98 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""Concurrent token prefetch for the models defined in the config"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Iterable, List, NamedTuple, Optional
+
+import yaml
+from dotenv import find_dotenv, load_dotenv
+
+from .config import Config
+from .eas_pool import EASSessionPool
+from .exceptions import ConfigException, UtilException
+from .token_util import aget_token_from_env
+
+DEFAULT_CONCURRENCY = 8
+
+
+class PrewarmResult(NamedTuple):
+    """Outcome of prefetching the token of a model"""
+
+    model: str
+    latency: float
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """whether the token was fetched"""
+        return self.error is None
+
+
+async def aprewarm(
+    indexes: Optional[Iterable[Any]] = None, concurrency: int = DEFAULT_CONCURRENCY
+) -> List[PrewarmResult]:
+    """fetch the tokens of the given models, or of every configured model, in parallel
+
+    At most `concurrency` tokens are fetched at once. Failures are reported in the results
+    instead of being raised, so one misconfigured model does not prevent the others from
+    warming up."""
+    if indexes is None:
+        models = Config.from_env().compiled.models
+        if not models:
+            raise UtilException("No models defined in config")
+        indexes = list(models)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm(index: Any) -> PrewarmResult:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await aget_token_from_env(index)
+            except (Exception, UtilException) as ex:  # pylint: disable=broad-exception-caught
+                return PrewarmResult(str(index), time.perf_counter() - start, ex)
+            return PrewarmResult(str(index), time.perf_counter() - start)
+
+    return list(await asyncio.gather(*(warm(index) for index in indexes)))
+
+
+def prewarm(
+    indexes: Optional[Iterable[Any]] = None, concurrency: int = DEFAULT_CONCURRENCY
+) -> List[PrewarmResult]:
+    """fetch the tokens of the given models, or of every configured model, synchronously"""
+    return EASSessionPool.background_loop.run(aprewarm(indexes, concurrency))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """command line entry point, returns a non-zero exit code if any token failed"""
+    parser = argparse.ArgumentParser(
+        prog="connectchain-prewarm", description="Prefetch the EAS tokens of configured models"
+    )
+    parser.add_argument("indexes", nargs="*", help="model indexes, defaults to all models")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args(argv)
+    load_dotenv(find_dotenv(usecwd=True))
+    try:
+        results = prewarm(args.indexes or None, args.concurrency)
+    except (OSError, yaml.YAMLError, ConfigException, UtilException) as ex:
+        print(f"Failed to load the config: {ex}", file=sys.stderr)
+        return 1
+    for result in results:
+        status = "ok" if result.ok else f"failed: {result.error}"
+        print(f"model {result.model}: {result.latency * 1000:.1f} ms {status}")
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -10,14 +10,26 @@
 # or implied. See the License for the specific language governing permissions and limitations under
 # the License.
 """Proxy Manager Mixin"""
-from contextlib import contextmanager
+import socket
+import threading
+import time
 from logging import Logger
-from typing import Any, Dict, Generator, Optional
+from typing import Callable, ContextManager, Dict, List, Optional, Sequence, Union
 
-import requests
-import requests.adapters
 from pydantic import BaseModel
 
+from .client_transport import ClientTransport, current_transport
+from .exceptions import ConfigException
+
+# seconds between two health probes of the proxies of a pool
+PROBE_INTERVAL = 30.0
+# seconds a probe waits for the TCP connection to a proxy
+PROBE_TIMEOUT = 2.0
+# weight of the latest outcome in the error rate of a proxy
+ERROR_SMOOTHING = 0.2
+# how much the error rate of a proxy lengthens its latency when proxies are ranked
+ERROR_PENALTY = 10.0
+
 _logger_ = Logger(__name__)
 
 
@@ -28,47 +40,238 @@ class ProxyConfig(BaseModel):
     port: int
 
 
+class ProxyPoolConfig(BaseModel):
+    """Several proxies to choose from, with the settings of their health checks."""
+
+    endpoints: List[ProxyConfig]
+    probe_interval: float = PROBE_INTERVAL
+    probe_timeout: float = PROBE_TIMEOUT
+    cooldown: float = PROBE_INTERVAL
+
+
+def proxy_settings(proxy_config: Optional[ProxyConfig]) -> Dict[str, str]:
+    """Proxy settings dictionary for requests."""
+    if not proxy_config:
+        return {}
+    return {
+        "http": f"http://{proxy_config.host}:{proxy_config.port}",
+        "https": f"https://{proxy_config.host}:{proxy_config.port}",
+    }
+
+
+class ProxyEndpoint:  # pylint: disable=too-few-public-methods
+    """A proxy of a pool and its health"""
+
+    def __init__(self, config: ProxyConfig) -> None:
+        self.config = config
+        self.proxies = proxy_settings(config)
+        # TCP connect latency of the last probes, None until a probe succeeded
+        self.latency: Optional[float] = None
+        # moving average of the failed requests
+        self.error_rate = 0.0
+        # monotonic time until which the proxy is considered down
+        self.down_until = 0.0
+
+    def score(self, default_latency: float) -> float:
+        """rank of the proxy, lower is better"""
+        latency = default_latency if self.latency is None else self.latency
+        return latency * (1 + ERROR_PENALTY * self.error_rate)
+
+
+class ProxyPool:  # pylint: disable=too-many-instance-attributes
+    """Proxies of one egress, picked per request by their health.
+
+    A background thread probes each proxy with a TCP connection every `probe_interval` seconds.
+    Requests use the available proxy with the lowest connect latency weighted by its recent error
+    rate; a proxy failing a probe or a connection is taken out until it passes a probe again or
+    its `cooldown` has passed, and the request fails over to the next proxy."""
+
+    def __init__(
+        self,
+        endpoints: Sequence[ProxyConfig],
+        probe_interval: float = PROBE_INTERVAL,
+        probe_timeout: float = PROBE_TIMEOUT,
+        cooldown: float = PROBE_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not endpoints:
+            raise ConfigException("A proxy pool needs at least one proxy")
+        self.endpoints = [ProxyEndpoint(config) for config in endpoints]
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def for_config(cls, pool_config: ProxyPoolConfig) -> "ProxyPool":
+        """Shared pool of a pool configuration, so that clients share the health of the proxies."""
+        key = pool_config.model_dump_json()
+        with _proxy_pools_lock_:
+            pool = _proxy_pools_.get(key)
+            if pool is None:
+                pool = _proxy_pools_[key] = cls(
+                    pool_config.endpoints,
+                    pool_config.probe_interval,
+                    pool_config.probe_timeout,
+                    pool_config.cooldown,
+                )
+            return pool
+
+    def _probe_endpoint_(self, endpoint: ProxyEndpoint) -> None:
+        started = self._clock()
+        try:
+            with socket.create_connection(
+                (endpoint.config.host, endpoint.config.port), self.probe_timeout
+            ):
+                pass
+        except OSError as ex:
+            with self._lock:
+                endpoint.down_until = self._clock() + max(self.probe_interval, self.cooldown)
+            _logger_.warning(
+                "Proxy %s:%s failed its health check: %s",
+                endpoint.config.host,
+                endpoint.config.port,
+                ex,
+            )
+            return
+        latency = self._clock() - started
+        with self._lock:
+            endpoint.latency = latency
+            endpoint.down_until = 0.0
+
+    def probe(self) -> None:
+        """check the proxies now"""
+        for endpoint in self.endpoints:
+            self._probe_endpoint_(endpoint)
+
+    def _run_(self) -> None:
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.probe_interval)
+
+    def start(self) -> None:
+        """start the health checks in the background, once"""
+        with self._lock:
+            if self._thread is not None or self.probe_interval <= 0:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run_, name="connectchain-proxy-probe", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """stop the health checks"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def select(self, tried: Sequence[ProxyEndpoint] = ()) -> ProxyEndpoint:
+        """the proxy for the next attempt of a request, `tried` holds the failed attempts"""
+        self.start()
+        with self._lock:
+            now = self._clock()
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in tried]
+            if not candidates:
+                candidates = self.endpoints
+            available = [endpoint for endpoint in candidates if endpoint.down_until <= now]
+            if not available:
+                return min(candidates, key=lambda endpoint: endpoint.down_until)
+            return min(available, key=lambda endpoint: endpoint.score(self.probe_timeout))
+
+    def succeeded(self, endpoint: ProxyEndpoint) -> None:
+        """record a request sent through the proxy"""
+        with self._lock:
+            endpoint.error_rate -= ERROR_SMOOTHING * endpoint.error_rate
+
+    def failed(self, endpoint: ProxyEndpoint, tried: Sequence[ProxyEndpoint]) -> bool:
+        """record a failed connection to the proxy, returns whether another proxy can be tried"""
+        with self._lock:
+            now = self._clock()
+            endpoint.error_rate += ERROR_SMOOTHING * (1 - endpoint.error_rate)
+            endpoint.down_until = now + self.cooldown
+            return any(
+                candidate not in tried and candidate.down_until <= now
+                for candidate in self.endpoints
+            )
+
+
+_proxy_pools_: Dict[str, ProxyPool] = {}
+_proxy_pools_lock_ = threading.Lock()
+
+
 class ProxyManager:
-    """Manages proxy configuration for LLM requests."""
+    """Manages proxy configuration for LLM requests.
 
-    proxy_config: Optional[ProxyConfig]
+    The proxy is set once on a transport of its own, the requests made while the transport is
+    bound go through it without touching any global state, so proxied clients can be used from
+    threads and coroutines concurrently. With a pool of proxies, the transport picks a healthy
+    proxy for each request."""
 
-    def __init__(self, proxy_config: Optional[ProxyConfig]) -> None:
+    proxy_config: Optional[Union[ProxyConfig, ProxyPoolConfig]]
+
+    def __init__(self, proxy_config: Optional[Union[ProxyConfig, ProxyPoolConfig]]) -> None:
         """Initialize proxy manager with optional proxy configuration."""
         self.proxy_config = proxy_config
+        self.pool = (
+            ProxyPool.for_config(proxy_config)
+            if isinstance(proxy_config, ProxyPoolConfig)
+            else None
+        )
+        self.transport = ClientTransport(self._build_proxy_settings_(), self.pool)
 
     def _build_proxy_settings_(self) -> Dict[str, str]:
-        """Build proxy settings dictionary for requests."""
-        if not self.proxy_config:
+        """Build proxy settings dictionary for requests, a pool picks them per request."""
+        if not isinstance(self.proxy_config, ProxyConfig):
             return {}
-        return {
-            "http": f"http://{self.proxy_config.host}:{self.proxy_config.port}",
-            "https": f"https://{self.proxy_config.host}:{self.proxy_config.port}",
-        }
+        return proxy_settings(self.proxy_config)
 
-    def _patch_session_proxies_(self) -> Generator[None, None, None]:
-        """Patch requests.Session to use proxy configuration."""
-        proxy_config = self._build_proxy_settings_()
-        vanilla_session = requests.Session.__init__
+    @property
+    def proxies(self) -> Dict[str, str]:
+        """Proxy settings of the transport."""
+        return self.transport.proxies
 
-        def monkeypatch_proxied_session(self: Any, *args: Any, **kwargs: Any) -> None:
-            vanilla_session(self, *args, **kwargs)
-            self.proxies.update(proxy_config)
+    def configure_proxy_sync(self) -> ContextManager[ClientTransport]:
+        """Configure the proxy for synchronous requests."""
+        return self.transport.bind()
 
-        requests.Session.__init__ = monkeypatch_proxied_session  # type: ignore[method-assign]
+    def configure_proxy_async(self) -> ContextManager[ClientTransport]:
+        """Configure the proxy for asynchronous requests."""
+        return self.transport.bind()
 
-        try:
-            yield
-        finally:
-            requests.Session.__init__ = vanilla_session  # type: ignore[method-assign]
+    @classmethod
+    def for_config(
+        cls, proxy_config: Optional[Union[ProxyConfig, ProxyPoolConfig]]
+    ) -> "ProxyManager":
+        """Shared proxy manager of a proxy configuration, reusing its connections."""
+        key = proxy_config.model_dump_json() if proxy_config else None
+        with _proxy_managers_lock_:
+            manager = _proxy_managers_.get(key)
+            if manager is None:
+                manager = _proxy_managers_[key] = cls(proxy_config)
+            return manager
 
-    @contextmanager
-    def configure_proxy_sync(self) -> Generator[None, None, None]:
-        """Configure the proxy for synchronous requests."""
-        return self._patch_session_proxies_()
 
-    @contextmanager
-    def configure_proxy_async(self) -> Generator[None, None, None]:
-        """Configure the proxy for asynchronous requests."""
-        _logger_.warning("Async proxy support is not thread safe")
-        return self._patch_session_proxies_()
+_proxy_managers_: Dict[Optional[str], ProxyManager] = {}
+_proxy_managers_lock_ = threading.Lock()
+
+
+def proxy_scope(
+    proxy_config: Optional[Union[ProxyConfig, ProxyPoolConfig]],
+) -> ContextManager[ClientTransport]:
+    """Route the OpenAI requests made in this context through the proxy.
+
+    The scope is held in a context variable, so it applies to the current thread or asyncio task
+    only: concurrent tasks of one event loop can each use a different proxy."""
+    return ProxyManager.for_config(proxy_config).configure_proxy_async()
+
+
+def current_proxies() -> Dict[str, str]:
+    """Proxy settings the OpenAI requests of this context are sent with."""
+    transport = current_transport()
+    return transport.proxies if transport is not None else {}
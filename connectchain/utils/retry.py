@@ -11,10 +11,76 @@
 # the License.
 """Retry utilities and decorators for functions that may raise exceptions."""
 import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
 from functools import wraps
 from time import sleep
 from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
 
+FULL_JITTER = "full"
+EQUAL_JITTER = "equal"
+DECORRELATED_JITTER = "decorrelated"
+JITTER_STRATEGIES = (FULL_JITTER, EQUAL_JITTER, DECORRELATED_JITTER)
+
+RetryAfter = Callable[[BaseException], Optional[float]]
+
+
+def retry_after_from_headers(exception: BaseException) -> Optional[float]:
+    """Seconds to wait suggested by the server in the `Retry-After` (or `retry-after-ms`) header
+    of an OpenAI error, such as a `RateLimitError`, None when there is no suggestion."""
+    headers = getattr(exception, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(exception, "response", None), "headers", None)
+    if not headers:
+        return None
+    headers = {str(name).lower(): value for name, value in headers.items()}
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            # HTTP date
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _check_jitter_(jitter: Optional[str]) -> None:
+    if jitter is not None and jitter not in JITTER_STRATEGIES:
+        raise ValueError(f'Unknown jitter "{jitter}"')
+
+
+def _next_sleep_(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    attempt: int,
+    previous: float,
+    sleep_time: float,
+    ebo: bool,
+    jitter: Optional[str],
+    max_sleep: Optional[float],
+    retry_after: Optional[RetryAfter],
+    exception: BaseException,
+) -> float:
+    """Seconds to wait before the next attempt. The backoff is spread by the jitter strategy so
+    that clients failing together do not retry together, a delay suggested by the server takes
+    precedence, and `max_sleep` caps the result."""
+    backoff = sleep_time * (2 ** (attempt - 1)) if ebo else sleep_time
+    if jitter == FULL_JITTER:
+        backoff = random.uniform(0, backoff)
+    elif jitter == EQUAL_JITTER:
+        backoff = backoff / 2 + random.uniform(0, backoff / 2)
+    elif jitter == DECORRELATED_JITTER:
+        backoff = random.uniform(sleep_time, max(sleep_time, previous * 3))
+    suggested = retry_after(exception) if retry_after is not None else None
+    next_sleep = suggested if suggested is not None else backoff
+    if max_sleep is not None:
+        next_sleep = min(next_sleep, max_sleep)
+    return round(next_sleep, 3) if isinstance(next_sleep, float) else next_sleep
+
 
 def base_retry(  # pylint: disable=too-many-arguments, too-many-positional-arguments
     func: Callable[..., Any],
@@ -25,6 +91,9 @@ def base_retry(  # pylint: disable=too-many-arguments, too-many-positional-argum
     exceptions: Union[Tuple[type[BaseException], ...], type[BaseException]] = Exception,
     ebo: bool = False,
     log_func: Callable[[str], None] = print,
+    jitter: Optional[str] = None,
+    max_sleep: Optional[float] = None,
+    retry_after: Optional[RetryAfter] = None,
 ) -> Any:
     """Retry a function that may raise exceptions.
 
@@ -36,19 +105,27 @@ def base_retry(  # pylint: disable=too-many-arguments, too-many-positional-argum
         sleep_time (int): The time to sleep between retries.
         exceptions (Union[List[Exception], Exception]): The exceptions to catch.
         ebo (bool): Whether to use exponential backoff.
-        log_func (callable): The function to use for logging."""
+        log_func (callable): The function to use for logging.
+        jitter (str): The jitter strategy, "full", "equal" or "decorrelated".
+        max_sleep (float): The maximum time to sleep between retries.
+        retry_after (callable): The function returning the delay suggested by the server in the
+            caught exception, e.g. `retry_after_from_headers`."""
+    _check_jitter_(jitter)
     if args is None:
         args = ()
     if kwargs is None:
         kwargs = {}
     f_name = getattr(func, "__qualname__", func.__name__)
     attempt = 0
+    next_sleep: float = sleep_time
     while True:
         try:
             return func(*args, **kwargs)
         except exceptions as e:
             attempt += 1
-            next_sleep = sleep_time * (2 ** (attempt - 1)) if ebo else sleep_time
+            next_sleep = _next_sleep_(
+                attempt, next_sleep, sleep_time, ebo, jitter, max_sleep, retry_after, e
+            )
             if attempt < max_retry:
                 log_func(
                     f"Attempt #{attempt} of function {f_name} failed with exception {e}. "
@@ -69,6 +146,9 @@ async def abase_retry(  # pylint: disable=too-many-arguments, too-many-positiona
     exceptions: Union[Tuple[type[BaseException], ...], type[BaseException]] = Exception,
     ebo: bool = False,
     log_func: Callable[[str], None] = print,
+    jitter: Optional[str] = None,
+    max_sleep: Optional[float] = None,
+    retry_after: Optional[RetryAfter] = None,
 ) -> Any:
     """Retry an async function that may raise exceptions.
 
@@ -80,19 +160,27 @@ async def abase_retry(  # pylint: disable=too-many-arguments, too-many-positiona
         sleep_time (int): The time to sleep between retries.
         exceptions (Union[List[Exception], Exception]): The exceptions to catch.
         ebo (bool): Whether to use exponential backoff.
-        log_func (callable): The function to use for logging."""
+        log_func (callable): The function to use for logging.
+        jitter (str): The jitter strategy, "full", "equal" or "decorrelated".
+        max_sleep (float): The maximum time to sleep between retries.
+        retry_after (callable): The function returning the delay suggested by the server in the
+            caught exception, e.g. `retry_after_from_headers`."""
+    _check_jitter_(jitter)
     if args is None:
         args = ()
     if kwargs is None:
         kwargs = {}
     f_name = getattr(func, "__qualname__", func.__name__)
     attempt = 0
+    next_sleep: float = sleep_time
     while True:
         try:
             return await func(*args, **kwargs)
         except exceptions as e:
             attempt += 1
-            next_sleep = sleep_time * (2 ** (attempt - 1)) if ebo else sleep_time
+            next_sleep = _next_sleep_(
+                attempt, next_sleep, sleep_time, ebo, jitter, max_sleep, retry_after, e
+            )
             if attempt < max_retry:
                 log_func(
                     f"Attempt #{attempt} of function {f_name} failed with exception {e}. "
@@ -104,12 +192,15 @@ async def abase_retry(  # pylint: disable=too-many-arguments, too-many-positiona
             raise e
 
 
-def retry_decorator(
+def retry_decorator(  # pylint: disable=too-many-arguments, too-many-positional-arguments
     max_retry: int = 3,
     sleep_time: int = 1,
     exceptions: Union[Tuple[type[BaseException], ...], type[BaseException]] = Exception,
     ebo: bool = False,
     log_func: Callable[[str], None] = print,
+    jitter: Optional[str] = None,
+    max_sleep: Optional[float] = None,
+    retry_after: Optional[RetryAfter] = None,
 ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """Decorator for retrying functions that may raise exceptions.
 
@@ -118,24 +209,42 @@ def retry_decorator(
         sleep_time (int): The time to sleep between retries.
         exceptions (Union[List[Exception], Exception]): The exceptions to catch.
         ebo (bool): Whether to use exponential backoff.
-        log_func (callable): The function to use for logging."""
+        log_func (callable): The function to use for logging.
+        jitter (str): The jitter strategy, "full", "equal" or "decorrelated".
+        max_sleep (float): The maximum time to sleep between retries.
+        retry_after (callable): The function returning the delay suggested by the server."""
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            return base_retry(func, args, kwargs, max_retry, sleep_time, exceptions, ebo, log_func)
+            return base_retry(
+                func,
+                args,
+                kwargs,
+                max_retry,
+                sleep_time,
+                exceptions,
+                ebo,
+                log_func,
+                jitter,
+                max_sleep,
+                retry_after,
+            )
 
         return wrapper
 
     return decorator
 
 
-def aretry_decorator(
+def aretry_decorator(  # pylint: disable=too-many-arguments, too-many-positional-arguments
     max_retry: int = 3,
     sleep_time: int = 1,
     exceptions: Union[Tuple[type[BaseException], ...], type[BaseException]] = Exception,
     ebo: bool = False,
     log_func: Callable[[str], None] = print,
+    jitter: Optional[str] = None,
+    max_sleep: Optional[float] = None,
+    retry_after: Optional[RetryAfter] = None,
 ) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
     """Decorator for retrying async functions that may raise exceptions.
 
@@ -144,13 +253,26 @@ def aretry_decorator(
         sleep_time (int): The time to sleep between retries.
         exceptions (Union[List[Exception], Exception]): The exceptions to catch.
         ebo (bool): Whether to use exponential backoff.
-        log_func (Callable): The function to use for logging."""
+        log_func (Callable): The function to use for logging.
+        jitter (str): The jitter strategy, "full", "equal" or "decorrelated".
+        max_sleep (float): The maximum time to sleep between retries.
+        retry_after (Callable): The function returning the delay suggested by the server."""
 
     def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
             return await abase_retry(
-                func, args, kwargs, max_retry, sleep_time, exceptions, ebo, log_func
+                func,
+                args,
+                kwargs,
+                max_retry,
+                sleep_time,
+                exceptions,
+                ebo,
+                log_func,
+                jitter,
+                max_sleep,
+                retry_after,
             )
 
         return wrapper
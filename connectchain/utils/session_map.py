@@ -10,50 +10,140 @@
 # or implied. See the License for the specific language governing permissions and limitations under
 # the License.
 """This module is used to keep track of the session expiration time"""
-from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, NamedTuple, Optional
 
 from langchain.schema import LLMResult
 
+from .llm_proxy_wrapper import close_llm
+
+DEFAULT_SESSION_TTL = 900
+DEFAULT_MAX_SESSIONS = 1024
+
+
+class Session(NamedTuple):
+    """A cached LLM instance, `created_at` and `expires_at` are monotonic times"""
+
+    created_at: float
+    llm: LLMResult
+    expires_at: float
+
+
+class SessionStats(NamedTuple):
+    """Counters of the session map"""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
 
 class SessionMap:
-    """This class is used to keep track of the session expiration time"""
+    """This class is used to keep track of the session expiration time.
+
+    Sessions expire after their own TTL, defaulting to `expires_in`, and the least recently used
+    session is evicted once `max_size` sessions are stored. The connection pools of the LLM
+    instances that are dropped are closed. All methods are thread safe and do not block, so they
+    can be called from coroutines as well."""
 
     _instance: Optional["SessionMap"] = None
-    session_map: Dict[str, Tuple[datetime, LLMResult]] = {}
-    expires_in: int = -1
+    _lock = threading.Lock()
+    session_map: "OrderedDict[str, Session]" = OrderedDict()
+    expires_in: float = DEFAULT_SESSION_TTL
+    max_size: int = DEFAULT_MAX_SESSIONS
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __new__(
+        cls, expires_in: Optional[float] = None, max_size: Optional[int] = None
+    ) -> "SessionMap":
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(SessionMap, cls).__new__(cls)
+            # the latest settings apply to the sessions created from now on
+            if expires_in is not None:
+                cls._instance.expires_in = expires_in
+            if max_size is not None:
+                cls._instance.max_size = max_size
+            return cls._instance
+
+    def new_session(
+        self, session_id: str, llm: LLMResult, expires_in: Optional[float] = None
+    ) -> None:
+        """save new session for later, expiring after `expires_in` seconds if given"""
+        now = time.monotonic()
+        ttl = self.expires_in if expires_in is None else expires_in
+        dropped: List[Any] = []
+        with self._lock:
+            previous = self.session_map.get(session_id)
+            # a renewed session keeps its LLM instance
+            if previous is not None and previous.llm is not llm:
+                dropped.append(previous.llm)
+            self.session_map[session_id] = Session(now, llm, now + ttl)
+            self.session_map.move_to_end(session_id)
+            while len(self.session_map) > max(self.max_size, 1):
+                dropped.append(self.session_map.popitem(last=False)[1].llm)
+                SessionMap.evictions += 1
+        _close_(dropped)
+
+    def get(self, session_id: str) -> Optional[LLMResult]:
+        """the LLM instance of the session, or None if there is no live session"""
+        with self._lock:
+            session = self.session_map.get(session_id)
+            if session is None or session.expires_at < time.monotonic():
+                SessionMap.misses += 1
+                return None
+            self.session_map.move_to_end(session_id)
+            SessionMap.hits += 1
+            return session.llm
 
-    def __new__(cls, expires_in: int = 900) -> "SessionMap":
-        if cls._instance is None:
-            cls._instance = super(SessionMap, cls).__new__(cls)
-            cls._instance.expires_in = expires_in
-        return cls._instance
+    def peek(self, session_id: str) -> Optional[LLMResult]:
+        """the LLM instance of the session even if it expired, so that it can be renewed"""
+        with self._lock:
+            session = self.session_map.get(session_id)
+            return None if session is None else session.llm
 
-    def new_session(self, session_id: str, llm: LLMResult) -> None:
-        """save new session for later"""
-        self.session_map[session_id] = (datetime.now(), llm)
+    def invalidate(self, session_id: str) -> None:
+        """drop the session, the next request creates a new one"""
+        with self._lock:
+            session = self.session_map.pop(session_id, None)
+        if session is not None:
+            _close_([session.llm])
+
+    def clear(self) -> None:
+        """drop every session and reset the counters"""
+        with self._lock:
+            dropped = [session.llm for session in self.session_map.values()]
+            self.session_map.clear()
+            SessionMap.hits = SessionMap.misses = SessionMap.evictions = 0
+        _close_(dropped)
 
     def is_expired(self, session_id: str) -> bool:
-        """check if the session is expired"""
-        return (datetime.now() - self.session_map[session_id][0]).total_seconds() > self.expires_in
+        """check if the session is expired, unknown sessions are expired"""
+        session = self.session_map.get(session_id)
+        return session is None or session.expires_at < time.monotonic()
 
     def get_llm(self, session_id: str) -> LLMResult:
         """get the LLM instance from the session"""
-        return self.session_map[session_id][1]
+        with self._lock:
+            self.session_map.move_to_end(session_id)
+            return self.session_map[session_id].llm
+
+    def stats(self) -> SessionStats:
+        """hit, miss and eviction counts and the number of stored sessions"""
+        with self._lock:
+            return SessionStats(self.hits, self.misses, self.evictions, len(self.session_map))
 
     @staticmethod
     def uuid_from_config(config: Any, model_config: Any) -> str:
-        """generate a uuid from the config"""
-        env_id_key = None
-        env_secret_key = None
-        if model_config.eas:
-            env_id_key = model_config.eas.id_key
-            env_secret_key = model_config.eas.secret_key
-        if env_id_key is None:
-            env_id_key = config.eas.id_key
-        if env_secret_key is None:
-            env_secret_key = config.eas.secret_key
-        env_uuid = f"{env_id_key}_{env_secret_key}"
-        model_uuid = f"{model_config.provider}_{model_config.type}_{model_config.engine}"
-        model_uuid += f"_{model_config.model_name}_{model_config.api_version}"
-        return f"{env_uuid}_{model_uuid}"
+        """generate a uuid from the config, precomputed for the models of the config"""
+        return str(config.compiled.resolve(model_config).session_key)
+
+
+def _close_(llms: List[Any]) -> None:
+    """close the connection pools of dropped LLM instances"""
+    for llm in llms:
+        close_llm(llm)
@@ -0,0 +1,90 @@
+# Copyright 2026 American Express Travel Related Services Company, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+"""File-locked token store shared by the worker processes of a host"""
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, Hashable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Not available on Windows: the store is still shared, but workers may fetch concurrently
+    fcntl = None  # type: ignore[assignment]
+
+
+class SharedTokenStore:
+    """Token store in a directory shared by the worker processes of a host.
+
+    Each token is kept in its own file, written atomically and readable by the owner only. An
+    exclusive lock file per token lets a single worker fetch a new token while the others wait
+    for it and read it from the store instead of fetching their own."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        # expiry of the token this process last took from the store, by key
+        self.taken: Dict[Hashable, float] = {}
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def path(self, key: Hashable) -> str:
+        """path of the file holding the token of a key"""
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def acquire(self, key: Hashable) -> int:
+        """block until the exclusive, cross-process lock of a key is held, returning its handle"""
+        fd = os.open(f"{self.path(key)}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    @staticmethod
+    def release(handle: int) -> None:
+        """release a lock returned by `acquire`"""
+        # closing the descriptor releases the lock
+        os.close(handle)
+
+    @contextmanager
+    def lock(self, key: Hashable) -> Generator[None, None, None]:
+        """hold the exclusive, cross-process lock of a key"""
+        handle = self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(handle)
+
+    def read(self, key: Hashable) -> Optional[Tuple[str, float]]:
+        """read the token of a key and its expiry as epoch seconds, if stored"""
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as reader:
+                data: Any = json.load(reader)
+            return str(data["token"]), float(data["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def write(self, key: Hashable, token: str, expires_at: float) -> None:
+        """atomically store the token of a key along with its expiry as epoch seconds"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as writer:
+                json.dump({"token": str(token), "expires_at": expires_at}, writer)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -12,20 +12,39 @@
 """token_util is the utility class to get the bearer token from the environment variables"""
 import asyncio
 import base64
+import functools
 import hashlib
 import hmac
+import json
 import os
+import random
+import threading
 import time
-import urllib
 import uuid
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Any, Dict, Final
+from logging import Logger
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Final,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
-import aiohttp
 from dotenv import find_dotenv, load_dotenv
-from OpenSSL import crypto as c
 
 from connectchain.utils import Config
+from connectchain.utils.cert_manager import CertManager, cert_expiration
+from connectchain.utils.compiled_config import EASSettings
+from connectchain.utils.eas_pool import EASPoolConfig, EASSessionPool
+from connectchain.utils.exceptions import UtilException
+from connectchain.utils.shared_token_store import SharedTokenStore
 
 # There are 3 environment variables that need to be set: CONFIG_PATH:
 # path to the config file Consumer ID: the consumer integration ID.
@@ -35,40 +54,405 @@ from connectchain.utils import Config
 # defined in the config file under eas.secret_key
 
 
-class UtilException(BaseException):
-    """Custom exception class for token_util"""
+TokenKey = Tuple[str, Tuple[str, ...], str]
+
+DEFAULT_TOKEN_TTL: Final[int] = 900
+DEFAULT_REFRESH_FRACTION: Final[float] = 0.75
+DEFAULT_REFRESH_JITTER: Final[float] = 0.1
+DEFAULT_EXPIRY_MARGIN: Final[float] = 30
+# delay before retrying a failed background refresh, doubled per failure up to the maximum
+REFRESH_RETRY_DELAY: Final[float] = 2
+MAX_REFRESH_RETRY_DELAY: Final[float] = 60
+
+_logger_ = Logger(__name__)
+
+
+class BearerToken(str):
+    """Bearer token carrying its expiry as epoch seconds when EAS provided one, and the epoch
+    seconds until which the process cache serves it when it comes from `TokenCache`"""
+
+    expires_at: Optional[float]
+    cached_until: Optional[float]
+
+    def __new__(
+        cls, value: str, expires_at: Optional[float] = None, cached_until: Optional[float] = None
+    ) -> "BearerToken":
+        token = super().__new__(cls, value)
+        token.expires_at = expires_at
+        token.cached_until = cached_until
+        return token
+
+    @property
+    def expires_in(self) -> Optional[float]:
+        """seconds until the token expires, if known"""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.time()
+
+
+def jwt_expiration(token: str) -> Optional[float]:
+    """read the `exp` claim of a JWT as epoch seconds, without verifying the token"""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4))
+        exp = json.loads(payload).get("exp")
+        return None if exp is None else float(exp)
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def token_ttl(token: str, default_ttl: float, margin: float = DEFAULT_EXPIRY_MARGIN) -> float:
+    """seconds a token can be used for, keeping a safety margin before its known expiry
+
+    Falls back to `default_ttl` when the token does not carry its expiry. The margin never takes
+    more than half of the remaining lifetime. A token served from the cache is not used past its
+    cache entry, which may be older than the caller."""
+    expires_in = getattr(token, "expires_in", None)
+    if expires_in is None:
+        ttl = default_ttl
+    else:
+        expires_in = max(float(expires_in), 0.0)
+        ttl = expires_in - min(margin, expires_in / 2)
+    cached_until = token.cached_until if isinstance(token, BearerToken) else None
+    if cached_until is not None:
+        ttl = min(ttl, max(cached_until - time.time(), 0.0))
+    return ttl
+
+
+class CachedToken(NamedTuple):
+    """A cached bearer token along with what is needed to renew it"""
+
+    token: str
+    fetched_at: float
+    expires_at: float
+    fetch: Callable[[], Awaitable[str]]
+    ttl: float
+    margin: float
+
+
+def _served_token_(entry: CachedToken) -> BearerToken:
+    """the cached token, stamped with the epoch seconds until which the cache serves it"""
+    cached_until = time.time() + entry.expires_at - time.monotonic()
+    return BearerToken(str(entry.token), getattr(entry.token, "expires_at", None), cached_until)
+
+
+class TokenCache:
+    """Process-wide bearer token cache keyed by consumer id, scope and EAS url.
+
+    Only one caller refreshes a given key at a time; concurrent callers for the same key await the
+    future of the in-flight refresh instead of minting their own token. The in-flight futures are
+    thread-safe, so callers on different threads or event loops share a single refresh."""
+
+    _instance: Optional["TokenCache"] = None
+    _lock = threading.Lock()
+    tokens: Dict[TokenKey, CachedToken] = {}
+    inflight: Dict[TokenKey, "Future[str]"] = {}
+
+    def __new__(cls) -> "TokenCache":
+        if cls._instance is None:
+            cls._instance = super(TokenCache, cls).__new__(cls)
+        return cls._instance
+
+    @staticmethod
+    def key(consumer_id: str, scope: Any, eas_url: Any) -> TokenKey:
+        """build the cache key of a token"""
+        if isinstance(scope, (list, tuple)):
+            scope_key = tuple(str(item) for item in scope)
+        else:
+            scope_key = () if scope is None else (str(scope),)
+        return consumer_id, scope_key, str(eas_url)
+
+    def get(self, key: TokenKey) -> Optional[str]:
+        """get the cached token if it has not expired"""
+        with self._lock:
+            entry = self.tokens.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        return _served_token_(entry)
+
+    def entries(self) -> Dict[TokenKey, CachedToken]:
+        """snapshot of the cached tokens"""
+        with self._lock:
+            return dict(self.tokens)
+
+    def invalidate(self, key: TokenKey) -> None:
+        """drop a cached token so that the next caller fetches a new one"""
+        with self._lock:
+            self.tokens.pop(key, None)
+
+    def clear(self) -> None:
+        """drop all cached tokens"""
+        with self._lock:
+            self.tokens.clear()
+
+    async def get_or_fetch(
+        self,
+        key: TokenKey,
+        fetch: Callable[[], Awaitable[str]],
+        ttl: float,
+        margin: float = DEFAULT_EXPIRY_MARGIN,
+    ) -> str:
+        """get the cached token, or fetch it once for all concurrent callers of the same key
+
+        The token is cached until shortly before the expiry it carries, see `token_ttl`, or for
+        `ttl` seconds when its expiry is unknown."""
+        return await self.__fetch_once(key, fetch, ttl, margin, force=False)
+
+    async def refresh(self, key: TokenKey) -> str:
+        """renew a cached token ahead of its expiry, sharing the refresh with concurrent callers"""
+        with self._lock:
+            entry = self.tokens.get(key)
+        if entry is None:
+            raise UtilException("Token is not cached")
+        return await self.__fetch_once(key, entry.fetch, entry.ttl, entry.margin, force=True)
+
+    async def __fetch_once(  # pylint: disable=too-many-arguments
+        self,
+        key: TokenKey,
+        fetch: Callable[[], Awaitable[str]],
+        ttl: float,
+        margin: float,
+        *,
+        force: bool,
+    ) -> str:
+        with self._lock:
+            entry = self.tokens.get(key)
+            if not force and entry is not None and entry.expires_at > time.monotonic():
+                return _served_token_(entry)
+            future = self.inflight.get(key)
+            is_leader = future is None
+            if future is None:
+                future = Future()
+                self.inflight[key] = future
+        if not is_leader:
+            # shield so that a cancelled follower does not cancel the shared refresh
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            token = await fetch()
+        except BaseException as ex:
+            with self._lock:
+                self.inflight.pop(key, None)
+            future.set_exception(ex)
+            raise
+        now = time.monotonic()
+        with self._lock:
+            expires_at = now + token_ttl(token, ttl, margin)
+            entry = CachedToken(token, now, expires_at, fetch, ttl, margin)
+            self.tokens[key] = entry
+            self.inflight.pop(key, None)
+        token = _served_token_(entry)
+        future.set_result(token)
+        return token
+
+
+class TokenRefresher(threading.Thread):
+    """Daemon thread renewing every cached token ahead of its expiry.
+
+    Each token is renewed once `fraction` of its lifetime has elapsed, brought forward by a random
+    jitter of up to `jitter` of its lifetime so that tokens fetched together are not renewed
+    together. A failed renewal is retried after an exponential backoff. Requests for a renewed
+    token are served from the cache and never wait on EAS."""
+
+    _instance: Optional["TokenRefresher"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        fraction: float = DEFAULT_REFRESH_FRACTION,
+        jitter: float = DEFAULT_REFRESH_JITTER,
+        poll_interval: float = 1.0,
+    ):
+        if not 0 < fraction < 1 or not 0 <= jitter < fraction:
+            raise UtilException("Token refresh fraction must be in (0, 1) and exceed the jitter")
+        super().__init__(name="connectchain-token-refresher", daemon=True)
+        self.fraction = fraction
+        self.jitter = jitter
+        self.poll_interval = poll_interval
+        self.schedule: Dict[TokenKey, Tuple[float, float]] = {}
+        # consecutive failed renewals of each token
+        self.failures: Dict[TokenKey, int] = {}
+        self._stop_event = threading.Event()
+
+    @classmethod
+    def ensure_started(
+        cls,
+        fraction: float = DEFAULT_REFRESH_FRACTION,
+        jitter: float = DEFAULT_REFRESH_JITTER,
+        poll_interval: float = 1.0,
+    ) -> "TokenRefresher":
+        """start the process-wide refresher unless it is already running"""
+        with cls._instance_lock:
+            if cls._instance is None or not cls._instance.is_alive():
+                cls._instance = cls(fraction, jitter, poll_interval)
+                cls._instance.start()
+            return cls._instance
+
+    @classmethod
+    def shutdown(cls, timeout: Optional[float] = None) -> None:
+        """stop the process-wide refresher if it is running"""
+        with cls._instance_lock:
+            refresher, cls._instance = cls._instance, None
+        if refresher is not None:
+            refresher.stop(timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """stop renewing tokens and wait for the thread to exit"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def refresh_at(self, entry: CachedToken) -> float:
+        """monotonic time at which a token is renewed"""
+        lead = self.fraction - random.uniform(0, self.jitter)
+        return entry.fetched_at + (entry.expires_at - entry.fetched_at) * lead
+
+    def due(self, now: Optional[float] = None) -> List[TokenKey]:
+        """keys of the cached tokens that are due for renewal"""
+        now = time.monotonic() if now is None else now
+        entries = TokenCache().entries()
+        for key in list(self.schedule):
+            if key not in entries:
+                del self.schedule[key]
+                self.failures.pop(key, None)
+        due_keys = []
+        for key, entry in entries.items():
+            scheduled = self.schedule.get(key)
+            if scheduled is None or scheduled[0] != entry.fetched_at:
+                # a new token, renewed in the background or on the request path
+                self.failures.pop(key, None)
+                scheduled = (entry.fetched_at, self.refresh_at(entry))
+                self.schedule[key] = scheduled
+            if scheduled[1] <= now:
+                due_keys.append(key)
+        return due_keys
+
+    def failed(self, key: TokenKey, now: Optional[float] = None) -> float:
+        """reschedule the renewal of a token after a failure, returns the retry delay"""
+        now = time.monotonic() if now is None else now
+        failures = self.failures.get(key, 0) + 1
+        self.failures[key] = failures
+        delay = min(MAX_REFRESH_RETRY_DELAY, REFRESH_RETRY_DELAY * 2.0 ** (failures - 1))
+        scheduled = self.schedule.get(key)
+        if scheduled is not None:
+            self.schedule[key] = (scheduled[0], now + delay)
+        return delay
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            for key in self.due():
+                try:
+                    EASSessionPool.background_loop.run(TokenCache().refresh(key))
+                except (Exception, UtilException) as ex:  # pylint: disable=broad-exception-caught
+                    # keep serving the current token, the request path refreshes it on expiry
+                    delay = self.failed(key)
+                    _logger_.warning(
+                        "Background token refresh failed, retrying in %ss: %s", delay, ex
+                    )
+
+
+def _start_token_refresher_(config: Config) -> None:
+    """start the background token refresher when `eas.refresh_ahead` is configured"""
+    refresh_ahead = config.compiled.eas.refresh_ahead
+    refresh_jitter = config.compiled.eas.refresh_jitter
+    if refresh_ahead:
+        TokenRefresher.ensure_started(
+            float(refresh_ahead),
+            DEFAULT_REFRESH_JITTER if refresh_jitter is None else float(refresh_jitter),
+        )
 
 
 def get_token_from_env(index: Any = "1") -> str:
-    """convenience method to get token from environment variables synchronously"""
+    """convenience method to get token from environment variables synchronously
+
+    The token is fetched on the long-lived EAS event loop thread instead of a new event loop per
+    call. Async callers should use `aget_token_from_env` to avoid blocking their loop."""
+    return EASSessionPool.background_loop.run(_token_from_env_(index))
+
+
+async def aget_token_from_env(index: Any = "1") -> str:
+    """convenience method to get token from environment variables asynchronously"""
+    return await _token_from_env_(index)
+
+
+def _token_from_env_(index: Any) -> Coroutine[Any, Any, str]:
+    """validate the model config and credentials, returning the cached token lookup"""
     config = Config.from_env()
-    try:
-        models = config.models
-    except KeyError as ex:
-        raise UtilException("No models defined in config") from ex
-    model_config = models[index]
+    models = config.compiled.models
+    if models is None:
+        raise UtilException("No models defined in config")
+    model_config = models.get(str(index))
     if model_config is None:
         raise UtilException(f'Model config at index "{index}" is not defined')
-    consumer_id_key = None
-    consumer_secret_key = None
-    if model_config.eas:
-        consumer_id_key = model_config.eas.id_key
-        consumer_secret_key = model_config.eas.secret_key
-    if consumer_id_key is None:
-        consumer_id_key = config.eas.id_key
-    consumer_id = os.getenv(f"{consumer_id_key}")
+    eas = model_config.eas
+    consumer_id = os.getenv(f"{eas.id_key}")
     if consumer_id is None:
         raise UtilException(
-            f'Environment variable id key "{consumer_id_key}" not set for model index {index}'
+            f'Environment variable id key "{eas.id_key}" not set for model index {index}'
         )
-    if consumer_secret_key is None:
-        consumer_secret_key = config.eas.secret_key
-    consumer_secret = os.getenv(f"{consumer_secret_key}")
+    consumer_secret = os.getenv(f"{eas.secret_key}")
     if consumer_secret is None:
         raise UtilException(
-            f'Environment variable secret key "{consumer_secret_key}" not set for model index {index}'
+            f'Environment variable secret key "{eas.secret_key}" not set for model index {index}'
         )
-    return asyncio.run(TokenUtil(consumer_id, consumer_secret, config).get_token(model_config))
+    token_util = TokenUtil(consumer_id, consumer_secret, config)
+    key = TokenCache.key(consumer_id, eas.scope, eas.url)
+    ttl = eas.token_refresh_interval or DEFAULT_TOKEN_TTL
+    margin = DEFAULT_EXPIRY_MARGIN if eas.expiry_margin is None else eas.expiry_margin
+    shared_store = eas.shared_store
+    fetch: Callable[[], Awaitable[str]] = lambda: token_util.get_token(model_config)
+    if shared_store:
+        fetch = _shared_fetch_(_shared_token_store_(str(shared_store)), key, fetch, ttl, margin)
+    _start_token_refresher_(config)
+    return TokenCache().get_or_fetch(key, fetch, ttl, margin)
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_token_store_(directory: str) -> SharedTokenStore:
+    return SharedTokenStore(directory)
+
+
+def _shared_fetch_(
+    store: SharedTokenStore,
+    key: TokenKey,
+    fetch: Callable[[], Awaitable[str]],
+    ttl: float,
+    margin: float = DEFAULT_EXPIRY_MARGIN,
+) -> Callable[[], Awaitable[str]]:
+    """fetch through the shared store, so that one worker per host fetches each token
+
+    A stored token is used unless it expires within `margin` seconds or is no newer than the
+    token this process took last; the latter lets a background refresh replace a token that is
+    still valid."""
+
+    async def shared_fetch() -> str:
+        handle = await asyncio.to_thread(store.acquire, key)
+        try:
+            stored = await asyncio.to_thread(store.read, key)
+            if (
+                stored is not None
+                and stored[1] > store.taken.get(key, 0.0)
+                and stored[1] - margin > time.time()
+            ):
+                token = BearerToken(*stored)
+            else:
+                fetched = await fetch()
+                expires_at = getattr(fetched, "expires_at", None) or time.time() + ttl
+                token = BearerToken(str(fetched), expires_at)
+                await asyncio.to_thread(store.write, key, token, expires_at)
+            store.taken[key] = float(token.expires_at or 0.0)
+            return token
+        finally:
+            store.release(handle)
+
+    return shared_fetch
+
+
+@functools.lru_cache(maxsize=128)
+def _keyed_hmac_(consumer_secret: str) -> "hmac.HMAC":
+    """HMAC-SHA256 keyed with the decoded consumer secret, copied for each signature"""
+    return hmac.new(base64.b64decode(consumer_secret), digestmod=hashlib.sha256)
 
 
 # pylint: disable=too-few-public-methods
@@ -83,33 +467,16 @@ class TokenUtil:
         self.consumer_id = consumer_id
         self.consumer_secret = consumer_secret
         self.config = config
+        self.__keyed_hmac: Optional["hmac.HMAC"] = None
 
-    def __retrieve_cert(self, model_config: Any) -> None:
-        """retrieve certificate from the url in the config file if it does not exist locally"""
-        cert_path = None
-        cert_name = None
-        cert_size = None
-        if model_config.cert:
-            cert_path = model_config.cert.cert_path
-            cert_name = model_config.cert.cert_name
-            cert_size = model_config.cert.cert_size
-        if cert_path is None:
-            cert_path = self.config.cert.cert_path
-        if cert_name is None:
-            cert_name = self.config.cert.cert_name
-        if cert_size is None:
-            cert_size = self.config.cert.cert_size
-        if cert_path and cert_name:
-            urllib.request.urlretrieve(str(cert_path), str(cert_name))
-        # check whether the certificate exists locally
-        if cert_name and cert_size and not os.path.getsize("./" + str(cert_name)) == cert_size:
-            raise UtilException("Failed to Download the certificate")
-        # check the expiration date of the certificate
-        if cert_name:
-            cert_data = TokenUtil.read_cert(str(cert_name))
-        cert_expires = TokenUtil.get_cert_expiration(cert_data)
-        if cert_expires < datetime.now():
-            raise UtilException("Certificate expired, please renew")
+    async def __retrieve_cert(self, model_config: Any) -> None:
+        """retrieve certificate from the url in the config file if it does not exist locally,
+        and check that it has not expired"""
+        cert = self.config.compiled.resolve(model_config).cert
+        if cert.cert_name:
+            await CertManager().ensure(
+                str(cert.cert_path) if cert.cert_path else None, str(cert.cert_name), cert.cert_size
+            )
 
     @staticmethod
     def read_cert(cert_name: str) -> str:
@@ -121,21 +488,15 @@ class TokenUtil:
     @staticmethod
     def get_cert_expiration(cert_data: str) -> datetime:
         """get the expiration date of the certificate"""
-        date_str = c.load_certificate(c.FILETYPE_PEM, cert_data).get_notAfter().decode("UTF-8")
-        return datetime.strptime(date_str, "%Y%m%d%H%M%SZ")
+        return cert_expiration(cert_data)
 
-    def __service_payload(self, model_config: Any) -> Dict[str, Any]:
+    @staticmethod
+    def __service_payload(eas: EASSettings) -> Dict[str, Any]:
         """payload to get the bearer token"""
-        scope = None
-        originator_source = None
-        if model_config.eas:
-            scope = model_config.eas.scope
-            originator_source = model_config.eas.originator_source
-        if scope is None:
-            scope = self.config.eas.scope
-        if originator_source is None:
-            originator_source = self.config.eas.originator_source
-        return {"scope": scope, "additional_claims": {"originator_source": originator_source}}
+        return {
+            "scope": eas.scope,
+            "additional_claims": {"originator_source": eas.originator_source},
+        }
 
     @staticmethod
     def __headers(
@@ -156,71 +517,68 @@ class TokenUtil:
         correlation_id: str,  # pylint: disable=unused-argument, too-many-arguments
         sor_name: str,  # pylint: disable=unused-argument
         url: str,
-        json: Any,
+        json: Any,  # pylint: disable=redefined-outer-name
         req_headers: Dict[str, str],
         timeout: Any,
         success_codes: tuple = (200,),  # pylint: disable=unused-argument
         cookies: Any = None,
         proxies: Any = None,
     ) -> tuple:
-        """aiohttp post method"""
-        async with aiohttp.ClientSession() as session:
-            start_time = datetime.now()  # pylint: disable=unused-argument, unused-variable
-            async with session.post(
-                url,
-                json=json,
-                headers=req_headers,
-                timeout=timeout,
-                ssl=False,
-                cookies=cookies,
-                proxy=proxies,
-            ) as response:
-                return await response.json(content_type=None), response.status
+        """aiohttp post method using the pooled EAS session"""
+        return await EASSessionPool().post(
+            url, json=json, headers=req_headers, timeout=timeout, cookies=cookies, proxy=proxies
+        )
 
     @staticmethod
     def __response_builder(out: Any, status_code: int) -> str:
         if status_code == 200:
-            return f"Bearer {out['authorization_token']}"
+            token = out["authorization_token"]
+            return BearerToken(f"Bearer {token}", TokenUtil.__expires_at(out, token))
         raise UtilException(out["description"])
 
+    @staticmethod
+    def __expires_at(out: Any, token: str) -> Optional[float]:
+        """expiry of the token as epoch seconds, from the EAS response or the JWT `exp` claim"""
+        try:
+            if out.get("expires_in") is not None:
+                return time.time() + float(out["expires_in"])
+            if out.get("expires_at") is not None:
+                return float(out["expires_at"])
+        except (AttributeError, TypeError, ValueError):
+            pass
+        return jwt_expiration(str(token))
+
     def __get_signature(self, version: str, timestamp: int) -> str:
         message = f"{self.consumer_id}-{version}-{str(timestamp)}"
         input_byte = bytearray(message, TokenUtil.__BYTE_ARRAY_ENCODING)
-        decoded_secret = base64.b64decode(self.consumer_secret)
-        signature = base64.urlsafe_b64encode(
-            hmac.new(decoded_secret, input_byte, digestmod=hashlib.sha256).digest()
-        )
+        if self.__keyed_hmac is None:
+            self.__keyed_hmac = _keyed_hmac_(self.consumer_secret)
+        # copying the keyed HMAC skips decoding the secret and hashing the key per signature
+        signer = self.__keyed_hmac.copy()
+        signer.update(input_byte)
+        signature = base64.urlsafe_b64encode(signer.digest())
         signature_str = signature[:-1].decode(TokenUtil.__BYTE_ARRAY_ENCODING)
         return signature_str
 
     async def get_token(self, model_config: Any) -> str:
         """async method to get the bearer token"""
-        cert_name = None
-        if model_config.cert:
-            cert_name = model_config.cert.cert_name
-        if cert_name is None:
-            cert_name = self.config.cert.cert_name
-        if cert_name and not os.path.exists(str(cert_name)):
-            self.__retrieve_cert(model_config)
+        settings = self.config.compiled.resolve(model_config)
+        await self.__retrieve_cert(settings)
         correlation_id = uuid.uuid1().hex
         version = TokenUtil.__SERVICE_VERSION
         timestamp = int(time.time() * 1000.0)
         signature = self.__get_signature(version, timestamp)
         sor_name = "dummy"
-        eas_url = None
-        if model_config.eas:
-            eas_url = model_config.eas.url
-        if eas_url is None:
-            eas_url = self.config.eas.url
-        timeout = 5
+        pool_config = EASPoolConfig.from_config(self.config)
+        await EASSessionPool().configure(pool_config)
 
         response = await TokenUtil.__aio_http_post(
             correlation_id,
             sor_name,
-            str(eas_url),
-            self.__service_payload(model_config),
+            str(settings.eas.url),
+            TokenUtil.__service_payload(settings.eas),
             TokenUtil.__headers(correlation_id, self.consumer_id, version, signature, timestamp),
-            timeout,
+            pool_config.timeout,
         )
 
         return TokenUtil.__response_builder(response[0], response[1])